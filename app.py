@@ -1,20 +1,33 @@
-import re
 import time
 import os
 import sys
 import json
+import atexit
 import logging
+import threading
+from collections import Counter, defaultdict
 from contextlib import redirect_stderr
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from driver_pool import DriverPool, PoolExhausted
+from readiness import DEFAULT_WAIT_TIME, wait_until_ready
+from resource_blocking import configure_options as configure_resource_blocking, prepare_page, page_transfer_stats, log_page_stats, read_page_source
+from http_fetcher import MAX_PAGE_BYTES, OUTBOUND_PROXY, PageGone, fetch_html, is_not_modified
+from batch import DomainLimiter, run_batch
+from jobs import JobQueue
+from cache import MemoryCache, SQLiteCache, ResultCache
+from domain_config import DOMAIN_CONFIG, domain_key, get_domain_config, normalize_host, resolve_domain
+from extractors import ExtractorRegistry, body_found
+from parsing import HTML_PARSERS, PARSE_MODES, parse_document, parse_for_extraction
+from sheets import GSpreadSource, TitleIndex, normalize_title
+from title_match import FuzzyTitleIndex
+from metrics import REGISTRY, ARTICLES, RETRIES, TIMEOUTS, Gauge, add_timings, collect_timings, record_stage, span
+from workers import WorkerPool, WorkersBusy, WorkerFailed
+from resilience import CircuitBreaker, backoff_delay, classify_error
+from discovery import Discovery, SeenStore
+from article_store import ArticleStore
+from warmup import Warmup
 
 app = Flask(__name__)
 
@@ -24,69 +37,6 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Configuración de selectores por dominio (tu configuración original)
-DOMAIN_CONFIG = {
-    'aristeguinoticias.com': {
-        'title_selector': ['h1.entry-title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div.entry-content',
-        'body_fallback_selector': 'div.contenido',
-        'wait_time': 20
-    },
-    'www.infobae.com': {
-        'title_selector': ['h1.article-headline', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div.body-article p.paragraph[data-mrf-recirculation="Links inline"]'
-    },
-    'www.eluniversal.com.mx': {
-        'title_selector': ['h1.title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div.colum2 p.sc__font-paragraph[itemprop="description"]',
-        'body_fallback_selector': 'p.sc__font-paragraph[itemprop="description"]'
-    },
-    'lopezdoriga.com': {
-        'title_selector': ['h1.entry-title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div.article-content'
-    },
-    'www.milenio.com': {
-        'title_selector': ['h1.title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div#content-body.media-container.news[itemprop="articleBody"]'
-    },
-    'www.elfinanciero.com.mx': {
-        'title_selector': ['h1.c-heading.b-headline', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'article.b-article-body.article-body-wrapper'
-    },
-    'www.jornada.com.mx': {
-        'title_selector': ['h1.titulo_art', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
-        'body_selector': 'div#content_nitf'
-    },
-    'www.excelsior.com.mx': {
-        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
-        'body_selector': 'div.field-items'
-    },
-    'www.eleconomista.com.mx': {
-        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
-        'body_selector': 'div.c-detail__body'
-    },
-    'www.proceso.com.mx': {
-        'title_selector': ['h1.titular'],
-        'body_selector': 'div.cuerpo-nota#cuerpo-nota'
-    },
-    'www.sinembargo.mx': {
-        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
-        'body_selector': 'div.entry-content'
-    },
-    'lasillarota.com': {
-        'title_selector': ['h1.titulo'],
-        'body_selector': 'div.article-content--cuerpo'
-    },
-    'www.debate.com.mx': {
-        'title_selector': ['h1.newsfull__title'],
-        'body_selector': 'div.newsfull__body'
-    },
-    'default': {
-        'title_selector': ['h1', 'h1.title', 'h1.post-title', 'h1.entry-title', 'meta[property="og:title"]', 'meta[name="title"]', 'title'],
-        'body_selector': 'article, div.entry-content, div.post-content, div.content, div.article-body, main, div[itemprop="articleBody"]'
-    }
-}
-
 def get_domain(url):
     """Extrae el dominio de la URL."""
     parsed_url = urlparse(url)
@@ -94,6 +44,11 @@ def get_domain(url):
 
 def setup_chrome_driver():
     """Configurar Chrome driver para ambiente Linux (Render)"""
+    # selenium.webdriver tarda en importarse: se carga con el primer navegador
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    
     options = Options()
     
     # Configuraciones para ambiente headless en Render
@@ -115,6 +70,9 @@ def setup_chrome_driver():
     options.add_argument('--disable-blink-features=AutomationControlled')
     options.add_argument('--user-agent=Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Mobile Safari/537.36')
     
+    if OUTBOUND_PROXY:
+        options.add_argument(f'--proxy-server={OUTBOUND_PROXY}')
+    
     # Configuraciones adicionales para Render
     options.add_argument('--single-process')
     options.add_argument('--disable-background-timer-throttling')
@@ -122,210 +80,448 @@ def setup_chrome_driver():
     options.add_argument('--disable-backgrounding-occluded-windows')
     options.add_argument('--disable-ipc-flooding-protection')
     
+    # driver.get() vuelve en DOMContentLoaded; el resto lo decide wait_until_ready
+    options.page_load_strategy = 'eager'
+    
+    # Sin imágenes, y registro de red para medir bytes por página
+    configure_resource_blocking(options)
+    
     # Configurar servicio
     # En Render, ChromeDriver estará disponible globalmente
     service = Service()  # Sin especificar ruta, usa el del PATH
     
     return webdriver.Chrome(service=service, options=options)
 
-def get_news_content(url, max_retries=2):
-    driver = None
+# Pool de navegadores reutilizables (configurable por variables de entorno)
+# Memoria para todo el scraping, sumada entre navegadores y procesos worker.
+# En el plan de 512 MB deja ~128 MB para la API; 0 = sin presupuesto.
+SCRAPER_MEMORY_BUDGET_MB = int(os.environ.get('SCRAPER_MEMORY_BUDGET_MB', 384))
+SCRAPER_POOL_SIZE = int(os.environ.get('SCRAPER_POOL_SIZE', 2))
+
+DRIVER_POOL = DriverPool(
+    setup_chrome_driver,
+    size=SCRAPER_POOL_SIZE,
+    lease_timeout=float(os.environ.get('SCRAPER_POOL_LEASE_TIMEOUT', 60)),
+    max_uses=int(os.environ.get('SCRAPER_POOL_MAX_USES', 50)),
+    max_heap_mb=int(os.environ.get('SCRAPER_POOL_MAX_HEAP_MB', 256)),
+    # RSS del árbol de procesos de Chrome: reciclar al devolverlo / matar en uso
+    # (0 = sin tope). Por defecto se recicla al pasar su parte del presupuesto;
+    # el presupuesto se aplica a la suma de todos los navegadores.
+    max_rss_mb=int(os.environ.get('SCRAPER_POOL_MAX_RSS_MB', SCRAPER_MEMORY_BUDGET_MB // max(SCRAPER_POOL_SIZE, 1))),
+    kill_rss_mb=int(os.environ.get('SCRAPER_POOL_KILL_RSS_MB', 0)),
+    memory_budget_mb=SCRAPER_MEMORY_BUDGET_MB,
+    watchdog_interval=float(os.environ.get('SCRAPER_POOL_WATCHDOG_INTERVAL', 5))
+)
+DRIVER_POOL.start_watchdog()
+atexit.register(DRIVER_POOL.close)
+
+# Extractores compilados una vez al arrancar a partir de DOMAIN_CONFIG
+EXTRACTORS = ExtractorRegistry(DOMAIN_CONFIG)
+
+# Backend de BeautifulSoup ('lxml' o 'html.parser') y modo de parseo: 'full'
+# parsea la página completa, 'subtree' solo los nodos que lee el extractor
+# (más rápido en páginas grandes pero con más memoria pico: ver
+# parse_for_extraction; se recomienda 'full')
+HTML_PARSER = os.environ.get('HTML_PARSER', 'html.parser')
+HTML_PARSE_MODE = os.environ.get('HTML_PARSE_MODE', 'full')
+if HTML_PARSER not in HTML_PARSERS or HTML_PARSE_MODE not in PARSE_MODES:
+    raise ValueError(f"HTML_PARSER debe ser uno de {HTML_PARSERS} y HTML_PARSE_MODE uno de {PARSE_MODES}")
+
+def parse_html(html, domain):
+    """Parsea el HTML según el backend y modo configurados."""
+    selectors = EXTRACTORS.for_domain(domain).selectors
+    with span('parse', domain_key(domain)):
+        return parse_for_extraction(html, selectors, parser=HTML_PARSER, mode=HTML_PARSE_MODE)
+
+def extract_content(soup, domain):
+    """Extrae título y cuerpo de un documento ya parseado."""
+    with span('extract', domain_key(domain)):
+        return EXTRACTORS.for_domain(domain).extract(soup)
+
+# Tope de carga de la página en Selenium (set_page_load_timeout), en segundos
+PAGE_LOAD_TIMEOUT = float(os.environ.get('PAGE_LOAD_TIMEOUT', 60))
+
+def render_with_browser(url, config):
+    """Renderiza la página con un navegador del pool.
+    
+    Devuelve (HTML, estadísticas de la página: bytes transferidos,
+    peticiones, peticiones bloqueadas, tiempo de carga y tamaño del HTML
+    antes de truncarlo).
+    """
+    label = domain_key(get_domain(url))
+    
+    # El driver vuelve al pool apenas tenemos el HTML; la espera por el
+    # préstamo incluye lanzar Chrome si no había uno ocioso
+    lease_started = time.perf_counter()
+    with DRIVER_POOL.lease() as driver:
+        record_stage('driver_lease', time.perf_counter() - lease_started, label)
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        prepare_page(driver, config)
+        started = time.monotonic()
+        with span('navigate', label):
+            driver.get(url)
+        
+        # Esperar solo lo necesario según la estrategia del dominio
+        with span('wait', label):
+            if not wait_until_ready(driver, config):
+                TIMEOUTS.inc(domain=label, kind='wait')
+        
+        # Obtener el HTML renderizado, sin scripts ni estilos y con tope de tamaño
+        with span('page_source', label):
+            html, source_chars = read_page_source(driver, MAX_PAGE_BYTES)
+        page_stats = {
+            **page_transfer_stats(driver),
+            "load_time": round(time.monotonic() - started, 3),
+            "source_chars": source_chars
+        }
+    
+    log_page_stats(url, page_stats)
+    return html, page_stats
+
+def fetch_with_http(url, domain):
+    """Intenta obtener el documento sin navegador.
+    
+    Devuelve (documento parseado, HttpPage) o None si hay que escalar a
+    Selenium (error HTTP o el selector del cuerpo no está en el HTML inicial).
+    """
+    with span('http_fetch', domain_key(domain)):
+        page = fetch_html(url)
+    if page is None:
+        return None
+    
+    soup = parse_html(page.html, domain)
+    if not EXTRACTORS.for_domain(domain).has_body(soup):
+        logging.info(f"Selector de cuerpo ausente en HTML plano de {url}, escalando a Selenium")
+        return None
+    
+    return soup, page
+
+# Conteo por dominio del nivel que sirvió cada respuesta ('http', 'browser')
+# y de las veces que el nivel HTTP no bastó ('escalated')
+TIER_STATS = defaultdict(Counter)
+TIER_STATS_LOCK = threading.Lock()
+
+def record_tier(domain, tier):
+    with TIER_STATS_LOCK:
+        TIER_STATS[domain][tier] += 1
+    ARTICLES.inc(domain=domain_key(domain), tier=tier)
+
+def drain_tier_stats():
+    """Conteos por nivel desde la última llamada (para enviarlos desde un worker)."""
+    with TIER_STATS_LOCK:
+        drained = {domain: dict(counts) for domain, counts in TIER_STATS.items()}
+        TIER_STATS.clear()
+    return drained
+
+def tier_stats():
+    """Copia de los conteos por nivel, tomada con el lock."""
+    with TIER_STATS_LOCK:
+        return {domain: dict(counts) for domain, counts in TIER_STATS.items()}
+
+def merge_tier_stats(drained):
+    with TIER_STATS_LOCK:
+        for domain, counts in drained.items():
+            TIER_STATS[domain].update(counts)
+
+# Tope de una tarea en un worker de scraping: pasado este tiempo se mata el
+# worker (y su Chrome). Queda por debajo del --timeout de gunicorn (120).
+SCRAPER_TASK_TIMEOUT = float(os.environ.get('SCRAPER_TASK_TIMEOUT', 110))
+
+# Reintentos con Selenium: backoff exponencial con jitter y un presupuesto
+# total que deja margen antes de SCRAPER_TASK_TIMEOUT. Un reintento solo se
+# hace si, en el peor caso, también termina dentro del presupuesto.
+RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 1))
+RETRY_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', 8))
+RETRY_BUDGET = float(os.environ.get('RETRY_BUDGET', SCRAPER_TASK_TIMEOUT - 10))
+# Margen por intento para lanzar Chrome, leer el HTML y extraer
+ATTEMPT_OVERHEAD = float(os.environ.get('ATTEMPT_OVERHEAD', 5))
+
+def worst_case_attempt(config):
+    """Segundos que puede tardar un intento con Selenium: carga, espera y margen."""
+    return PAGE_LOAD_TIMEOUT + config.get('wait_time', DEFAULT_WAIT_TIME) + ATTEMPT_OVERHEAD
+
+def fetch_article(url, max_retries=2):
+    """Obtiene título y cuerpo por el nivel más barato que funcione.
+    
+    Primero intenta HTTP plano (salvo dominios con 'requires_js'); si falla o
+    falta el selector del cuerpo, escala a Selenium. Solo se reintentan los
+    errores reintentables (ver classify_error), hasta `max_retries` intentos,
+    y solo si el reintento en el peor caso (worst_case_attempt) termina
+    dentro de RETRY_BUDGET segundos contados desde el inicio, HTTP incluido.
+    Devuelve un dict con 'title', 'body' y 'tier' (y los validadores HTTP
+    'etag'/'last_modified' cuando los hay). Los errores incluyen
+    'site_failure' para el circuit breaker.
+    """
+    # Obtener el dominio para configuraciones específicas
+    domain = get_domain(url)
+    config = get_domain_config(domain)
+    started = time.monotonic()
+    
     try:
+        if not config.get('requires_js'):
+            fetched = fetch_with_http(url, domain)
+            if fetched is not None:
+                soup, page = fetched
+                title, body_text = extract_content(soup, domain)
+                record_tier(domain, 'http')
+                logging.info(f"Extracción exitosa (http) para: {url}")
+                return {
+                    "title": title,
+                    "body": body_text,
+                    "tier": "http",
+                    "etag": page.etag,
+                    "last_modified": page.last_modified
+                }
+            record_tier(domain, 'escalated')
+        
         for attempt in range(max_retries):
             try:
                 logging.info(f"Intento {attempt + 1} para procesar: {url}")
+                if attempt:
+                    RETRIES.inc(domain=domain_key(domain))
                 
-                # Configurar driver
-                driver = setup_chrome_driver()
-                driver.set_page_load_timeout(60)
-                driver.get(url)
-                
-                # Obtener el dominio para configuraciones específicas
-                domain = get_domain(url)
-                config = DOMAIN_CONFIG.get(domain, DOMAIN_CONFIG['default'])
-                
-                # Espera dinámica para aristeguinoticias.com
-                if domain == 'aristeguinoticias.com':
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, config['body_selector']))
-                        )
-                    except TimeoutException:
-                        logging.warning(f"Timeout en WebDriverWait para {url}, usando espera fija")
-                        time.sleep(config.get('wait_time', 15))
-                else:
-                    time.sleep(15)
-                
-                # Obtener el HTML renderizado
-                html = driver.page_source
-                
-                # Parsear con BeautifulSoup
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Eliminar scripts, estilos, comentarios y elementos no deseados
-                for element in soup(['script', 'style', 'comment', 'nav', 'footer', 'aside', 'iframe']):
-                    element.decompose()
-                
-                # Extraer el título
-                title = None
-                for selector in config['title_selector']:
-                    try:
-                        if selector.startswith('meta'):
-                            element = soup.select_one(selector)
-                            if element and element.get('content'):
-                                title = element.get('content')
-                                break
-                        elif selector == 'title':
-                            element = soup.find('title')
-                            if element and element.get_text(strip=True):
-                                title = element.get_text(strip=True)
-                                break
-                        else:
-                            element = soup.select_one(selector)
-                            if element and element.get_text(strip=True):
-                                title = element.get_text(strip=True)
-                                break
-                    except Exception:
-                        continue
-                
-                if not title:
-                    title = "Título no encontrado"
-                
-                # Extraer el cuerpo (tu lógica original)
-                try:
-                    if domain == 'www.excelsior.com.mx':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            body_text = None
-                    elif domain == 'www.eleconomista.com.mx':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            body_text = None
-                    elif domain == 'www.proceso.com.mx':
-                        bajada = soup.select_one('strong.bajada')
-                        bajada_text = bajada.get_text(strip=True) if bajada else ''
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            for aside in content_div.select('aside.relacionadas.con-foto.linea-1078'):
-                                aside.decompose()
-                            cuerpo_text = content_div.get_text(strip=True)
-                            body_text = f"{bajada_text} {cuerpo_text}".strip() if bajada_text else cuerpo_text
-                        else:
-                            body_text = bajada_text if bajada_text else None
-                    elif domain == 'www.sinembargo.mx':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            for figure in content_div.select('figure'):
-                                figure.decompose()
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            body_text = None
-                    elif domain == 'aristeguinoticias.com':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            content_div = soup.select_one(config.get('body_fallback_selector', ''))
-                            if content_div:
-                                for unwanted in content_div.select('div.ad, div.share, div.comments, div.related-posts, div.social, div.tags, p.author, div.meta'):
-                                    unwanted.decompose()
-                                body_text = content_div.get_text(strip=True)
-                            else:
-                                body_text = None
-                    elif domain == 'lasillarota.com':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            for unwanted in content_div.select('div.container, p.image-align-center, strong, div.tags-cloud, a[href="https://www.whatsapp.com/channel/0029Va6evSkGk1Ftej78ks0B"], a[href="https://news.google.com/publications/CAAqKggKIiRDQklTRlFnTWFoRUtEMnhoYzJsc2JHRnliM1JoTG1OdmJTZ0FQAQ?hl=es-419&gl=MX&ceid=MX%3Aes-419"]'):
-                                unwanted.decompose()
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            body_text = None
-                    elif domain == 'www.debate.com.mx':
-                        content_div = soup.select_one(config['body_selector'])
-                        if content_div:
-                            for unwanted in content_div.select('div.ck-related-news, li'):
-                                unwanted.decompose()
-                            body_text = content_div.get_text(strip=True)
-                        else:
-                            body_text = None
-                    elif domain in ['www.infobae.com', 'www.eluniversal.com.mx']:
-                        paragraphs = soup.select(config['body_selector'])
-                        if paragraphs:
-                            body_text = ' '.join(p.get_text(strip=True) for p in paragraphs)
-                        else:
-                            body_text = None
-                        if not body_text and domain == 'www.eluniversal.com.mx':
-                            paragraphs = soup.select(config.get('body_fallback_selector', ''))
-                            if paragraphs:
-                                body_text = ' '.join(p.get_text(strip=True) for p in paragraphs)
-                            else:
-                                body_text = None
-                    else:
-                        article = soup.select_one(config['body_selector'])
-                        if article:
-                            for unwanted in article.select('div.ad, div.share, div.comments, div.related-posts, div.social, div.tags, p.author, div.meta, div.sharedaddy, div.entry-meta, figure, aside, iframe'):
-                                unwanted.decompose()
-                            body_text = article.get_text(separator=' ', strip=True)
-                        else:
-                            body_text = None
-                    
-                    if not body_text and domain == 'aristeguinoticias.com':
-                        article = soup.select_one('div.contenido')
-                        if article:
-                            for unwanted in article.select('div.ad, div.share, div.comments, div.related-posts, div.social, div.tags, p.author, div.meta, div.sharedaddy, div.entry-meta'):
-                                unwanted.decompose()
-                            body_text = article.get_text(separator=' ', strip=True)
-                    
-                    if not body_text and domain not in ['www.infobae.com', 'www.eluniversal.com.mx', 'aristeguinoticias.com', 'lopezdoriga.com', 'www.milenio.com', 'www.elfinanciero.com.mx', 'www.jornada.com.mx', 'www.excelsior.com.mx', 'www.eleconomista.com.mx', 'www.proceso.com.mx', 'www.sinembargo.mx', 'lasillarota.com', 'www.debate.com.mx']:
-                        article = soup.select_one('article') or soup.body
-                        if article:
-                            for unwanted in article.select('div.ad, div.share, div.comments, div.related-posts, div.social, div.tags, p.author, div.meta, div.sharedaddy, div.entry-meta'):
-                                unwanted.decompose()
-                            body_text = article.get_text(separator=' ', strip=True)
-                    
-                    if not body_text:
-                        body_text = f"No se pudo encontrar el cuerpo de la noticia para el selector {config['body_selector']}."
-                
-                except Exception as e:
-                    body_text = f"Error al extraer el cuerpo: {str(e)}"
-                
-                # Limpiar texto: eliminar espacios múltiples y líneas vacías
-                body_text = re.sub(r'\s+', ' ', body_text).strip()
-                
-                # Limitar longitud para evitar contenido irrelevante
-                max_length = 5000
-                if len(body_text) > max_length:
-                    body_text = body_text[:max_length] + '...'
+                html, page_stats = render_with_browser(url, config)
+                title, body_text = extract_content(parse_html(html, domain), domain)
+                record_tier(domain, 'browser')
                 
                 logging.info(f"Extracción exitosa para: {url}")
-                return title, body_text
+                return {"title": title, "body": body_text, "tier": "browser", "page_stats": page_stats}
             
             except (WebDriverException, TimeoutException) as e:
-                logging.error(f"Intento {attempt + 1} fallido para {url}: {str(e)}")
-                if attempt < max_retries - 1:
-                    if driver:
-                        try:
-                            driver.quit()
-                        except:
-                            pass
-                    time.sleep(2)
+                retryable, site_failure = classify_error(e)
+                logging.error(
+                    f"Intento {attempt + 1} fallido para {url} ({'reintentable' if retryable else 'fatal'}): {str(e)}"
+                )
+                if isinstance(e, TimeoutException):
+                    TIMEOUTS.inc(domain=domain_key(domain), kind='page_load')
+                
+                delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                worst_case = time.monotonic() - started + delay + worst_case_attempt(config)
+                if retryable and attempt < max_retries - 1 and worst_case <= RETRY_BUDGET:
+                    time.sleep(delay)
                     continue
-                return "Error", f"Error de Selenium al procesar la noticia tras {max_retries} intentos: {str(e)}"
+                return {
+                    "title": "Error",
+                    "body": f"Error de Selenium al procesar la noticia tras {attempt + 1} intentos: {str(e)}",
+                    "tier": "browser",
+                    "site_failure": site_failure
+                }
+    
+    except PageGone as e:
+        logging.info(f"Página inexistente, sin escalar a Selenium: {str(e)}")
+        return {"title": "Error", "body": f"La página no existe: {str(e)}", "tier": "http", "site_failure": False}
+    
+    except PoolExhausted as e:
+        logging.error(f"Pool de navegadores agotado para {url}: {str(e)}")
+        return {"title": "Error", "body": f"No hay navegadores disponibles: {str(e)}", "tier": "browser"}
     
     except Exception as e:
         logging.error(f"Error general al procesar {url}: {str(e)}")
-        return "Error", f"Error general al procesar la noticia: {str(e)}"
+        return {"title": "Error", "body": f"Error general al procesar la noticia: {str(e)}", "tier": None}
+
+# Workers de scraping en procesos aparte (0 = scrapear dentro del proceso de
+# la API). Cada worker tiene su propio navegador, así que SCRAPER_PROCESSES
+# pasa a ser el tope de navegadores; con workers, gunicorn debe usar hilos
+# (--threads) para que la API siga respondiendo mientras esperan.
+SCRAPER_PROCESSES = int(os.environ.get('SCRAPER_PROCESSES', 0))
+
+def _build_workers():
+    if SCRAPER_PROCESSES <= 0:
+        return None
+    
+    pool = WorkerPool(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrape_worker.py')],
+        processes=SCRAPER_PROCESSES,
+        max_pending=int(os.environ.get('SCRAPER_MAX_PENDING', SCRAPER_PROCESSES * 4)),
+        wait_timeout=float(os.environ.get('SCRAPER_QUEUE_WAIT', 30)),
+        task_timeout=SCRAPER_TASK_TIMEOUT,
+        max_tasks=int(os.environ.get('SCRAPER_WORKER_MAX_TASKS', 200)),
+        # El presupuesto se vigila sumando todos los workers; cada uno además
+        # acota su navegador a su parte
+        memory_budget_mb=SCRAPER_MEMORY_BUDGET_MB,
+        env={**os.environ, 'SCRAPER_MEMORY_BUDGET_MB': str(SCRAPER_MEMORY_BUDGET_MB // SCRAPER_PROCESSES)}
+    )
+    pool.start()
+    atexit.register(pool.close)
+    return pool
+
+WORKERS = _build_workers()
+
+def fetch_in_worker(url, max_retries=2, wait_timeout=None):
+    """fetch_article en un worker de scraping, sumando sus métricas y tiempos.
     
+    Lanza WorkersBusy si ningún worker se liberó a tiempo.
+    """
+    try:
+        response = WORKERS.run({"url": url, "max_retries": max_retries}, wait_timeout)
+    except WorkerFailed as e:
+        return {"title": "Error", "body": f"El worker de scraping falló: {str(e)}", "tier": None}
+    
+    REGISTRY.merge(response['metrics'])
+    merge_tier_stats(response['tiers'])
+    add_timings(response['timings'])
+    return response['result']
+
+# Circuit breaker por sitio: vive en el proceso de la API para que todos los
+# workers compartan el estado
+BREAKER = CircuitBreaker(
+    failure_threshold=int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5)),
+    cooldown=float(os.environ.get('BREAKER_COOLDOWN', 60)),
+    max_cooldown=float(os.environ.get('BREAKER_MAX_COOLDOWN', 600))
+)
+
+def fetch(url, max_retries=2, wait_timeout=None):
+    """fetch_article (en un worker si están habilitados) detrás del circuit breaker."""
+    key = politeness_key(url)
+    if not BREAKER.allow(key):
+        return {
+            "title": "Error",
+            "body": f"Sitio {key} no disponible temporalmente (circuito abierto), reintentar en {BREAKER.retry_in(key):.0f}s",
+            "tier": None
+        }
+    
+    outcome = None
+    try:
+        if WORKERS is None:
+            result = fetch_article(url, max_retries)
+        else:
+            result = fetch_in_worker(url, max_retries, wait_timeout)
+        # Sin 'site_failure' (pool agotado, worker caído) el resultado no dice nada del sitio
+        if result['title'] != "Error":
+            outcome = True
+        elif 'site_failure' in result:
+            outcome = not result['site_failure']
+        return result
     finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+        BREAKER.record(key, outcome)
+
+def active_browsers():
+    # Con workers, cada worker ocupado tiene su navegador en uso
+    if WORKERS is not None:
+        return WORKERS.stats()['busy']
+    return DRIVER_POOL.stats()['leased']
+
+def total_browsers():
+    if WORKERS is not None:
+        return WORKERS.stats()['processes']
+    return DRIVER_POOL.stats()['total']
+
+REGISTRY.register(Gauge('scraper_circuits_open', 'Sitios con el circuito abierto o semiabierto', function=lambda: BREAKER.open_count()))
+REGISTRY.register(Gauge('scraper_browsers_active', 'Navegadores en uso en este momento', function=active_browsers))
+REGISTRY.register(Gauge('scraper_browsers_total', 'Navegadores disponibles (pool o workers)', function=total_browsers))
+if WORKERS is not None:
+    REGISTRY.register(Gauge('scraper_workers_pending', 'Solicitudes esperando un worker libre', function=lambda: WORKERS.stats()['pending']))
+
+def _build_result_cache():
+    backend = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+    if backend == 'none':
+        return None
+    
+    max_entries = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 1000))
+    max_bytes = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+    if backend == 'sqlite':
+        store = SQLiteCache(
+            os.environ.get('RESULT_CACHE_PATH', '/tmp/news_scraper_cache.sqlite3'),
+            max_entries=max_entries, max_bytes=max_bytes
+        )
+    else:
+        store = MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+    
+    return ResultCache(store, ttl=float(os.environ.get('RESULT_CACHE_TTL', 3600)))
+
+# Caché de resultados por URL normalizada ('memory', 'sqlite' o 'none')
+RESULT_CACHE = _build_result_cache()
+
+# Artículos persistidos con el cuerpo comprimido y marca de casi duplicados
+ARTICLE_STORE = ArticleStore(
+    os.environ.get('ARTICLE_STORE_PATH', '/tmp/news_scraper_articles.sqlite3'),
+    level=int(os.environ.get('ARTICLE_STORE_LEVEL', 9)),
+    max_distance=int(os.environ.get('ARTICLE_DUPLICATE_DISTANCE', 3))
+) if os.environ.get('ARTICLE_STORE_ENABLED', '1') == '1' else None
+ARTICLES_PAGE_MAX = int(os.environ.get('ARTICLES_PAGE_MAX', 200))
+
+def persist(url, result):
+    """Guarda un artículo recién scrapeado y agrega 'article_id' y 'duplicate_of'."""
+    if ARTICLE_STORE is None or result['title'] == "Error" or not body_found(result['body']):
+        return result
+    try:
+        with span('store', domain_key(get_domain(url))):
+            article_id, duplicate_of = ARTICLE_STORE.save(
+                url, politeness_key(url), result['title'], result['body'], result.get('tier')
+            )
+    except Exception as e:
+        # No perder el artículo scrapeado por una falla del almacén
+        logging.error(f"Error guardando el artículo {url}: {str(e)}")
+        return result
+    if duplicate_of:
+        logging.info(f"{url} es casi duplicado de {duplicate_of['url']} (distancia {duplicate_of['distance']})")
+    return {**result, "article_id": article_id, "duplicate_of": duplicate_of}
+
+def scrape_article(url, max_retries=2, refresh=False, wait_timeout=None):
+    """Como fetch_article, pero sirviendo desde la caché de resultados.
+    
+    Una entrada vencida con ETag/Last-Modified se revalida con un GET
+    condicional antes de volver a scrapear. El dict devuelto incluye
+    'cache' con 'status' ('hit', 'revalidated', 'miss') y 'age' en segundos.
+    `wait_timeout` es la espera máxima por un worker libre (ver fetch).
+    Lo scrapeado se guarda en ARTICLE_STORE (ver persist).
+    """
+    if RESULT_CACHE is None:
+        return {**persist(url, fetch(url, max_retries, wait_timeout)), "cache": None}
+    
+    key, entry, age = RESULT_CACHE.lookup(url)
+    if entry and not refresh:
+        if RESULT_CACHE.is_fresh(age):
+            RESULT_CACHE.record('hit')
+            return {**entry['value'], "cache": {"status": "hit", "age": round(age, 1)}}
+        
+        config = get_domain_config(get_domain(url))
+        if not config.get('requires_js') and revalidate(url, entry):
+            RESULT_CACHE.touch(key)
+            RESULT_CACHE.record('revalidated')
+            return {**entry['value'], "cache": {"status": "revalidated", "age": 0.0}}
+        RESULT_CACHE.record('stale')
+    
+    result = persist(url, fetch(url, max_retries, wait_timeout))
+    RESULT_CACHE.record('miss')
+    
+    # No guardar errores para no fijar un fallo transitorio durante todo el TTL
+    if result['title'] != "Error":
+        RESULT_CACHE.store(key, result, etag=result.get('etag'), last_modified=result.get('last_modified'))
+    
+    return {**result, "cache": {"status": "miss", "age": 0.0}}
+
+def revalidate(url, entry):
+    """GET condicional de una entrada vencida de la caché."""
+    with span('revalidate', domain_key(get_domain(url))):
+        return is_not_modified(url, entry['etag'], entry['last_modified'])
+
+def scrape_with_timings(url, refresh=False, timings=False):
+    """scrape_article que, con `timings`, agrega los segundos por etapa en 'timings'."""
+    if not timings:
+        return scrape_article(url, refresh=refresh)
+    with collect_timings() as collected:
+        article = scrape_article(url, refresh=refresh)
+    return {**article, "timings": collected}
+
+def get_news_content(url, max_retries=2):
+    result = scrape_article(url, max_retries)
+    return result['title'], result['body']
+
+# Lotes: hilos por request, tope por dominio y tiempo máximo por debajo del
+# --timeout de gunicorn. El tope global de navegadores lo impone DRIVER_POOL.
+BATCH_MAX_URLS = int(os.environ.get('BATCH_MAX_URLS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+BATCH_TIMEOUT = float(os.environ.get('BATCH_TIMEOUT', 100))
+def politeness_key(url):
+    """Clave de límite por sitio: la de DOMAIN_CONFIG o el host normalizado."""
+    host = get_domain(url)
+    return resolve_domain(host) or normalize_host(host)
+
+DOMAIN_LIMITER = DomainLimiter(
+    default_limit=int(os.environ.get('DOMAIN_MAX_CONCURRENCY', 2)),
+    limits={domain: config['max_concurrency'] for domain, config in DOMAIN_CONFIG.items() if 'max_concurrency' in config}
+)
 
 # Rutas de la API Flask
 @app.route('/', methods=['GET'])
@@ -334,9 +530,30 @@ def health_check():
     return jsonify({
         "status": "ok",
         "message": "News Scraper API is running",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "circuits": BREAKER.states(),
+        "warmup": WARMUP.status
     })
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Estadísticas internas para monitoreo"""
+    return jsonify({
+        "pool": DRIVER_POOL.stats(),
+        "workers": WORKERS.stats() if WORKERS else None,
+        "tiers": tier_stats(),
+        "cache": RESULT_CACHE.stats() if RESULT_CACHE else None,
+        "articles": ARTICLE_STORE.stats() if ARTICLE_STORE else None,
+        "titles": TITLE_INDEX.stats(),
+        "warmup": WARMUP.state(),
+        "timestamp": time.time()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/scrape', methods=['POST'])
 def scrape_news():
     """Endpoint principal para scraping de noticias"""
@@ -359,22 +576,35 @@ def scrape_news():
         logging.info(f"Procesando solicitud para: {url}")
         
         # Ejecutar el scraping
-        title, body = get_news_content(url)
+        article = scrape_with_timings(url, refresh=bool(data.get('refresh')), timings=bool(data.get('timings')))
         
         # Construir respuesta
         result = {
             "success": True,
             "data": {
-                "title": title,
-                "body": body,
+                "title": article['title'],
+                "body": article['body'],
                 "url": url,
-                "domain": get_domain(url)
+                "domain": get_domain(url),
+                "tier": article['tier'],
+                "cache": article['cache'],
+                "page_stats": article.get('page_stats'),
+                "timings": article.get('timings'),
+                "article_id": article.get('article_id'),
+                "duplicate_of": article.get('duplicate_of')
             },
             "timestamp": time.time()
         }
         
         return jsonify(result)
         
+    except WorkersBusy as e:
+        logging.warning(f"Scraping rechazado por contrapresión: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503, {"Retry-After": "10"}
+        
     except Exception as e:
         logging.error(f"Error en endpoint /scrape: {str(e)}")
         return jsonify({
@@ -396,22 +626,40 @@ def batch_scrape():
         if not isinstance(urls, list):
             return jsonify({"error": "URLs debe ser una lista"}), 400
         
-        if len(urls) > 10:  # Limitar a 10 URLs por request
-            return jsonify({"error": "Máximo 10 URLs por request"}), 400
+        if len(urls) > BATCH_MAX_URLS:
+            return jsonify({"error": f"Máximo {BATCH_MAX_URLS} URLs por request"}), 400
+        
+        urls = [url if url.startswith(('http://', 'https://')) else 'https://' + url for url in urls]
+        
+        # Procesar en paralelo; el resultado conserva el orden de entrada
+        refresh = bool(data.get('refresh'))
+        timings = bool(data.get('timings'))
+        outcomes = run_batch(
+            urls, lambda url: scrape_with_timings(url, refresh=refresh, timings=timings), politeness_key, DOMAIN_LIMITER,
+            max_workers=BATCH_MAX_WORKERS, timeout=BATCH_TIMEOUT
+        )
         
         results = []
         
-        for url in urls:
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-            
-            title, body = get_news_content(url)
+        for url, outcome in zip(urls, outcomes):
+            article = outcome['result'] or {"title": "Error", "body": outcome['error'], "tier": None, "cache": None}
+            error = outcome['error']
+            if error is None and article['title'] == "Error":
+                error = article['body']
             
             results.append({
                 "url": url,
-                "title": title,
-                "body": body,
-                "domain": get_domain(url)
+                "title": article['title'],
+                "body": article['body'],
+                "domain": get_domain(url),
+                "tier": article['tier'],
+                "cache": article['cache'],
+                "page_stats": article.get('page_stats'),
+                "timings": article.get('timings'),
+                "article_id": article.get('article_id'),
+                "duplicate_of": article.get('duplicate_of'),
+                "error": error,
+                "elapsed": outcome['elapsed']
             })
         
         return jsonify({
@@ -428,9 +676,197 @@ def batch_scrape():
             "error": str(e)
         }), 500
 
-# Configuración de Google Sheets
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+# Trabajos asíncronos: cola persistida en SQLite con hilos trabajadores
+JOB_MAX_URLS = int(os.environ.get('JOB_MAX_URLS', 500))
+
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', 300))
+# Espera total de una URL por su lugar en el dominio y por un worker libre.
+# Sumada al scraping (SCRAPER_TASK_TIMEOUT) queda por debajo del lease: si
+# no, el ítem se vuelve a reclamar mientras espera y se scrapea dos veces.
+JOB_WAIT_BUDGET = max(JOB_LEASE_SECONDS - SCRAPER_TASK_TIMEOUT - 30, 0)
+
+def scrape_for_job(url):
+    """Procesa una URL de un trabajo respetando el límite por dominio."""
+    # Los trabajos no tienen quien espere la respuesta: aguardan su turno en
+    # vez de fallar por contrapresión, pero solo dentro de JOB_WAIT_BUDGET
+    deadline = time.monotonic() + JOB_WAIT_BUDGET
+    with DOMAIN_LIMITER.slot(politeness_key(url), timeout=JOB_WAIT_BUDGET):
+        article = scrape_article(url, wait_timeout=max(deadline - time.monotonic(), 0))
+    return {
+        "url": url,
+        "title": article['title'],
+        "body": article['body'],
+        "domain": get_domain(url),
+        "tier": article['tier'],
+        "cache": article['cache'],
+        "page_stats": article.get('page_stats'),
+        "article_id": article.get('article_id'),
+        "duplicate_of": article.get('duplicate_of')
+    }
+
+JOB_QUEUE = JobQueue(
+    os.environ.get('JOBS_DB_PATH', '/tmp/news_scraper_jobs.sqlite3'),
+    scrape_for_job,
+    workers=int(os.environ.get('JOB_WORKERS', 2)),
+    lease_seconds=JOB_LEASE_SECONDS
+)
+JOB_QUEUE.start()
+atexit.register(JOB_QUEUE.stop)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Encola URLs para scraping asíncrono y devuelve el id del trabajo"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'urls' not in data:
+            return jsonify({"error": "Lista de URLs requerida"}), 400
+        
+        urls = data.get('urls', [])
+        
+        if not isinstance(urls, list) or not urls:
+            return jsonify({"error": "URLs debe ser una lista no vacía"}), 400
+        
+        if len(urls) > JOB_MAX_URLS:
+            return jsonify({"error": f"Máximo {JOB_MAX_URLS} URLs por trabajo"}), 400
+        
+        urls = [url if url.startswith(('http://', 'https://')) else 'https://' + url for url in urls]
+        job_id = JOB_QUEUE.submit(urls)
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "count": len(urls),
+            "status_url": f"/jobs/{job_id}",
+            "stream_url": f"/jobs/{job_id}/stream",
+            "timestamp": time.time()
+        }), 202
+        
+    except Exception as e:
+        logging.error(f"Error en endpoint /jobs: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Estado de un trabajo y resultados terminados hasta el momento"""
+    status = JOB_QUEUE.status(job_id)
+    if status is None:
+        return jsonify({"success": False, "error": "Trabajo no encontrado"}), 404
+    
+    return jsonify({
+        "success": True,
+        "data": status,
+        "timestamp": time.time()
+    })
+
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    """Envía cada artículo como una línea NDJSON en cuanto termina"""
+    if JOB_QUEUE.status(job_id, include_results=False) is None:
+        return jsonify({"success": False, "error": "Trabajo no encontrado"}), 404
+    
+    def generate():
+        for item in JOB_QUEUE.stream(job_id):
+            yield json.dumps(item, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Consulta y exportación de ARTICLE_STORE
+def article_filters(args):
+    """Filtros comunes de /articles y /articles/export a partir del query string."""
+    domain = args.get('domain')
+    if domain:
+        domain = resolve_domain(domain) or normalize_host(domain)
+    duplicates = args.get('duplicates', 'include')
+    if duplicates not in ('include', 'exclude', 'only'):
+        raise ValueError("duplicates must be 'include', 'exclude' or 'only'")
+    return domain, duplicates
+
+@app.route('/articles', methods=['GET'])
+def list_articles():
+    """Artículos guardados, los más recientes primero, paginados con ?page y ?per_page
+    
+    Filtros: ?domain, ?since y ?until (timestamps de scraping) y
+    ?duplicates=include|exclude|only. Con ?body=0 no se descomprimen los cuerpos.
+    """
+    if ARTICLE_STORE is None:
+        return jsonify({"success": False, "error": "Almacén de artículos deshabilitado"}), 404
+    try:
+        try:
+            domain, duplicates = article_filters(request.args)
+            page = max(1, int(request.args.get('page', 1)))
+            per_page = min(max(1, int(request.args.get('per_page', 50))), ARTICLES_PAGE_MAX)
+            since = float(request.args['since']) if 'since' in request.args else None
+            until = float(request.args['until']) if 'until' in request.args else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        articles, total = ARTICLE_STORE.query(
+            domain=domain, since=since, until=until, duplicates=duplicates,
+            page=page, per_page=per_page, include_body=request.args.get('body', '1') != '0'
+        )
+        
+        return jsonify({
+            "success": True,
+            "data": articles,
+            "count": len(articles),
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page,
+            "timestamp": time.time()
+        })
+    except Exception as e:
+        logging.error(f"Error en endpoint /articles: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/articles/<int:article_id>', methods=['GET'])
+def get_article(article_id):
+    """Un artículo guardado con su cuerpo"""
+    if ARTICLE_STORE is None:
+        return jsonify({"success": False, "error": "Almacén de artículos deshabilitado"}), 404
+    article = ARTICLE_STORE.get(article_id)
+    if article is None:
+        return jsonify({"success": False, "error": "Artículo no encontrado"}), 404
+    
+    return jsonify({
+        "success": True,
+        "data": article,
+        "timestamp": time.time()
+    })
+
+@app.route('/articles/export', methods=['GET'])
+def export_articles():
+    """Exporta como NDJSON los artículos escritos después de ?cursor
+    
+    Cada línea es un artículo con su 'seq'; la última es
+    {"cursor": ..., "count": ...}: pasar ese cursor en la siguiente
+    llamada devuelve solo lo nuevo o actualizado desde entonces.
+    Acepta ?domain, ?duplicates y ?limit.
+    """
+    if ARTICLE_STORE is None:
+        return jsonify({"success": False, "error": "Almacén de artículos deshabilitado"}), 404
+    try:
+        domain, duplicates = article_filters(request.args)
+        cursor = int(request.args.get('cursor', 0))
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def generate():
+        last, count = cursor, 0
+        for article in ARTICLE_STORE.export(cursor, domain=domain, duplicates=duplicates, limit=limit):
+            last, count = article['seq'], count + 1
+            yield json.dumps(article, ensure_ascii=False) + '\n'
+        yield json.dumps({"cursor": last, "count": count}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 # Configuración para Google Sheets
 SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
@@ -439,40 +875,83 @@ SHEET_ID = '1IJjeJtMK4sz9cnXGJsLcmpjXMtxTDa4ZI9lCl2pHFSU'  # Reemplaza con el ID
 WORKSHEET_NAME = 'Peginas'  # Reemplaza con el nombre de la pestaña
 COLUMN_NAME = 'Titulo'  # Nombre de la columna con los títulos
 
+# Índice de títulos en memoria; se refresca en segundo plano pasado el TTL
+TITLE_INDEX = TitleIndex(
+    GSpreadSource(CREDS_FILE, SCOPE, SHEET_ID, WORKSHEET_NAME),
+    COLUMN_NAME,
+    ttl=float(os.environ.get('TITLE_INDEX_TTL', 300)),
+    fuzzy_factory=FuzzyTitleIndex if os.environ.get('TITLE_FUZZY_INDEX', '1') == '1' else None
+)
+# Umbral por defecto (Jaccard sobre trigramas) para mode=fuzzy
+FUZZY_THRESHOLD = float(os.environ.get('TITLE_FUZZY_THRESHOLD', 0.7))
+
 def get_sheet_titles():
     """Obtiene los títulos de la columna 'Titulo' en la hoja de Google Sheets."""
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, SCOPE)
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(SHEET_ID).worksheet(WORKSHEET_NAME)
-    
-    # Obtener valores de la columna 'Titulo'
-    headers = sheet.row_values(1)
-    if COLUMN_NAME not in headers:
-        raise ValueError(f"Column '{COLUMN_NAME}' not found in sheet.")
-    
-    col_index = headers.index(COLUMN_NAME) + 1
-    titles = sheet.col_values(col_index)[1:]  # Excluye encabezado
-    return set(title.strip().lower() for title in titles if title.strip())
+    with span('sheet_titles'):
+        return TITLE_INDEX.titles()
 
 @app.route('/filter_titles', methods=['POST'])
 def filter_titles():
-    """Filtra ítems que no coincidan con los títulos de Google Sheets."""
+    """Filtra ítems que no coincidan con los títulos de Google Sheets.
+    
+    Con ?mode=fuzzy también descarta títulos casi iguales (acentos,
+    puntuación, etiqueta de fuente) por encima de ?threshold y reporta en
+    'duplicates' el título de la hoja con el que coincidieron.
+    """
     try:
         items = request.get_json()
         if not isinstance(items, list):
             return jsonify({"error": "Input must be a list of items"}), 400
         
+        mode = request.args.get('mode', 'exact')
+        if mode not in ('exact', 'fuzzy'):
+            return jsonify({"error": "mode must be 'exact' or 'fuzzy'"}), 400
+        
         sheet_titles = get_sheet_titles()
         
-        filtered_items = [
-            item for item in items
-            if 'title' in item and item['title'].strip().lower() not in sheet_titles
-        ]
+        if mode == 'exact':
+            filtered_items = [
+                item for item in items
+                if 'title' in item and item['title'].strip().lower() not in sheet_titles
+            ]
+            
+            return jsonify({
+                "success": True,
+                "data": filtered_items,
+                "count": len(filtered_items),
+                "timestamp": time.time()
+            })
+        
+        fuzzy_index = TITLE_INDEX.fuzzy()
+        if fuzzy_index is None:
+            return jsonify({"error": "Fuzzy index is disabled"}), 400
+        try:
+            threshold = float(request.args.get('threshold', FUZZY_THRESHOLD))
+        except ValueError:
+            threshold = None
+        if threshold is None or not 0 <= threshold <= 1:
+            return jsonify({"error": "threshold must be a number between 0 and 1"}), 400
+        
+        filtered_items = []
+        duplicates = []
+        for item in items:
+            if 'title' not in item:
+                continue
+            match = fuzzy_index.best_match(item['title'], threshold)
+            # Un título sin letras ni números no entra al índice difuso
+            if match is None and item['title'].strip().lower() in sheet_titles:
+                match = (item['title'].strip(), 1.0)
+            if match:
+                duplicates.append({"title": item['title'], "matched_title": match[0], "score": round(match[1], 3)})
+            else:
+                filtered_items.append(item)
         
         return jsonify({
             "success": True,
             "data": filtered_items,
             "count": len(filtered_items),
+            "duplicates": duplicates,
+            "threshold": threshold,
             "timestamp": time.time()
         })
     except Exception as e:
@@ -482,6 +961,131 @@ def filter_titles():
             "error": str(e)
         }), 500
 
+@app.route('/filter_titles/invalidate', methods=['POST'])
+def invalidate_titles():
+    """Descarta el índice de títulos para recargar la hoja completa."""
+    TITLE_INDEX.invalidate()
+    return jsonify({
+        "success": True,
+        "timestamp": time.time()
+    })
+
+# Descubrimiento de artículos nuevos por RSS/news sitemaps; los encola en JOB_QUEUE
+DISCOVERY = Discovery(
+    SeenStore(os.environ.get('DISCOVERY_DB_PATH', '/tmp/news_scraper_discovery.sqlite3')),
+    {domain: config for domain, config in DOMAIN_CONFIG.items() if domain != 'default' and config.get('discovery', True)},
+    JOB_QUEUE.submit,
+    is_known_title=(
+        (lambda title: normalize_title(title) in TITLE_INDEX.titles())
+        if os.environ.get('DISCOVERY_TITLE_FILTER', '1') == '1' else None
+    ),
+    min_interval=float(os.environ.get('DISCOVERY_MIN_INTERVAL', 300)),
+    max_interval=float(os.environ.get('DISCOVERY_MAX_INTERVAL', 3600)),
+    default_interval=float(os.environ.get('DISCOVERY_INTERVAL', 900)),
+    max_new_per_poll=int(os.environ.get('DISCOVERY_MAX_NEW_PER_POLL', 50)),
+    bootstrap_items=int(os.environ.get('DISCOVERY_BOOTSTRAP_ITEMS', 10)),
+    max_age=float(os.environ.get('DISCOVERY_MAX_AGE', 2 * 86400)),
+    scheme=os.environ.get('DISCOVERY_SCHEME', 'https')
+)
+if os.environ.get('DISCOVERY_ENABLED', '0') == '1':
+    DISCOVERY.start()
+    atexit.register(DISCOVERY.stop)
+
+@app.route('/discovery', methods=['GET'])
+def discovery_stats():
+    """Estado del descubrimiento: feeds, intervalos y URLs vistas por sitio"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": DISCOVERY.stats(),
+            "timestamp": time.time()
+        })
+    except Exception as e:
+        logging.error(f"Error en endpoint /discovery: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/discovery/poll', methods=['POST'])
+def discovery_poll():
+    """Sondea ya un sitio ({"domain": ...}) o todos, sin esperar a su turno
+    
+    Un sitio se sondea dentro de la solicitud; todos juntos pueden pasar el
+    --timeout de gunicorn, así que se sondean en segundo plano (202) y el
+    resultado se ve en /discovery.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        domain = data.get('domain')
+        
+        if not domain:
+            return jsonify({
+                "success": True,
+                "accepted": DISCOVERY.request_poll_all(),
+                "domains": len(DISCOVERY.domains),
+                "status_url": "/discovery",
+                "timestamp": time.time()
+            }), 202
+        
+        key = resolve_domain(domain)
+        if key not in DISCOVERY.domains:
+            return jsonify({"error": f"Dominio sin descubrimiento: {domain}"}), 400
+        summary = DISCOVERY.poll(key)
+        
+        return jsonify({
+            "success": True,
+            "data": [summary],
+            "enqueued": summary['enqueued'],
+            "timestamp": time.time()
+        })
+    except Exception as e:
+        logging.error(f"Error en endpoint /discovery/poll: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# Precalentamiento: selenium, bs4, gspread y oauth2client se importan con el
+# primer uso para que / responda cuanto antes; después de arrancar se cargan
+# en segundo plano junto con los navegadores y la hoja de títulos
+def warm_libraries():
+    """Importa selenium y bs4 y compila los selectores de todos los dominios."""
+    # Sin uso aquí: solo se cargan para que readiness.wait_until_ready no
+    # pague su importación en el primer scraping
+    import selenium.webdriver  # noqa: F401
+    import selenium.webdriver.support.ui  # noqa: F401
+    EXTRACTORS.compile_all()
+    parse_document('<html><body><p>.</p></body></html>', HTML_PARSER)
+
+def warm_browsers():
+    """Lanza los navegadores del pool (con workers, cada worker lanza los suyos)."""
+    if WORKERS is None:
+        DRIVER_POOL.warm(PREWARM_BROWSERS)
+        # warm() registra la falla y sigue: reportarla en el estado del precalentamiento
+        if PREWARM_BROWSERS and DRIVER_POOL.stats()['total'] == 0:
+            raise RuntimeError("No se pudo lanzar ningún navegador")
+
+def warm_sheets():
+    """Autoriza el cliente de Sheets y carga el índice de títulos."""
+    TITLE_INDEX.titles()
+
+PREWARM_STEPS = {'libraries': warm_libraries, 'browsers': warm_browsers, 'sheets': warm_sheets}
+# Pasos separados por coma ('' desactiva el precalentamiento)
+PREWARM = [step.strip() for step in os.environ.get('PREWARM_STEPS', 'libraries,browsers,sheets').split(',') if step.strip()]
+if set(PREWARM) - set(PREWARM_STEPS):
+    raise ValueError(f"PREWARM_STEPS acepta {tuple(PREWARM_STEPS)}")
+PREWARM_BROWSERS = int(os.environ.get('PREWARM_BROWSERS', 1))
+
+WARMUP = Warmup([(step, PREWARM_STEPS[step]) for step in PREWARM])
+
+@app.after_request
+def start_warmup(response):
+    """Arranca el precalentamiento tras enviar la primera respuesta."""
+    if WARMUP.status == 'pending':
+        response.call_on_close(WARMUP.start)
+    return response
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,355 @@
+import zlib
+import time
+import hashlib
+import sqlite3
+import threading
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional: sin él los cuerpos se guardan con zlib
+    zstandard = None
+
+from cache import url_key
+from title_match import fold_text
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url_key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    title TEXT,
+    body BLOB NOT NULL,
+    codec TEXT NOT NULL,
+    body_chars INTEGER NOT NULL,
+    tier TEXT,
+    content_hash TEXT NOT NULL,
+    simhash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    duplicate_of INTEGER,
+    distance INTEGER,
+    scraped_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_domain ON articles (domain, scraped_at);
+CREATE INDEX IF NOT EXISTS articles_scraped ON articles (scraped_at);
+CREATE UNIQUE INDEX IF NOT EXISTS articles_seq ON articles (seq);
+CREATE INDEX IF NOT EXISTS articles_hash ON articles (content_hash);
+CREATE INDEX IF NOT EXISTS articles_band0 ON articles (band0);
+CREATE INDEX IF NOT EXISTS articles_band1 ON articles (band1);
+CREATE INDEX IF NOT EXISTS articles_band2 ON articles (band2);
+CREATE INDEX IF NOT EXISTS articles_band3 ON articles (band3);
+"""
+
+SIMHASH_BITS = 64
+# Hasta 3 bits distintos se parte la huella en 4 bandas de 16: dos huellas a
+# distancia <= 3 comparten al menos una banda completa (palomar)
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+# Palabras por shingle: con 3, un párrafo agregado o quitado cambia pocos rasgos
+SHINGLE_WORDS = 3
+# Bajo este largo (texto normalizado) la huella no distingue notas distintas
+MIN_SIMHASH_CHARS = 300
+# Columnas de la respuesta (sin el cuerpo comprimido)
+COLUMNS = ('a.id, a.url, a.domain, a.title, a.tier, a.body_chars, a.content_hash, a.simhash, '
+           'a.duplicate_of, a.distance, d.url AS duplicate_url, a.scraped_at, a.updated_at, a.seq')
+
+
+def simhash(text):
+    """SimHash de 64 bits de los shingles de palabras del texto normalizado (fold_text)."""
+    words = text.split()
+    if not words:
+        return 0
+    size = min(SHINGLE_WORDS, len(words))
+    features = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    # Conteo por bit en C: zip(*) traspone las huellas binarias a columnas
+    bits = [format(int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+            for f in features]
+    half = len(bits) / 2
+    return int(''.join('1' if column.count('1') > half else '0' for column in zip(*bits)), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+
+def _signed(value):
+    """SQLite guarda enteros de 64 bits con signo."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class ArticleStore:
+    """Artículos scrapeados persistidos en SQLite con el cuerpo comprimido.
+
+    Un artículo por URL normalizada; volver a guardarlo solo reescribe la
+    fila si el cuerpo cambió. Al insertar se calcula el SimHash del cuerpo
+    normalizado y, si otro artículo (p. ej. la misma nota sindicada en otro
+    medio) está a `max_distance` bits o menos, se marca como duplicado del
+    más antiguo. Cada escritura recibe un `seq` creciente para exportar los
+    cambios con un cursor.
+    """
+
+    def __init__(self, db_path, level=9, max_distance=3):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance debe ser menor que {BANDS} (bandas de SimHash)")
+        self.db_path = db_path
+        self.level = level
+        self.max_distance = max_distance
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        # Los (de)compresores de zstandard no se comparten entre hilos
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0}
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _compress(self, text):
+        data = text.encode('utf-8')
+        if self.codec == 'zlib':
+            return zlib.compress(data, self.level)
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor.compress(data)
+
+    def _decompress(self, codec, data):
+        if codec == 'zlib':
+            return zlib.decompress(data).decode('utf-8')
+        if zstandard is None:
+            raise RuntimeError("El artículo está comprimido con zstd y zstandard no está instalado")
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor.decompress(data).decode('utf-8')
+
+    def _near_duplicate(self, conn, article_id, fingerprint, bands):
+        """(id original, distancia) del artículo más parecido, o (None, None).
+
+        Se excluyen el propio artículo y sus copias: un original que se
+        vuelve a scrapear con cambios no puede quedar como duplicado de sí.
+        """
+        rows = conn.execute(
+            'SELECT id, simhash, duplicate_of FROM articles '
+            'WHERE (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?) AND id != ? AND COALESCE(duplicate_of, id) != ?',
+            (*bands, article_id or 0, article_id or 0)
+        ).fetchall()
+        best = None
+        for row in rows:
+            distance = hamming(fingerprint, row['simhash'] & 0xFFFFFFFFFFFFFFFF)
+            if distance <= self.max_distance:
+                # Apuntar siempre a la primera versión, no a otra copia
+                original = row['duplicate_of'] or row['id']
+                if best is None or (distance, original) < (best[1], best[0]):
+                    best = (original, distance)
+        return best or (None, None)
+
+    def save(self, url, domain, title, body, tier=None):
+        """Guarda o actualiza el artículo; devuelve (id, duplicado o None).
+
+        El duplicado es un dict con 'id', 'url' y 'distance' (bits distintos
+        entre las huellas; 0 si el cuerpo normalizado es idéntico).
+        """
+        key = url_key(url)
+        folded = fold_text(body)
+        content_hash = hashlib.sha1(folded.encode('utf-8')).hexdigest()
+        fingerprint = simhash(folded)
+        # Cuerpos muy cortos no se comparan: bandas -1 que ninguna huella iguala
+        comparable = len(folded) >= MIN_SIMHASH_CHARS
+        bands = _bands(fingerprint) if comparable else [-1] * BANDS
+        compressed = self._compress(body)
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                current = conn.execute(
+                    'SELECT id, content_hash, duplicate_of, distance FROM articles WHERE url_key = ?', (key,)
+                ).fetchone()
+                if current is not None and current['content_hash'] == content_hash:
+                    conn.execute('UPDATE articles SET updated_at = ? WHERE id = ?', (now, current['id']))
+                    conn.execute('COMMIT')
+                    self._count('unchanged')
+                    return current['id'], self._duplicate(conn, current['duplicate_of'], current['distance'])
+
+                article_id = current['id'] if current is not None else None
+                duplicate_of, distance = (None, None)
+                if comparable:
+                    exact = conn.execute(
+                        'SELECT id, duplicate_of FROM articles WHERE content_hash = ? AND url_key != ? '
+                        'AND COALESCE(duplicate_of, id) != ? ORDER BY id LIMIT 1',
+                        (content_hash, key, article_id or 0)
+                    ).fetchone()
+                    if exact is not None:
+                        duplicate_of, distance = exact['duplicate_of'] or exact['id'], 0
+                    else:
+                        duplicate_of, distance = self._near_duplicate(conn, article_id, fingerprint, bands)
+
+                seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM articles').fetchone()[0]
+                values = (url, domain, title, compressed, self.codec, len(body), tier,
+                          content_hash, _signed(fingerprint), *bands, duplicate_of, distance, now, seq)
+                if article_id is None:
+                    article_id = conn.execute(
+                        'INSERT INTO articles (url, domain, title, body, codec, body_chars, tier, content_hash, simhash, '
+                        'band0, band1, band2, band3, duplicate_of, distance, updated_at, seq, url_key, scraped_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        values + (key, now)
+                    ).lastrowid
+                else:
+                    conn.execute(
+                        'UPDATE articles SET url = ?, domain = ?, title = ?, body = ?, codec = ?, body_chars = ?, tier = ?, '
+                        'content_hash = ?, simhash = ?, band0 = ?, band1 = ?, band2 = ?, band3 = ?, duplicate_of = ?, '
+                        'distance = ?, updated_at = ?, seq = ? WHERE id = ?',
+                        values + (article_id,)
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            self._count('inserted' if current is None else 'updated')
+            if duplicate_of is not None:
+                self._count('duplicates')
+            return article_id, self._duplicate(conn, duplicate_of, distance)
+        finally:
+            conn.close()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _duplicate(self, conn, duplicate_of, distance):
+        if duplicate_of is None:
+            return None
+        row = conn.execute('SELECT url FROM articles WHERE id = ?', (duplicate_of,)).fetchone()
+        return {"id": duplicate_of, "url": row['url'] if row else None, "distance": distance}
+
+    def _article(self, row, body=None):
+        article = {
+            "id": row['id'],
+            "url": row['url'],
+            "domain": row['domain'],
+            "title": row['title'],
+            "tier": row['tier'],
+            "simhash": format(row['simhash'] & 0xFFFFFFFFFFFFFFFF, '016x'),
+            "duplicate_of": (
+                {"id": row['duplicate_of'], "url": row['duplicate_url'], "distance": row['distance']}
+                if row['duplicate_of'] is not None else None
+            ),
+            "scraped_at": row['scraped_at'],
+            "updated_at": row['updated_at'],
+            "seq": row['seq'],
+        }
+        if body is not None:
+            article['body'] = body
+        return article
+
+    def _where(self, domain=None, since=None, until=None, duplicates='include'):
+        clauses, params = [], []
+        if domain:
+            clauses.append('a.domain = ?')
+            params.append(domain)
+        if since is not None:
+            clauses.append('a.scraped_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('a.scraped_at < ?')
+            params.append(until)
+        if duplicates == 'exclude':
+            clauses.append('a.duplicate_of IS NULL')
+        elif duplicates == 'only':
+            clauses.append('a.duplicate_of IS NOT NULL')
+        return clauses, params
+
+    def _rows(self, conn, sql, params, include_body):
+        columns = COLUMNS + (', a.codec, a.body' if include_body else '')
+        rows = conn.execute(sql.format(columns=columns), params).fetchall()
+        return [
+            self._article(row, self._decompress(row['codec'], row['body']) if include_body else None)
+            for row in rows
+        ]
+
+    def query(self, domain=None, since=None, until=None, duplicates='include', page=1, per_page=50, include_body=True):
+        """Página de artículos (los más recientes primero) y el total que cumple los filtros."""
+        clauses, params = self._where(domain, since, until, duplicates)
+        where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        conn = self._connect()
+        try:
+            total = conn.execute(f'SELECT COUNT(*) FROM articles a {where}', params).fetchone()[0]
+            articles = self._rows(
+                conn,
+                f'SELECT {{columns}} FROM articles a LEFT JOIN articles d ON d.id = a.duplicate_of {where} '
+                'ORDER BY a.scraped_at DESC, a.id DESC LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page], include_body
+            )
+        finally:
+            conn.close()
+        return articles, total
+
+    def get(self, article_id):
+        conn = self._connect()
+        try:
+            articles = self._rows(
+                conn, 'SELECT {columns} FROM articles a LEFT JOIN articles d ON d.id = a.duplicate_of WHERE a.id = ?',
+                (article_id,), True
+            )
+        finally:
+            conn.close()
+        return articles[0] if articles else None
+
+    def export(self, cursor=0, domain=None, duplicates='include', batch_size=500, limit=None):
+        """Genera los artículos escritos después de `cursor` (un `seq`) en orden de escritura.
+
+        Lee por lotes con keyset sobre `seq`, así que no sostiene una
+        transacción abierta ni se salta filas si se escribe mientras tanto.
+        Un artículo actualizado vuelve a salir con un `seq` nuevo.
+        """
+        clauses, params = self._where(domain=domain, duplicates=duplicates)
+        where = ''.join(' AND ' + clause for clause in clauses)
+        sent = 0
+        while limit is None or sent < limit:
+            size = batch_size if limit is None else min(batch_size, limit - sent)
+            conn = self._connect()
+            try:
+                articles = self._rows(
+                    conn,
+                    f'SELECT {{columns}} FROM articles a LEFT JOIN articles d ON d.id = a.duplicate_of '
+                    f'WHERE a.seq > ?{where} ORDER BY a.seq LIMIT ?',
+                    [cursor] + params + [size], True
+                )
+            finally:
+                conn.close()
+            yield from articles
+            sent += len(articles)
+            if len(articles) < size:
+                return
+            cursor = articles[-1]['seq']
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT COUNT(*) AS articles, COUNT(duplicate_of) AS duplicates, '
+                'COALESCE(SUM(LENGTH(body)), 0) AS stored_bytes, COALESCE(MAX(seq), 0) AS last_seq FROM articles'
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._stats_lock:
+            counts = dict(self._stats)
+        return {**dict(row), 'codec': self.codec, **counts}
@@ -0,0 +1,76 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class SlotTimeout(Exception):
+    """El dominio no liberó un lugar dentro del tiempo de espera."""
+
+
+class DomainLimiter:
+    """Limita cuántas peticiones simultáneas recibe cada dominio (cortesía)."""
+
+    def __init__(self, default_limit=2, limits=None):
+        self.default_limit = default_limit
+        self.limits = dict(limits or {})
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, domain):
+        with self._lock:
+            if domain not in self._semaphores:
+                self._semaphores[domain] = threading.BoundedSemaphore(
+                    self.limits.get(domain, self.default_limit)
+                )
+            return self._semaphores[domain]
+
+    @contextmanager
+    def slot(self, domain, timeout=None):
+        """Ocupa un lugar del dominio; con `timeout` lanza SlotTimeout si no se libera a tiempo."""
+        semaphore = self._semaphore(domain)
+        if not semaphore.acquire(timeout=timeout):
+            raise SlotTimeout(f"Sin lugar libre para {domain} en {timeout:.0f}s")
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def run_batch(urls, worker, domain_of, limiter, max_workers=4, timeout=100):
+    """Procesa `urls` en paralelo respetando los límites por dominio.
+
+    Devuelve, en el mismo orden que `urls`, un dict por URL con 'result'
+    (lo que devolvió `worker`), 'error' y 'elapsed' en segundos. Las URLs que
+    no terminan antes de `timeout` se reportan como error de tiempo.
+    """
+    def task(url):
+        started = time.monotonic()
+        with limiter.slot(domain_of(url)):
+            result = worker(url)
+        return result, time.monotonic() - started
+
+    outcomes = []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))))
+    try:
+        futures = [executor.submit(task, url) for url in urls]
+        wait(futures, timeout=timeout)
+
+        for url, future in zip(urls, futures):
+            if not future.done():
+                future.cancel()
+                logging.warning(f"Tiempo de lote agotado antes de terminar: {url}")
+                outcomes.append({"result": None, "error": f"No terminó en {timeout}s", "elapsed": timeout})
+                continue
+            try:
+                result, elapsed = future.result()
+                outcomes.append({"result": result, "error": None, "elapsed": round(elapsed, 3)})
+            except Exception as e:
+                logging.error(f"Error en lote para {url}: {str(e)}")
+                outcomes.append({"result": None, "error": str(e), "elapsed": None})
+    finally:
+        # No bloquear la respuesta esperando tareas que ya excedieron el tiempo
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcomes
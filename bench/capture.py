@@ -0,0 +1,65 @@
+"""Guarda una página real de un artículo como captura en bench/snapshots.
+
+Descarga la URL con la misma sesión HTTP que usa la API (o toma un HTML
+guardado desde el navegador con --from-file, para sitios que arman el
+artículo con JavaScript) y la escribe como <dominio>--<nombre>.html, sin
+la marca de captura sintética. Después hay que revisar el resultado y
+regenerar las referencias:
+
+    python bench/golden.py --update
+    python bench/extract_bench.py --update-baseline
+
+Uso:
+    python bench/capture.py URL [--name nota-1]
+    python bench/capture.py URL --from-file pagina.html [--name nota-1]
+"""
+import os
+import sys
+import argparse
+from urllib.parse import urlparse
+
+from common import SNAPSHOT_DIR
+
+from domain_config import DOMAIN_CONFIG, resolve_domain
+from extractors import ExtractorRegistry
+from http_fetcher import fetch_html
+from parsing import parse_for_extraction
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('url')
+    arg_parser.add_argument('--name', default='article', help="sufijo de la captura (por defecto 'article')")
+    arg_parser.add_argument('--from-file', help='HTML ya guardado en vez de descargar la URL')
+    args = arg_parser.parse_args()
+
+    host = urlparse(args.url).netloc
+    domain = resolve_domain(host)
+    if domain is None:
+        print(f"{host} no está en DOMAIN_CONFIG")
+        return 1
+
+    if args.from_file:
+        with open(args.from_file, encoding='utf-8') as f:
+            html = f.read()
+    else:
+        page = fetch_html(args.url)
+        if page is None:
+            print(f"No se pudo descargar {args.url}")
+            return 1
+        html = page.html
+
+    extractor = ExtractorRegistry(DOMAIN_CONFIG).for_domain(domain)
+    title, body = extractor.extract(parse_for_extraction(html, extractor.selectors))
+    path = os.path.join(SNAPSHOT_DIR, f"{domain}--{args.name}.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    print(f"{path}: {len(html.encode('utf-8')) // 1024} KB")
+    print(f"  título: {title}")
+    print(f"  cuerpo: {len(body)} caracteres, empieza: {body[:120]!r}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import os
+import sys
+import glob
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(ROOT, 'bench', 'snapshots')
+
+# Permitir `python bench/<script>.py` desde la raíz del repo
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Host usado para las capturas de la configuración 'default'
+DEFAULT_HOST = 'example.org'
+
+# Primera línea de las capturas escritas a mano (no descargadas de un sitio).
+# Sus tiempos y memoria no son evidencia sobre páginas reales; capture.py
+# guarda la página real sin la marca.
+SYNTHETIC_MARKER = '<!-- bench: captura sintética, no descargada -->'
+SYNTHETIC_NOTE = '* captura sintética: escrita a mano, sus números no miden páginas reales'
+
+
+def host_for(name):
+    """Host de una captura: 'www.proceso.com.mx--bajada-only' -> 'www.proceso.com.mx'."""
+    domain = name.split('--', 1)[0]
+    return DEFAULT_HOST if domain == 'default' else domain
+
+
+def load_snapshots():
+    """Capturas HTML como lista ordenada de (nombre, host, html)."""
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(SNAPSHOT_DIR, '*.html'))):
+        name = os.path.basename(path)[:-len('.html')]
+        with open(path, encoding='utf-8') as f:
+            snapshots.append((name, host_for(name), f.read()))
+    return snapshots
+
+
+def is_synthetic(html):
+    return html.startswith(SYNTHETIC_MARKER)
+
+
+def display_name(name, html):
+    """Nombre de la captura para las tablas, con '*' si es sintética."""
+    return f"{name} *" if is_synthetic(html) else name
@@ -0,0 +1,87 @@
+"""Benchmark de punta a punta (descarga, render y extracción) sin red.
+
+Levanta bench/snapshot_server.py como proxy de salida (OUTBOUND_PROXY) y
+pasa cada captura por app.fetch_article, como lo haría /scrape sin caché.
+Reporta el tiempo por captura y el nivel que la sirvió, y verifica que
+título y cuerpo coincidan con bench/golden.json.
+
+Con --tier browser todas las páginas van por Selenium (requiere Chrome y
+chromedriver); por defecto se usa el nivel HTTP donde alcance.
+
+Uso:
+    python bench/e2e_bench.py [--tier http|browser] [--iterations 5]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from statistics import median
+
+from common import ROOT, SYNTHETIC_NOTE, display_name, is_synthetic, load_snapshots
+from snapshot_server import start_server
+
+GOLDEN_FILE = os.path.join(ROOT, 'bench', 'golden.json')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--tier', choices=('http', 'browser'), default='http')
+    arg_parser.add_argument('--iterations', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    server, proxy_url = start_server()
+    # Antes de importar app: la sesión HTTP y Chrome leen el proxy al crearse
+    os.environ['OUTBOUND_PROXY'] = proxy_url
+    os.environ['RESULT_CACHE_BACKEND'] = 'none'
+    os.environ['PREWARM_STEPS'] = ''
+    os.environ['ARTICLE_STORE_ENABLED'] = '0'
+    os.environ['JOB_WORKERS'] = '0'
+    import app
+    # Los INFO por petición taparían la tabla
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.tier == 'browser':
+        for config in app.DOMAIN_CONFIG.values():
+            config['requires_js'] = True
+
+    with open(GOLDEN_FILE, encoding='utf-8') as f:
+        golden = json.load(f)
+
+    snapshots = load_snapshots()
+    failures = 0
+    total = 0.0
+    print(f"  {'captura':<40} {'nivel':>8} {'ms':>9}")
+    try:
+        for name, host, html in snapshots:
+            url = f"http://{host}/{name}"
+            timings = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                result = app.fetch_article(url)
+                timings.append(time.perf_counter() - start)
+
+            elapsed = median(timings) * 1000
+            total += elapsed
+            print(f"  {display_name(name, html):<40} {result['tier']:>8} {elapsed:>9.1f}")
+
+            expected = golden.get(name)
+            if {'title': result['title'], 'body': result['body']} != expected:
+                failures += 1
+                print(f"    DIFERENCIA\n      esperado: {expected}\n      obtenido: {result['title']!r}, {result['body']!r}")
+    finally:
+        app.DRIVER_POOL.close()
+        server.shutdown()
+
+    print(f"\nTotal (medianas): {total:.1f} ms")
+    if any(is_synthetic(html) for _, _, html in snapshots):
+        print(SYNTHETIC_NOTE)
+    if failures:
+        print(f"{failures} capturas no coinciden con golden.json")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
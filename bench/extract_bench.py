@@ -0,0 +1,217 @@
+"""Benchmark de la etapa de extracción sobre las capturas de bench/snapshots.
+
+Mide por captura el tiempo de parseo y de extracción (mínimo de
+--iterations rondas intercaladas), la memoria pico (tracemalloc), los
+elementos que quedan en el árbol parseado y el tamaño de la salida, y lo
+compara con bench/baseline.json. Falla si:
+  - el tiempo total de una combinación backend/modo crece más que
+    --tolerance (50% por defecto);
+  - la memoria pico de una captura crece más de MEMORY_TOLERANCE, o el
+    árbol parseado tiene más elementos (p. ej. si 'subtree' deja de
+    reducir la página);
+  - cambia el tamaño de la salida;
+  - algún dominio de DOMAIN_CONFIG no tiene captura.
+
+Las capturas marcadas con '*' son sintéticas (ver bench/README.md): sirven
+para detectar regresiones entre versiones, no para medir páginas reales.
+
+Memoria, nodos y salida son deterministas. Los tiempos dependen de la
+máquina: regenerar la línea base en la misma máquina antes de comparar un
+cambio, y en máquinas compartidas con ruido subir --iterations.
+
+Uso:
+    python bench/extract_bench.py                     # backend y modo por defecto
+    python bench/extract_bench.py --all               # todas las combinaciones
+    python bench/extract_bench.py --update-baseline   # regenera baseline.json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+from itertools import product
+
+from common import ROOT, SYNTHETIC_NOTE, display_name, is_synthetic, load_snapshots
+
+from domain_config import DOMAIN_CONFIG, resolve_domain
+from extractors import ExtractorRegistry
+from parsing import HTML_PARSERS, PARSE_MODES, LexborHTMLParser, parse_for_extraction
+
+BASELINE_FILE = os.path.join(ROOT, 'bench', 'baseline.json')
+# El pico de memoria (tracemalloc) se repite exacto entre corridas y se compara
+# por captura; el mínimo absoluto solo absorbe el redondeo del asignador.
+MEMORY_TOLERANCE = 0.1
+MIN_DELTA_KB = 16
+
+
+def missing_domains(snapshots):
+    """Claves de DOMAIN_CONFIG (incluida 'default') sin ninguna captura."""
+    covered = {resolve_domain(host) or 'default' for _, host, _ in snapshots}
+    return sorted(set(DOMAIN_CONFIG) - covered)
+
+
+def measure_footprint(extractor, html, parser, mode):
+    """(pico de memoria en bytes, elementos parseados, caracteres de título + cuerpo)."""
+    # Corridas aparte (tracemalloc distorsiona los tiempos); el mínimo de
+    # varias descarta cachés internas que se llenan una sola vez
+    peaks = []
+    for _ in range(3):
+        # Sin basura pendiente de corridas anteriores el pico no depende del orden
+        gc.collect()
+        tracemalloc.start()
+        try:
+            soup = parse_for_extraction(html, extractor.selectors, parser=parser, mode=mode)
+            nodes = len(soup.find_all(True))
+            title, body = extractor.extract(soup)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return min(peaks), nodes, len(title) + len(body)
+
+
+def warm_up(registry, snapshots):
+    """Pasa todas las capturas por todas las combinaciones una vez.
+
+    Las cachés internas (de bs4, soupsieve, lexbor) crecen con el primer uso
+    y eso cae dentro del pico de memoria de quien llegue primero: calentadas
+    todas, los picos no dependen de qué combinaciones se midan ni en qué orden.
+    """
+    modes = PARSE_MODES if LexborHTMLParser is not None else ('full',)
+    for parser, mode in product(HTML_PARSERS, modes):
+        for _, host, html in snapshots:
+            extractor = registry.for_domain(host)
+            extractor.extract(parse_for_extraction(html, extractor.selectors, parser=parser, mode=mode))
+
+
+def run(registry, snapshots, parser, mode, iterations):
+    extractors = {name: registry.for_domain(host) for name, host, _ in snapshots}
+    parse_times = {name: [] for name, _, _ in snapshots}
+    extract_times = {name: [] for name, _, _ in snapshots}
+    # Rondas intercaladas: una racha lenta de la máquina pega en todas las
+    # capturas por igual; el mínimo de cada una toma su corrida más limpia
+    for _ in range(iterations):
+        for name, _, html in snapshots:
+            extractor = extractors[name]
+            start = time.perf_counter()
+            soup = parse_for_extraction(html, extractor.selectors, parser=parser, mode=mode)
+            parsed = time.perf_counter()
+            extractor.extract(soup)
+            parse_times[name].append(parsed - start)
+            extract_times[name].append(time.perf_counter() - parsed)
+
+    results = {}
+    for name, _, html in snapshots:
+        peak, nodes, output_chars = measure_footprint(extractors[name], html, parser, mode)
+        results[name] = {
+            'parse_ms': round(min(parse_times[name]) * 1000, 3),
+            'extract_ms': round(min(extract_times[name]) * 1000, 3),
+            'peak_kb': round(peak / 1024, 1),
+            'nodes': nodes,
+            'output_chars': output_chars,
+        }
+    return results
+
+
+def total_ms(results):
+    return sum(result['parse_ms'] + result['extract_ms'] for result in results.values())
+
+
+def compare(label, results, baseline, tolerance, names):
+    """Imprime la tabla contra la línea base y devuelve el número de regresiones."""
+    failures = 0
+    print(f"\n{label}")
+    print(f"  {'captura':<40} {'parse ms':>9} {'extract ms':>11} {'pico KB':>9} {'nodos':>6} {'chars':>7}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        print(
+            f"  {names[name]:<40} {current['parse_ms']:>9.3f} {current['extract_ms']:>11.3f} "
+            f"{current['peak_kb']:>9.1f} {current['nodes']:>6} {current['output_chars']:>7}"
+        )
+        if previous is None:
+            print("    sin línea base")
+            continue
+
+        problems = []
+        delta = current['peak_kb'] - previous['peak_kb']
+        if delta > previous['peak_kb'] * MEMORY_TOLERANCE and delta > MIN_DELTA_KB:
+            problems.append(f"peak_kb {previous['peak_kb']} -> {current['peak_kb']}")
+        if current['nodes'] > previous.get('nodes', current['nodes']):
+            problems.append(f"nodes {previous['nodes']} -> {current['nodes']}")
+        if current['output_chars'] != previous['output_chars']:
+            problems.append(f"output_chars {previous['output_chars']} -> {current['output_chars']}")
+
+        for problem in problems:
+            print(f"    REGRESIÓN {problem}")
+        failures += len(problems)
+
+    # El tiempo se compara sobre las capturas que están en ambas corridas
+    common_names = [name for name in results if name in baseline]
+    if common_names:
+        current_total = total_ms({name: results[name] for name in common_names})
+        previous_total = total_ms({name: baseline[name] for name in common_names})
+        print(f"  {'total (parse + extract)':<40} {current_total:>9.3f} ms  (línea base {previous_total:.3f} ms)")
+        if current_total > previous_total * (1 + tolerance):
+            print(f"    REGRESIÓN tiempo total {previous_total:.3f} -> {current_total:.3f} ms")
+            failures += 1
+    return failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--parser', choices=HTML_PARSERS, default=os.environ.get('HTML_PARSER', 'html.parser'))
+    arg_parser.add_argument('--mode', choices=PARSE_MODES, default=os.environ.get('HTML_PARSE_MODE', 'full'))
+    arg_parser.add_argument('--all', action='store_true', help='medir todas las combinaciones de backend y modo')
+    arg_parser.add_argument('--iterations', type=int, default=20)
+    arg_parser.add_argument('--tolerance', type=float, default=0.5, help='crecimiento relativo permitido (0.5 = 50%%)')
+    arg_parser.add_argument('--update-baseline', action='store_true', help='regenerar baseline.json')
+    args = arg_parser.parse_args()
+
+    snapshots = load_snapshots()
+    missing = missing_domains(snapshots)
+    if missing:
+        print(f"Dominios sin captura en bench/snapshots: {', '.join(missing)}")
+        return 1
+
+    if args.all or args.update_baseline:
+        modes = PARSE_MODES if LexborHTMLParser is not None else ('full',)
+        combinations = list(product(HTML_PARSERS, modes))
+    else:
+        combinations = [(args.parser, args.mode)]
+
+    registry = ExtractorRegistry(DOMAIN_CONFIG)
+    warm_up(registry, snapshots)
+    results = {
+        f"{parser}/{mode}": run(registry, snapshots, parser, mode, args.iterations)
+        for parser, mode in combinations
+    }
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline.json actualizado: {', '.join(results)}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    names = {name: display_name(name, html) for name, _, html in snapshots}
+    failures = sum(
+        compare(label, current, baseline.get(label, {}), args.tolerance, names)
+        for label, current in results.items()
+    )
+    if any(is_synthetic(html) for _, _, html in snapshots):
+        print(f"\n{SYNTHETIC_NOTE}")
+    if failures:
+        print(f"\n{failures} regresiones contra baseline.json")
+        return 1
+    print("\nSin regresiones contra baseline.json")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Verifica que todos los backends de parseo den el mismo título y cuerpo.
+
+El resultado de referencia (html.parser sobre la página completa, el camino
+original) está en bench/golden.json. La misma comparación corre en pytest
+(tests/test_golden.py).
+
+Uso:
+    python bench/golden.py            # compara cada backend/modo contra golden.json
+    python bench/golden.py --update   # regenera golden.json con la referencia
+"""
+import os
+import sys
+import json
+import argparse
+from itertools import product
+
+from common import ROOT, load_snapshots
+
+from domain_config import DOMAIN_CONFIG
+from extractors import ExtractorRegistry
+from parsing import HTML_PARSERS, PARSE_MODES, LexborHTMLParser, parse_for_extraction
+
+GOLDEN_FILE = os.path.join(ROOT, 'bench', 'golden.json')
+REFERENCE = ('html.parser', 'full')
+
+
+def extract_all(registry, parser, mode):
+    results = {}
+    for name, host, html in load_snapshots():
+        extractor = registry.for_domain(host)
+        soup = parse_for_extraction(html, extractor.selectors, parser=parser, mode=mode)
+        title, body = extractor.extract(soup)
+        results[name] = {'title': title, 'body': body}
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--update', action='store_true', help='regenerar golden.json')
+    args = arg_parser.parse_args()
+
+    registry = ExtractorRegistry(DOMAIN_CONFIG)
+
+    if args.update:
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(extract_all(registry, *REFERENCE), f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"golden.json actualizado con {REFERENCE}")
+        return 0
+
+    with open(GOLDEN_FILE, encoding='utf-8') as f:
+        golden = json.load(f)
+
+    modes = PARSE_MODES if LexborHTMLParser is not None else ('full',)
+    failures = 0
+    for parser, mode in product(HTML_PARSERS, modes):
+        results = extract_all(registry, parser, mode)
+        for name in sorted(set(golden) | set(results)):
+            if golden.get(name) != results.get(name):
+                failures += 1
+                print(f"FALLA {parser}/{mode} {name}:\n  esperado: {golden.get(name)}\n  obtenido: {results.get(name)}")
+        print(f"{parser}/{mode}: {len(results)} capturas revisadas")
+
+    if failures:
+        print(f"{failures} diferencias contra golden.json")
+        return 1
+    print("Todos los backends coinciden con golden.json")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
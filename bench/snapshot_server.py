@@ -0,0 +1,148 @@
+"""Sirve las capturas de bench/snapshots por HTTP, sin acceso a la red.
+
+Funciona como servidor normal (GET /<captura>) y como proxy HTTP: con
+OUTBOUND_PROXY=http://127.0.0.1:<puerto>, una URL como
+http://www.proceso.com.mx/www.proceso.com.mx--bajada-only recibe esa
+captura, y http://www.proceso.com.mx/cualquier-ruta la captura principal
+del dominio. Todo lo demás (recursos, terceros) responde 404.
+
+Para el descubrimiento cada host sirve además /robots.txt (con su línea
+Sitemap), una portada que enlaza /feed.xml y un /news-sitemap.xml, ambos
+con las capturas del host; add_feed_entry() publica artículos nuevos.
+
+Uso:
+    python bench/snapshot_server.py [--port 8765]
+"""
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import DEFAULT_HOST, load_snapshots
+
+FEED_CONTENT_TYPES = {
+    '/robots.txt': 'text/plain; charset=utf-8',
+    '/': 'text/html; charset=utf-8',
+    '/feed.xml': 'application/rss+xml; charset=utf-8',
+    '/news-sitemap.xml': 'application/xml; charset=utf-8',
+}
+
+
+def _feed_body(path, host, entries):
+    base = f"http://{host}"
+    if path == '/robots.txt':
+        return f"User-agent: *\nDisallow: /buscar\nSitemap: {base}/news-sitemap.xml\n"
+    if path == '/':
+        return (f'<html><head><title>{host}</title>'
+                f'<link rel="alternate" type="application/rss+xml" href="{base}/feed.xml"></head>'
+                f'<body><h1>{host}</h1></body></html>')
+    if path == '/feed.xml':
+        items = ''.join(
+            f"<item><title>{escape(title)}</title><link>{base}/{escape(name)}</link>"
+            f"<pubDate>{formatdate(published, usegmt=True)}</pubDate></item>"
+            for name, title, published in entries
+        )
+        return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{host}</title>{items}</channel></rss>'
+    urls = ''.join(
+        f"<url><loc>{base}/{escape(name)}</loc><news:news><news:title>{escape(title)}</news:title>"
+        f"<news:publication_date>{datetime.fromtimestamp(published, timezone.utc).isoformat()}</news:publication_date>"
+        f"</news:news></url>"
+        for name, title, published in entries
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+            f'xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">{urls}</urlset>')
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    # nombre de captura -> (cuerpo en bytes, ETag)
+    snapshots = {}
+    # host -> [(ruta del artículo, título, timestamp)] que anuncian sus feeds
+    feed_entries = {}
+
+    def _lookup(self):
+        parts = urlsplit(self.path)
+        host = parts.hostname or self.headers.get('Host', '').split(':', 1)[0]
+        name = parts.path.strip('/').rsplit('/', 1)[-1]
+        if name in self.snapshots:
+            return self.snapshots[name]
+        return self.snapshots.get('default' if host == DEFAULT_HOST else host)
+
+    def _feed(self):
+        parts = urlsplit(self.path)
+        host = parts.hostname or self.headers.get('Host', '').split(':', 1)[0]
+        path = parts.path or '/'
+        if path not in FEED_CONTENT_TYPES or host not in self.feed_entries:
+            return None
+        body = _feed_body(path, host, self.feed_entries[host]).encode('utf-8')
+        return body, f'"{hashlib.md5(body).hexdigest()}"', FEED_CONTENT_TYPES[path]
+
+    def do_GET(self):
+        found = self._feed()
+        if found is None:
+            found = self._lookup()
+            if found is not None:
+                found = found + ('text/html; charset=utf-8',)
+        if found is None:
+            self.send_error(404)
+            return
+
+        body, etag, content_type = found
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def add_feed_entry(host, name, title=None, published=None):
+    """Publica un artículo en los feeds del host (la ruta sirve su captura principal)."""
+    entries = SnapshotHandler.feed_entries.setdefault(host, [])
+    entries.insert(0, (name, title or name, time.time() if published is None else published))
+
+
+def start_server(port=0):
+    """Arranca el servidor en un hilo y devuelve (servidor, url del proxy)."""
+    now = time.time()
+    for position, (name, host, html) in enumerate(load_snapshots()):
+        body = html.encode('utf-8')
+        SnapshotHandler.snapshots[name] = (body, f'"{hashlib.md5(body).hexdigest()}"')
+        SnapshotHandler.feed_entries.setdefault(host, []).append((name, name, now - 60 * (position + 1)))
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), SnapshotHandler)
+    threading.Thread(target=server.serve_forever, name='snapshot-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port)
+    print(f"Sirviendo {len(SnapshotHandler.snapshots)} capturas en {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
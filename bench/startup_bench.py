@@ -0,0 +1,167 @@
+"""Benchmark del arranque de la API.
+
+Mide, en procesos nuevos:
+  - import: lo que tarda `import app`, y falla si al importar se cargan
+    librerías que deben esperar al primer uso (LAZY_MODULES);
+  - listo: desde lanzar el servidor hasta que / responde 200;
+  - precalentado: hasta que / informa el precalentamiento terminado, con el
+    tiempo de cada paso (los que fallan, p. ej. sin Chrome o sin
+    credenciales de Sheets, se reportan igual).
+
+Usa bases SQLite temporales y sin workers de scraping ni trabajos.
+
+Uso:
+    python bench/startup_bench.py [--iterations 5] [--server gunicorn|flask]
+                                  [--max-ready-ms N]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from statistics import median
+
+from common import ROOT
+
+# Librerías pesadas que la API importa recién al usarlas
+LAZY_MODULES = ('selenium.webdriver', 'bs4', 'soupsieve', 'gspread', 'oauth2client.service_account')
+POLL_INTERVAL = 0.01
+
+
+def _env(workdir, steps):
+    env = dict(os.environ)
+    env.update({
+        'SCRAPER_PROCESSES': '0',
+        'JOB_WORKERS': '0',
+        'RESULT_CACHE_BACKEND': 'none',
+        'JOBS_DB_PATH': os.path.join(workdir, 'jobs.sqlite3'),
+        'ARTICLE_STORE_PATH': os.path.join(workdir, 'articles.sqlite3'),
+        'DISCOVERY_DB_PATH': os.path.join(workdir, 'discovery.sqlite3'),
+        'PREWARM_STEPS': steps,
+        'PYTHONUNBUFFERED': '1',
+    })
+    return env
+
+
+def measure_import(env):
+    """(ms de `import app`, librerías perezosas que se cargaron igual)."""
+    code = (
+        "import sys, time, json; started = time.perf_counter(); import app; "
+        "elapsed = (time.perf_counter() - started) * 1000; "
+        f"print(json.dumps([elapsed, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env={**env, 'PREWARM_STEPS': ''},
+        capture_output=True, text=True, check=True
+    ).stdout
+    elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def measure_server(env, server, timeout):
+    """(ms hasta que / responde, ms hasta terminar el precalentamiento, pasos)."""
+    port = _free_port()
+    if server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+                   '--workers', '1', '--threads', '8', 'app:app']
+    else:
+        command = [sys.executable, 'app.py']
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env={**env, 'PORT': str(port)},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    ready_ms = warm_ms = None
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            health = _get(base + '/')
+            now = (time.perf_counter() - started) * 1000
+            if health is not None and ready_ms is None:
+                ready_ms = now
+            if health is not None and health.get('warmup') in ('done', 'disabled'):
+                warm_ms = now
+                break
+            if process.poll() is not None:
+                raise RuntimeError(f"El servidor terminó con código {process.returncode}")
+            time.sleep(POLL_INTERVAL)
+        stats = _get(base + '/stats') or {}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return ready_ms, warm_ms, (stats.get('warmup') or {}).get('steps', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--server', choices=('gunicorn', 'flask'), default='gunicorn')
+    parser.add_argument('--steps', default='libraries,browsers,sheets', help="PREWARM_STEPS del servidor")
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--max-ready-ms', type=float, default=None, help="falla si / tarda más en responder")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='startup-bench-')
+    env = _env(workdir, args.steps)
+
+    imports, readies, warms, steps = [], [], [], {}
+    eager = set()
+    for _ in range(args.iterations):
+        elapsed, loaded = measure_import(env)
+        imports.append(elapsed)
+        eager.update(loaded)
+
+        ready_ms, warm_ms, warm_steps = measure_server(env, args.server, args.timeout)
+        if ready_ms is None:
+            print(f"/ no respondió en {args.timeout}s")
+            return 1
+        readies.append(ready_ms)
+        if warm_ms is not None:
+            warms.append(warm_ms)
+        for name, outcome in warm_steps.items():
+            steps.setdefault(name, []).append(outcome)
+
+    print(f"  {'import app':<28} {median(imports):>9.1f} ms")
+    print(f"  {'listo (/ responde)':<28} {median(readies):>9.1f} ms")
+    if warms:
+        print(f"  {'precalentado':<28} {median(warms):>9.1f} ms")
+    else:
+        print(f"  {'precalentado':<28} {'no terminó':>12}")
+    for name, outcomes in steps.items():
+        errors = {outcome['error'] for outcome in outcomes if outcome['error']}
+        note = f"  (falló: {errors.pop()[:60]})" if errors else ''
+        print(f"    {name:<26} {median(outcome['seconds'] for outcome in outcomes) * 1000:>9.1f} ms{note}")
+
+    failed = False
+    if eager:
+        print(f"\nSe importaron al arrancar: {', '.join(sorted(eager))} (deben cargarse con el primer uso)")
+        failed = True
+    if args.max_ready_ms is not None and median(readies) > args.max_ready_ms:
+        print(f"\n/ tardó {median(readies):.1f} ms en responder (máximo {args.max_ready_ms:.1f} ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Parámetros de seguimiento que no cambian el artículo
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref', 'ref_src', 'smid', 'outputtype'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Normaliza la URL para usarla como clave de caché.
+
+    Host en minúsculas, sin puerto por defecto, sin fragmento, sin parámetros
+    de seguimiento (utm_*, fbclid, ...) y con el query string ordenado.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def url_key(url):
+    """normalize_url sin el esquema: http y https son el mismo artículo."""
+    return normalize_url(url).split('://', 1)[-1]
+
+
+class MemoryCache:
+    """Caché LRU en memoria acotada por número de entradas y bytes."""
+
+    def __init__(self, max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return dict(entry) if entry else None
+
+    def set(self, key, value, etag=None, last_modified=None):
+        size = len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old['size']
+            self._entries[key] = {
+                'value': value,
+                'stored_at': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+                'size': size,
+            }
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['size']
+
+    def touch(self, key):
+        """Marca la entrada como recién validada."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]['stored_at'] = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'bytes': self._bytes}
+
+
+class SQLiteCache:
+    """Caché LRU en disco (SQLite) compartida entre workers de gunicorn."""
+
+    def __init__(self, path, max_entries=1000, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT value, stored_at, etag, last_modified, size FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            return {
+                'value': json.loads(row[0]),
+                'stored_at': row[1],
+                'etag': row[2],
+                'last_modified': row[3],
+                'size': row[4],
+            }
+        finally:
+            conn.close()
+
+    def set(self, key, value, etag=None, last_modified=None):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at, etag, last_modified, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, data, now, now, etag, last_modified, len(data.encode('utf-8')))
+            )
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Recorrer de la menos a la más recientemente usada hasta caber
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed_at'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany('DELETE FROM cache WHERE key = ?', victims)
+
+    def touch(self, key):
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute('UPDATE cache SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+            return {'backend': 'sqlite', 'entries': count, 'bytes': total}
+        finally:
+            conn.close()
+
+
+class ResultCache:
+    """Caché de resultados de scraping con TTL sobre un backend memoria/SQLite."""
+
+    def __init__(self, backend, ttl=3600):
+        self.backend = backend
+        self.ttl = ttl
+        self._counts = {'hit': 0, 'miss': 0, 'revalidated': 0, 'stale': 0}
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """Devuelve (clave, entrada, edad en segundos); entrada es None si no hay."""
+        key = normalize_url(url)
+        entry = self.backend.get(key)
+        age = time.time() - entry['stored_at'] if entry else None
+        return key, entry, age
+
+    def is_fresh(self, age):
+        return age is not None and age < self.ttl
+
+    def record(self, status):
+        with self._lock:
+            self._counts[status] += 1
+
+    def store(self, key, value, etag=None, last_modified=None):
+        self.backend.set(key, value, etag=etag, last_modified=last_modified)
+
+    def touch(self, key):
+        self.backend.touch(key)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {**self.backend.stats(), 'ttl': self.ttl, **counts}
@@ -0,0 +1,617 @@
+import io
+import gzip
+import json
+import math
+import time
+import random
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+
+from lxml import etree, html as lxml_html
+
+from cache import url_key
+from domain_config import resolve_domain
+from http_fetcher import MAX_PAGE_BYTES, fetch_conditional
+from metrics import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_urls (
+    url_key TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    first_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_urls_domain ON seen_urls (domain, first_seen);
+CREATE TABLE IF NOT EXISTS feeds (
+    url TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    polled_at REAL,
+    status INTEGER,
+    entries INTEGER
+);
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    feeds TEXT,
+    feeds_found_at REAL,
+    interval REAL,
+    next_poll REAL,
+    last_new REAL,
+    polls INTEGER NOT NULL DEFAULT 0,
+    last_job TEXT
+);
+"""
+
+# Feeds y sitemaps pueden venir comprimidos; se descomprime hasta este tope
+MAX_FEED_BYTES = 4 * MAX_PAGE_BYTES
+# Sitemaps hijos que se siguen desde un índice (los más recientes por lastmod)
+MAX_CHILD_SITEMAPS = 3
+# Cada cuánto se vuelve a buscar la lista de feeds de un sitio
+FEEDS_TTL = 24 * 3600
+
+# Sin entidades ni red: un feed no puede leer archivos locales ni hacer peticiones
+FEED_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=False)
+
+
+class BloomFilter:
+    """Filtro de Bloom en memoria: sin falsos negativos, falsos positivos ~`error_rate`."""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Doble hashing sobre un único blake2b de 128 bits
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenStore:
+    """URLs ya vistas y estado del sondeo por sitio, persistidos en SQLite.
+
+    Un filtro de Bloom en memoria, reconstruido desde la base con el primer
+    uso (no al arrancar: con muchas URLs tarda), responde sin tocar SQLite
+    para la gran mayoría de URLs nuevas; solo los positivos (vistas de
+    verdad o falsos positivos) se confirman en la base.
+    """
+
+    def __init__(self, db_path, capacity=100000, error_rate=0.001):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = None
+        self._lock = threading.Lock()
+        self._stats = {'checked': 0, 'bloom_negatives': 0, 'db_checks': 0, 'false_positives': 0}
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _load(self, capacity):
+        bloom = BloomFilter(capacity, self.error_rate)
+        conn = self._connect()
+        try:
+            for (key,) in conn.execute('SELECT url_key FROM seen_urls'):
+                bloom.add(key)
+        finally:
+            conn.close()
+        return bloom
+
+    def _bloom_filter(self):
+        """El filtro de Bloom, cargándolo la primera vez (llamar con _lock tomado)."""
+        if self._bloom is None:
+            conn = self._connect()
+            try:
+                count = conn.execute('SELECT COUNT(*) FROM seen_urls').fetchone()[0]
+            finally:
+                conn.close()
+            self._bloom = self._load(max(self.capacity, 2 * count))
+        return self._bloom
+
+    def filter_new(self, keys):
+        """Subconjunto de `keys` que nunca se marcó como visto."""
+        keys = set(keys)
+        with self._lock:
+            bloom = self._bloom_filter()
+            maybe_seen = [key for key in keys if key in bloom]
+            self._stats['checked'] += len(keys)
+            self._stats['bloom_negatives'] += len(keys) - len(maybe_seen)
+            self._stats['db_checks'] += len(maybe_seen)
+        if not maybe_seen:
+            return keys
+
+        seen = set()
+        conn = self._connect()
+        try:
+            for start in range(0, len(maybe_seen), 500):
+                chunk = maybe_seen[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                seen.update(row[0] for row in conn.execute(
+                    f'SELECT url_key FROM seen_urls WHERE url_key IN ({placeholders})', chunk
+                ))
+        finally:
+            conn.close()
+        with self._lock:
+            self._stats['false_positives'] += len(maybe_seen) - len(seen)
+        return keys - seen
+
+    def mark_seen(self, keys, domain):
+        if not keys:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT OR IGNORE INTO seen_urls (url_key, domain, first_seen) VALUES (?, ?, ?)',
+                [(key, domain, now) for key in keys]
+            )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        with self._lock:
+            self._bloom_filter()
+            for key in keys:
+                self._bloom.add(key)
+            # Pasada la capacidad los falsos positivos crecen: reconstruir al doble
+            if self._bloom.count > self._bloom.capacity:
+                self._bloom = self._load(2 * self._bloom.capacity)
+
+    def feed(self, url):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT * FROM feeds WHERE url = ?', (url,)).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def save_feed(self, url, domain, etag, last_modified, status, entries):
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO feeds (url, domain, etag, last_modified, polled_at, status, entries) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, domain, etag, last_modified, time.time(), status, entries)
+            )
+        finally:
+            conn.close()
+
+    def forget_validators(self, domain):
+        """Descarta ETag/Last-Modified de los feeds del sitio para releerlos completos."""
+        conn = self._connect()
+        try:
+            conn.execute('UPDATE feeds SET etag = NULL, last_modified = NULL WHERE domain = ?', (domain,))
+        finally:
+            conn.close()
+
+    def domain(self, domain):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT * FROM domains WHERE domain = ?', (domain,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return {'domain': domain, 'feeds': None, 'feeds_found_at': None, 'interval': None,
+                    'next_poll': 0.0, 'last_new': None, 'polls': 0, 'last_job': None}
+        state = dict(row)
+        state['feeds'] = json.loads(state['feeds']) if state['feeds'] is not None else None
+        return state
+
+    def save_domain(self, state):
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO domains (domain, feeds, feeds_found_at, interval, next_poll, last_new, polls, last_job) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (state['domain'], json.dumps(state['feeds']) if state['feeds'] is not None else None,
+                 state['feeds_found_at'], state['interval'], state['next_poll'], state['last_new'],
+                 state['polls'], state['last_job'])
+            )
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            seen = conn.execute('SELECT COUNT(*) FROM seen_urls').fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            return {
+                'seen_urls': seen,
+                'bloom_bits': self._bloom.size if self._bloom else None,
+                'bloom_hashes': self._bloom.hashes if self._bloom else None,
+                **self._stats,
+            }
+
+
+def _localname(element):
+    return etree.QName(element).localname if isinstance(element.tag, str) else None
+
+
+def _child_text(element, *names):
+    """Texto del primer hijo con alguno de los nombres locales (sin importar el namespace)."""
+    for child in element.iter():
+        if child is not element and _localname(child) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def parse_date(text):
+    """Fecha RFC 822 (RSS) o ISO 8601 (Atom, sitemaps) como timestamp; None si no se entiende."""
+    if not text:
+        return None
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(text.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_feed(content):
+    """Entradas de un RSS, Atom, sitemap o news sitemap.
+
+    Devuelve (entradas, sitemaps hijos): cada entrada es un dict con 'url',
+    'title' (o None) y 'published' (timestamp o None); los sitemaps hijos
+    (de un sitemapindex) son dicts con 'url' y 'published'.
+    """
+    if content[:2] == b'\x1f\x8b':
+        with gzip.GzipFile(fileobj=io.BytesIO(content)) as f:
+            content = f.read(MAX_FEED_BYTES)
+    try:
+        root = etree.fromstring(content, FEED_PARSER)
+    except etree.XMLSyntaxError:
+        return [], []
+    if root is None:
+        return [], []
+
+    entries, sitemaps = [], []
+    for element in root.iter():
+        name = _localname(element)
+        if name == 'item':
+            url = _child_text(element, 'link')
+            if not url:
+                guid = next((child for child in element if _localname(child) == 'guid'), None)
+                if guid is not None and guid.get('isPermaLink', 'true') != 'false':
+                    url = (guid.text or '').strip()
+            entries.append({
+                'url': url,
+                'title': _child_text(element, 'title'),
+                'published': parse_date(_child_text(element, 'pubDate', 'date')),
+            })
+        elif name == 'entry':
+            links = [child for child in element if _localname(child) == 'link']
+            link = next((child for child in links if child.get('rel', 'alternate') == 'alternate'), None)
+            entries.append({
+                'url': link.get('href') if link is not None else None,
+                'title': _child_text(element, 'title'),
+                'published': parse_date(_child_text(element, 'published', 'updated')),
+            })
+        elif name == 'url':
+            entries.append({
+                'url': _child_text(element, 'loc'),
+                'title': _child_text(element, 'title'),
+                'published': parse_date(_child_text(element, 'publication_date', 'lastmod')),
+            })
+        elif name == 'sitemap':
+            sitemaps.append({
+                'url': _child_text(element, 'loc'),
+                'published': parse_date(_child_text(element, 'lastmod')),
+            })
+    return [entry for entry in entries if entry['url']], [sitemap for sitemap in sitemaps if sitemap['url']]
+
+
+class Discovery:
+    """Descubre artículos nuevos de los sitios configurados por RSS o news sitemaps.
+
+    Por sitio se usan los feeds de su configuración ('feeds') o, si no hay,
+    los que se encuentran en robots.txt (líneas Sitemap, prefiriendo los news
+    sitemaps) y en la portada (link rel=alternate RSS/Atom). Cada sondeo es
+    un GET condicional (ETag/Last-Modified), así que un feed sin cambios
+    cuesta un 304. Las URLs del sitio que no están en `store` se marcan como
+    vistas y se pasan a `submit` (p. ej. JobQueue.submit) como un trabajo.
+
+    El intervalo de cada sitio se adapta entre `min_interval` y
+    `max_interval`: se acorta a la mitad cuando aparecen artículos y se
+    alarga un 50% cuando no. En el primer sondeo de un sitio todo lo
+    publicado se da por visto y solo se encolan los `bootstrap_items` más
+    recientes; después se encolan hasta `max_new_per_poll` por sondeo y el
+    resto queda para el siguiente. Lo publicado hace más de `max_age`
+    segundos se marca como visto sin encolarse, igual que los títulos que
+    `is_known_title` reconozca (p. ej. los que ya están en la hoja).
+    """
+
+    def __init__(self, store, domains, submit, is_known_title=None, min_interval=300, max_interval=3600,
+                 default_interval=900, max_new_per_poll=50, bootstrap_items=10, max_age=2 * 86400,
+                 max_feeds=3, scheme='https'):
+        self.store = store
+        self.domains = domains
+        self._submit = submit
+        self._is_known_title = is_known_title
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.max_new_per_poll = max_new_per_poll
+        self.bootstrap_items = bootstrap_items
+        self.max_age = max_age
+        self.max_feeds = max_feeds
+        self.scheme = scheme
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        # Sondeo de todos los sitios pedido con request_poll_all(), pendiente o en curso
+        self._poll_all = threading.Event()
+        self._poll_all_lock = threading.Lock()
+        # Un sondeo a la vez por sitio (el hilo y POST /discovery/poll pueden coincidir)
+        self._domain_locks = {domain: threading.Lock() for domain in domains}
+        self._stats_lock = threading.Lock()
+        self._stats = {'polls': 0, 'not_modified': 0, 'fetch_errors': 0, 'found': 0, 'enqueued': 0, 'jobs': 0}
+
+    def start(self):
+        """Arranca el hilo que sondea los sitios cuando les toca (idempotente)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='discovery', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._poll_once()
+            self._wakeup.wait(self._next_wait())
+            self._wakeup.clear()
+
+    def _poll_once(self):
+        poll_all = self._poll_all.is_set()
+        try:
+            if poll_all:
+                self.poll_all()
+            else:
+                self.poll_due()
+        except Exception as e:
+            logging.error(f"Error en el sondeo de descubrimiento: {str(e)}")
+        finally:
+            if poll_all:
+                self._poll_all.clear()
+
+    def request_poll_all(self):
+        """Pide sondear todos los sitios en segundo plano, sin esperar a su turno.
+
+        Con el hilo en marcha lo despierta; si no, sondea en un hilo aparte.
+        Devuelve False si ya había un sondeo completo pendiente o en curso.
+        """
+        with self._poll_all_lock:
+            if self._poll_all.is_set():
+                return False
+            self._poll_all.set()
+        if self._thread is None or self._stop.is_set():
+            threading.Thread(target=self._poll_once, name='discovery-poll', daemon=True).start()
+        else:
+            self._wakeup.set()
+        return True
+
+    def _next_wait(self):
+        now = time.time()
+        next_poll = min((self.store.domain(domain)['next_poll'] for domain in self.domains), default=now + self.min_interval)
+        return min(max(next_poll - now, 1.0), self.min_interval)
+
+    def poll_all(self):
+        """Sondea todos los sitios; devuelve sus resúmenes."""
+        return [self.poll(domain) for domain in self.domains]
+
+    def poll_due(self):
+        """Sondea los sitios cuyo próximo sondeo ya venció; devuelve sus resúmenes."""
+        now = time.time()
+        return [self.poll(domain) for domain in self.domains if self.store.domain(domain)['next_poll'] <= now]
+
+    def _base_url(self, domain):
+        return f"{self.scheme}://{domain}/"
+
+    def discover_feeds(self, domain):
+        """Feeds del sitio: los de su configuración o los anunciados por robots.txt y la portada."""
+        base = self._base_url(domain)
+        configured = self.domains[domain].get('feeds')
+        if configured:
+            return [urljoin(base, feed) for feed in configured]
+
+        sitemaps = []
+        robots = fetch_conditional(urljoin(base, '/robots.txt'))
+        if robots is not None and robots.status == 200:
+            for line in robots.content.decode('utf-8', 'replace').splitlines():
+                if line.lower().startswith('sitemap:'):
+                    sitemaps.append(urljoin(base, line.split(':', 1)[1].strip()))
+        news_sitemaps = [sitemap for sitemap in sitemaps if 'news' in sitemap.lower()]
+
+        feeds = []
+        homepage = fetch_conditional(base)
+        if homepage is not None and homepage.status == 200 and homepage.content.strip():
+            try:
+                tree = lxml_html.fromstring(homepage.content)
+            except (etree.ParserError, ValueError):
+                tree = None
+            if tree is not None:
+                for link in tree.iter('link'):
+                    rel = (link.get('rel') or '').lower().split()
+                    kind = (link.get('type') or '').lower()
+                    if 'alternate' in rel and ('rss' in kind or 'atom' in kind) and link.get('href'):
+                        feeds.append(urljoin(base, link.get('href')))
+
+        # Los news sitemaps listan solo lo reciente; un sitemap general es el
+        # archivo completo del sitio y se usa solo si no hay otra cosa
+        candidates = news_sitemaps + feeds or sitemaps
+        return list(dict.fromkeys(candidates))[:self.max_feeds]
+
+    def _fetch_entries(self, domain, feed_url, depth=0):
+        """Entradas nuevas de un feed (GET condicional); sigue un nivel de sitemapindex."""
+        state = self.store.feed(feed_url) or {}
+        response = fetch_conditional(feed_url, state.get('etag'), state.get('last_modified'))
+        if response is None or response.status not in (200, 304):
+            with self._stats_lock:
+                self._stats['fetch_errors'] += 1
+            self.store.save_feed(feed_url, domain, state.get('etag'), state.get('last_modified'),
+                                 response.status if response else None, 0)
+            return []
+        if response.status == 304:
+            with self._stats_lock:
+                self._stats['not_modified'] += 1
+            self.store.save_feed(feed_url, domain, response.etag, response.last_modified, 304, 0)
+            return []
+
+        entries, sitemaps = parse_feed(response.content)
+        self.store.save_feed(feed_url, domain, response.etag, response.last_modified, 200, len(entries) + len(sitemaps))
+        if depth == 0:
+            sitemaps.sort(key=lambda sitemap: sitemap['published'] or 0, reverse=True)
+            for sitemap in sitemaps[:MAX_CHILD_SITEMAPS]:
+                entries.extend(self._fetch_entries(domain, urljoin(feed_url, sitemap['url']), depth + 1))
+        return entries
+
+    def _known_title(self, title):
+        return bool(title) and self._is_known_title(title)
+
+    def poll(self, domain):
+        """Sondea los feeds del sitio y encola sus artículos nuevos; devuelve un resumen."""
+        with self._domain_locks[domain], span('discovery_poll', domain):
+            return self._poll(domain)
+
+    def _poll(self, domain):
+        now = time.time()
+        state = self.store.domain(domain)
+        if state['feeds'] is None or now - (state['feeds_found_at'] or 0) > FEEDS_TTL:
+            state['feeds'] = self.discover_feeds(domain)
+            state['feeds_found_at'] = now
+            if not state['feeds']:
+                logging.warning(f"Descubrimiento: {domain} no anuncia feeds ni news sitemaps")
+
+        # Entradas del propio sitio, sin repetir, de la más reciente a la más antigua
+        candidates = {}
+        for feed_url in state['feeds']:
+            for entry in self._fetch_entries(domain, feed_url):
+                host = urlsplit(entry['url']).hostname or ''
+                if resolve_domain(host) != domain:
+                    continue
+                key = url_key(entry['url'])
+                if key not in candidates or (entry['published'] or 0) > (candidates[key]['published'] or 0):
+                    candidates[key] = entry
+        new_keys = self.store.filter_new(candidates)
+        new = sorted(((key, candidates[key]) for key in new_keys), key=lambda item: item[1]['published'] or 0, reverse=True)
+
+        bootstrap = state['polls'] == 0
+        skipped = {'old': 0, 'known_title': 0}
+        title_filter = self._is_known_title is not None
+        fresh = []
+        for key, entry in new:
+            if entry['published'] is not None and now - entry['published'] > self.max_age:
+                skipped['old'] += 1
+                continue
+            if title_filter:
+                try:
+                    if self._known_title(entry['title']):
+                        skipped['known_title'] += 1
+                        continue
+                except Exception as e:
+                    logging.warning(f"Descubrimiento: sin filtro de títulos para {domain}: {str(e)}")
+                    title_filter = False
+            fresh.append((key, entry))
+
+        # Lo que no cabe en este sondeo queda sin marcar para el siguiente
+        limit = self.bootstrap_items if bootstrap else self.max_new_per_poll
+        enqueue = fresh[:limit]
+        deferred = [] if bootstrap else fresh[limit:]
+        deferred_keys = {key for key, _ in deferred}
+        self.store.mark_seen([key for key, _ in new if key not in deferred_keys], domain)
+        if deferred:
+            # Con los validadores guardados el próximo sondeo recibiría un 304
+            self.store.forget_validators(domain)
+
+        job_id = None
+        urls = [entry['url'] for _, entry in enqueue]
+        if urls:
+            job_id = self._submit(urls)
+            state['last_job'] = job_id
+            state['last_new'] = now
+
+        interval = state['interval'] or self.domains[domain].get('poll_interval') or self.default_interval
+        interval = interval / 2 if urls and not bootstrap else interval * 1.5
+        state['interval'] = min(max(interval, self.min_interval), self.max_interval)
+        # Un poco de dispersión para que los sitios no se sondeen todos juntos
+        state['next_poll'] = now + state['interval'] * random.uniform(0.9, 1.1)
+        state['polls'] += 1
+        self.store.save_domain(state)
+
+        with self._stats_lock:
+            self._stats['polls'] += 1
+            self._stats['found'] += len(new)
+            self._stats['enqueued'] += len(urls)
+            self._stats['jobs'] += 1 if job_id else 0
+
+        if urls:
+            logging.info(f"Descubrimiento: {len(urls)} artículos nuevos de {domain} (trabajo {job_id})")
+        return {
+            'domain': domain,
+            'feeds': state['feeds'],
+            'entries': len(candidates),
+            'new': len(new),
+            'enqueued': len(urls),
+            'deferred': len(deferred),
+            'skipped_old': skipped['old'],
+            'skipped_known_title': skipped['known_title'],
+            'bootstrap': bootstrap,
+            'job_id': job_id,
+            'interval': round(state['interval'], 1),
+        }
+
+    def stats(self):
+        """Estado del descubrimiento por sitio para monitoreo."""
+        now = time.time()
+        domains = {}
+        for domain in self.domains:
+            state = self.store.domain(domain)
+            domains[domain] = {
+                'feeds': state['feeds'],
+                'polls': state['polls'],
+                'interval': state['interval'],
+                'next_poll_in': round(max(0.0, state['next_poll'] - now), 1) if state['polls'] else 0.0,
+                'last_new': state['last_new'],
+                'last_job': state['last_job'],
+            }
+        with self._stats_lock:
+            totals = dict(self._stats)
+        return {
+            'running': self._thread is not None and not self._stop.is_set(),
+            'poll_all_pending': self._poll_all.is_set(),
+            **totals,
+            'store': self.store.stats(),
+            'domains': domains,
+        }
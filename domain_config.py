@@ -0,0 +1,167 @@
+# Configuración de selectores por dominio (tu configuración original)
+#
+# Extracción (ver extractors.Extractor):
+#   'title_selector': selectores en orden de preferencia ('meta[...]' toma 'content')
+#   'body_selector': contenedor del cuerpo
+#   'body_mode': 'single' (primer nodo, por defecto) o 'paragraphs' (todos los
+#       nodos unidos con espacio)
+#   'strip_selectors': nodos a eliminar dentro del cuerpo antes de leer el texto
+#       (por defecto DEFAULT_BODY_STRIP; None para no eliminar nada)
+#   'text_separator': separador de get_text ('' pega los fragmentos; por defecto ' ')
+#   'prefix_selector': texto que se antepone al cuerpo (p. ej. la bajada)
+#   'body_fallback_selector' / 'fallback_strip_selectors': segundo intento con
+#       el mismo modo y separador
+#   'extra_fallbacks': intentos adicionales, cada uno con 'selector' y,
+#       opcionalmente, 'strip_selectors', 'text_separator' y 'body_mode'
+# Espera (ver readiness.wait_until_ready): 'wait_selector' (por defecto
+# 'body_selector'), 'wait_strategy' ('selector', 'dom_stable', 'network_idle'),
+# 'wait_quiet' y 'wait_time' (tope duro en segundos).
+# 'requires_js': True salta el intento por HTTP plano y va directo a Selenium.
+# 'max_concurrency': peticiones simultáneas al dominio en /batch-scrape.
+# 'allow_resources': patrones de resource_blocking que el sitio necesita cargar
+#     (p. ej. ['*googletagmanager.com*'] si el artículo no aparece sin ese script).
+#
+# Descubrimiento (ver discovery.Discovery): 'feeds' (RSS/Atom o news sitemaps,
+#     absolutos o relativos al sitio; por defecto los de robots.txt y la portada),
+#     'poll_interval' (intervalo inicial en segundos) y 'discovery': False para
+#     no sondear el sitio.
+#
+# Agregar un sitio solo requiere una entrada aquí; 'www.' y los subdominios
+# se resuelven en resolve_domain().
+
+# Bloques no deseados comunes dentro del cuerpo
+COMMON_STRIP = 'div.ad, div.share, div.comments, div.related-posts, div.social, div.tags, p.author, div.meta'
+EXTENDED_STRIP = COMMON_STRIP + ', div.sharedaddy, div.entry-meta'
+DEFAULT_BODY_STRIP = EXTENDED_STRIP + ', figure, aside, iframe'
+
+DOMAIN_CONFIG = {
+    'aristeguinoticias.com': {
+        'title_selector': ['h1.entry-title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div.entry-content',
+        'strip_selectors': None,
+        'text_separator': '',
+        'body_fallback_selector': 'div.contenido',
+        'fallback_strip_selectors': COMMON_STRIP,
+        'extra_fallbacks': [
+            {'selector': 'div.contenido', 'strip_selectors': EXTENDED_STRIP, 'text_separator': ' '}
+        ],
+        'wait_selector': 'div.entry-content, div.contenido',
+        'wait_time': 20,
+        'requires_js': True
+    },
+    'www.infobae.com': {
+        'title_selector': ['h1.article-headline', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div.body-article p.paragraph[data-mrf-recirculation="Links inline"]',
+        'body_mode': 'paragraphs',
+        'strip_selectors': None,
+        'wait_strategy': 'dom_stable'
+    },
+    'www.eluniversal.com.mx': {
+        'title_selector': ['h1.title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div.colum2 p.sc__font-paragraph[itemprop="description"]',
+        'body_mode': 'paragraphs',
+        'strip_selectors': None,
+        'body_fallback_selector': 'p.sc__font-paragraph[itemprop="description"]',
+        'wait_selector': 'p.sc__font-paragraph[itemprop="description"]',
+        'wait_strategy': 'dom_stable'
+    },
+    'lopezdoriga.com': {
+        'title_selector': ['h1.entry-title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div.article-content'
+    },
+    'www.milenio.com': {
+        'title_selector': ['h1.title', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div#content-body.media-container.news[itemprop="articleBody"]',
+        'wait_strategy': 'dom_stable'
+    },
+    'www.elfinanciero.com.mx': {
+        'title_selector': ['h1.c-heading.b-headline', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'article.b-article-body.article-body-wrapper',
+        'wait_strategy': 'dom_stable'
+    },
+    'www.jornada.com.mx': {
+        'title_selector': ['h1.titulo_art', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title', 'h1'],
+        'body_selector': 'div#content_nitf'
+    },
+    'www.excelsior.com.mx': {
+        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
+        'body_selector': 'div.field-items',
+        'strip_selectors': None,
+        'text_separator': ''
+    },
+    'www.eleconomista.com.mx': {
+        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
+        'body_selector': 'div.c-detail__body',
+        'strip_selectors': None,
+        'text_separator': ''
+    },
+    'www.proceso.com.mx': {
+        'title_selector': ['h1.titular'],
+        'body_selector': 'div.cuerpo-nota#cuerpo-nota',
+        'prefix_selector': 'strong.bajada',
+        'strip_selectors': 'aside.relacionadas.con-foto.linea-1078',
+        'text_separator': ''
+    },
+    'www.sinembargo.mx': {
+        'title_selector': ['h1', 'meta[property="og:title"]', 'meta[name="twitter:title"]', 'title'],
+        'body_selector': 'div.entry-content',
+        'strip_selectors': 'figure',
+        'text_separator': ''
+    },
+    'lasillarota.com': {
+        'title_selector': ['h1.titulo'],
+        'body_selector': 'div.article-content--cuerpo',
+        'strip_selectors': 'div.container, p.image-align-center, strong, div.tags-cloud, a[href="https://www.whatsapp.com/channel/0029Va6evSkGk1Ftej78ks0B"], a[href="https://news.google.com/publications/CAAqKggKIiRDQklTRlFnTWFoRUtEMnhoYzJsc2JHRnliM1JoTG1OdmJTZ0FQAQ?hl=es-419&gl=MX&ceid=MX%3Aes-419"]',
+        'text_separator': ''
+    },
+    'www.debate.com.mx': {
+        'title_selector': ['h1.newsfull__title'],
+        'body_selector': 'div.newsfull__body',
+        'strip_selectors': 'div.ck-related-news, li',
+        'text_separator': ''
+    },
+    'default': {
+        'title_selector': ['h1', 'h1.title', 'h1.post-title', 'h1.entry-title', 'meta[property="og:title"]', 'meta[name="title"]', 'title'],
+        'body_selector': 'article, div.entry-content, div.post-content, div.content, div.article-body, main, div[itemprop="articleBody"]',
+        'extra_fallbacks': [
+            {'selector': 'article', 'strip_selectors': EXTENDED_STRIP},
+            {'selector': 'body', 'strip_selectors': EXTENDED_STRIP}
+        ],
+        'wait_strategy': 'dom_stable'
+    }
+}
+
+
+def normalize_host(host):
+    """Host en minúsculas, sin puerto y sin 'www.'."""
+    host = host.lower().split(':', 1)[0].strip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+# Host normalizado -> clave de DOMAIN_CONFIG
+_KEYS_BY_HOST = {normalize_host(key): key for key in DOMAIN_CONFIG if key != 'default'}
+
+
+def resolve_domain(host):
+    """Clave de DOMAIN_CONFIG para el host, incluidos 'www.' y subdominios.
+
+    'm.infobae.com' e 'infobae.com' resuelven a 'www.infobae.com'. Devuelve
+    None si el host no corresponde a ningún sitio configurado.
+    """
+    host = normalize_host(host)
+    while '.' in host:
+        key = _KEYS_BY_HOST.get(host)
+        if key:
+            return key
+        host = host.split('.', 1)[1]
+    return None
+
+
+def domain_key(host):
+    """Clave de DOMAIN_CONFIG del host, o 'default' (etiqueta acotada para métricas)."""
+    return resolve_domain(host) or 'default'
+
+
+def get_domain_config(host):
+    """Configuración del sitio o la de 'default'."""
+    return DOMAIN_CONFIG[domain_key(host)]
@@ -0,0 +1,380 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from metrics import span
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: sin él no hay vigilancia de RSS
+    psutil = None
+
+
+class PoolExhausted(Exception):
+    """No se liberó ningún navegador dentro del tiempo de espera."""
+
+
+class _PooledDriver:
+    """Driver de Chrome junto con su contabilidad de uso."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+        self.rss_mb = 0.0
+        self.killed = False
+
+    def process_tree(self):
+        """chromedriver y todos sus descendientes (Chrome y sus procesos)."""
+        service_process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        if psutil is None or service_process is None:
+            return []
+        try:
+            root = psutil.Process(service_process.pid)
+            return [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def sample_rss(self):
+        """RSS total del árbol de procesos en MB (0 si no se puede medir)."""
+        total = 0
+        for process in self.process_tree():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        self.rss_mb = total / (1024 * 1024)
+        return self.rss_mb
+
+    def kill_tree(self):
+        """Mata Chrome sin pasar por WebDriver (que puede estar colgado).
+
+        chromedriver sigue vivo para que la sesión falle con un
+        WebDriverException normal (reintentable en otro navegador).
+        """
+        self.killed = True
+        for process in reversed(self.process_tree()[1:]):
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+
+
+class DriverPool:
+    """Pool acotado de drivers de Chrome headless reutilizables.
+
+    Los drivers se prestan por request con `lease()`, se verifican antes de
+    entregarse, se limpian al devolverse (cookies, storage, pestañas) y se
+    reciclan tras `max_uses` páginas o si el heap de JS supera `max_heap_mb`.
+
+    Con psutil instalado, `start_watchdog()` mide cada `watchdog_interval`
+    segundos el RSS del árbol de procesos de cada navegador: uno ocioso por
+    encima de `max_rss_mb` se recicla (y uno prestado, al devolverse), y
+    cualquiera por encima de `kill_rss_mb` se mata al instante aunque esté
+    cargando una página, antes de que el contenedor se quede sin memoria.
+
+    Los topes por navegador no acotan el total. `memory_budget_mb` sí: si la
+    suma de todos los navegadores lo pasa, se reciclan primero los ociosos y
+    luego se matan los prestados, de mayor a menor RSS, hasta volver a caber.
+    """
+
+    def __init__(self, factory, size=2, lease_timeout=60, max_uses=50, max_heap_mb=256,
+                 max_rss_mb=0, kill_rss_mb=0, memory_budget_mb=0, watchdog_interval=5):
+        self._factory = factory
+        self.size = size
+        self.lease_timeout = lease_timeout
+        self.max_uses = max_uses
+        self.max_heap_mb = max_heap_mb
+        self.max_rss_mb = max_rss_mb
+        self.kill_rss_mb = kill_rss_mb
+        self.memory_budget_mb = memory_budget_mb
+        self.watchdog_interval = watchdog_interval
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._leased_drivers = set()
+        self._watchdog = None
+        self._total = 0
+        self._leased = 0
+        self._closed = False
+        self._stats = {
+            'launched': 0,
+            'leases': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'lease_timeouts': 0,
+            'lease_wait_total': 0.0,
+            'rss_recycled': 0,
+            'rss_killed': 0,
+            'budget_enforced': 0,
+        }
+
+    def warm(self, count=None):
+        """Lanza navegadores hasta tener `count` ociosos (por defecto el tamaño del pool)."""
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) >= count or self._total >= self.size:
+                    return
+                self._total += 1
+            pooled = self._launch()
+            with self._cond:
+                if pooled:
+                    self._idle.append(pooled)
+                    self._cond.notify()
+                else:
+                    return
+
+    def _launch(self):
+        try:
+            with span('driver_startup'):
+                pooled = _PooledDriver(self._factory())
+        except Exception as e:
+            logging.error(f"No se pudo lanzar Chrome para el pool: {str(e)}")
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            return None
+        with self._cond:
+            self._stats['launched'] += 1
+        return pooled
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        while True:
+            launch = False
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        self._stats['lease_timeouts'] += 1
+                        raise PoolExhausted(f"Ningún navegador libre tras {timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._total += 1
+                    launch = True
+
+            if launch:
+                pooled = self._launch()
+                if pooled is None:
+                    raise WebDriverException("No se pudo lanzar Chrome")
+            elif not self._is_healthy(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._cond:
+                self._leased += 1
+                self._leased_drivers.add(pooled)
+                self._stats['leases'] += 1
+                self._stats['lease_wait_total'] += time.monotonic() - started
+            return pooled
+
+    def _is_healthy(self, pooled):
+        try:
+            return pooled.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def _heap_mb(self, driver):
+        try:
+            used = driver.execute_script(
+                'return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0'
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def _reset(self, driver):
+        """Deja el navegador como recién lanzado: una pestaña, sin cookies ni storage."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        parsed = urlparse(driver.current_url)
+        if parsed.scheme in ('http', 'https'):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                'origin': f"{parsed.scheme}://{parsed.netloc}",
+                'storageTypes': 'local_storage,session_storage,indexeddb,websql,service_workers,cache_storage',
+            })
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get('about:blank')
+
+    def _discard(self, pooled, recycled=False):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._stats['recycled' if recycled else 'discarded'] += 1
+            self._cond.notify()
+
+    def _release(self, pooled, broken=False):
+        with self._cond:
+            self._leased -= 1
+            self._leased_drivers.discard(pooled)
+        pooled.uses += 1
+
+        if broken or pooled.killed or self._closed:
+            self._discard(pooled)
+            return
+
+        if pooled.uses >= self.max_uses:
+            logging.info(f"Reciclando navegador tras {pooled.uses} páginas")
+            self._discard(pooled, recycled=True)
+            return
+
+        heap_mb = self._heap_mb(pooled.driver)
+        if heap_mb > self.max_heap_mb:
+            logging.info(f"Reciclando navegador con heap de {heap_mb:.0f} MB")
+            self._discard(pooled, recycled=True)
+            return
+
+        if self.max_rss_mb and pooled.sample_rss() > self.max_rss_mb:
+            logging.info(f"Reciclando navegador con RSS de {pooled.rss_mb:.0f} MB")
+            with self._cond:
+                self._stats['rss_recycled'] += 1
+            self._discard(pooled, recycled=True)
+            return
+
+        try:
+            self._reset(pooled.driver)
+        except Exception as e:
+            logging.warning(f"No se pudo limpiar el navegador, se descarta: {str(e)}")
+            self._discard(pooled)
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Presta un driver del pool y lo devuelve (o descarta) al salir del bloque."""
+        pooled = self._acquire(self.lease_timeout if timeout is None else timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except TimeoutException:
+            # Un timeout de carga no invalida el navegador; la limpieza decide
+            raise
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(pooled, broken=broken)
+
+    def start_watchdog(self):
+        """Arranca el hilo que vigila el RSS de los navegadores (idempotente)."""
+        limits = self.max_rss_mb or self.kill_rss_mb or self.memory_budget_mb
+        if self._watchdog is not None or psutil is None or not limits:
+            if psutil is None and limits:
+                logging.warning("psutil no está instalado: sin vigilancia de RSS de Chrome")
+            return
+        self._watchdog = threading.Thread(target=self._watch, name='driver-pool-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def _kill_leased(self, pooled):
+        # El lease verá un WebDriverException y lo descartará al devolverlo
+        pooled.kill_tree()
+        with self._cond:
+            self._stats['rss_killed'] += 1
+
+    def _recycle_idle(self, pooled):
+        """Descarta un navegador ocioso; False si ya se prestó o descartó."""
+        with self._cond:
+            if pooled not in self._idle:
+                return False
+            self._idle.remove(pooled)
+            self._stats['rss_recycled'] += 1
+        self._discard(pooled, recycled=True)
+        return True
+
+    def _watch(self):
+        while not self._closed:
+            time.sleep(self.watchdog_interval)
+            with self._cond:
+                idle = list(self._idle)
+                leased = list(self._leased_drivers)
+            for pooled in idle + leased:
+                pooled.sample_rss()
+
+            if self.kill_rss_mb:
+                for pooled in leased:
+                    if pooled.rss_mb > self.kill_rss_mb:
+                        logging.warning(f"Matando navegador en uso con RSS de {pooled.rss_mb:.0f} MB")
+                        self._kill_leased(pooled)
+
+            limit = self.max_rss_mb or self.kill_rss_mb
+            for pooled in list(idle):
+                if limit and pooled.rss_mb > limit and self._recycle_idle(pooled):
+                    logging.info(f"Reciclando navegador ocioso con RSS de {pooled.rss_mb:.0f} MB")
+                    idle.remove(pooled)
+
+            if self.memory_budget_mb:
+                self._enforce_budget(idle, [pooled for pooled in leased if not pooled.killed])
+
+    def _enforce_budget(self, idle, leased):
+        """Libera navegadores hasta que la suma de RSS quepa en memory_budget_mb."""
+        total = sum(pooled.rss_mb for pooled in idle + leased)
+        if total <= self.memory_budget_mb:
+            return
+        with self._cond:
+            self._stats['budget_enforced'] += 1
+        logging.warning(f"Navegadores con {total:.0f} MB de RSS, presupuesto de {self.memory_budget_mb} MB")
+        # Primero los ociosos (no cortan ninguna página), de mayor a menor
+        for pooled in sorted(idle, key=lambda p: p.rss_mb, reverse=True):
+            if total <= self.memory_budget_mb:
+                return
+            if self._recycle_idle(pooled):
+                total -= pooled.rss_mb
+        for pooled in sorted(leased, key=lambda p: p.rss_mb, reverse=True):
+            if total <= self.memory_budget_mb:
+                return
+            logging.warning(f"Matando navegador en uso con RSS de {pooled.rss_mb:.0f} MB por presupuesto")
+            self._kill_leased(pooled)
+            total -= pooled.rss_mb
+
+    def stats(self):
+        """Estadísticas del pool para monitoreo."""
+        with self._cond:
+            leases = self._stats['leases']
+            return {
+                'size': self.size,
+                'total': self._total,
+                'idle': len(self._idle),
+                'leased': self._leased,
+                'launched': self._stats['launched'],
+                'leases': leases,
+                'recycled': self._stats['recycled'],
+                'discarded': self._stats['discarded'],
+                'lease_timeouts': self._stats['lease_timeouts'],
+                'avg_lease_wait': round(self._stats['lease_wait_total'] / leases, 3) if leases else 0.0,
+                'max_uses': self.max_uses,
+                'max_heap_mb': self.max_heap_mb,
+                'rss_mb': round(sum(p.rss_mb for p in self._idle + list(self._leased_drivers)), 1),
+                'rss_recycled': self._stats['rss_recycled'],
+                'rss_killed': self._stats['rss_killed'],
+                'max_rss_mb': self.max_rss_mb,
+                'kill_rss_mb': self.kill_rss_mb,
+                'memory_budget_mb': self.memory_budget_mb,
+                'budget_enforced': self._stats['budget_enforced'],
+            }
+
+    def close(self):
+        """Cierra todos los navegadores ociosos; los prestados se cierran al devolverse."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
@@ -0,0 +1,222 @@
+import re
+import threading
+
+from domain_config import DEFAULT_BODY_STRIP, resolve_domain
+from metrics import FALLBACKS
+
+# Longitud máxima del cuerpo para evitar contenido irrelevante
+MAX_BODY_LENGTH = 5000
+WHITESPACE_RE = re.compile(r'\s+')
+# Cuerpos que Extractor.extract devuelve cuando no hay artículo que leer
+BODY_NOT_FOUND = "No se pudo encontrar el cuerpo de la noticia"
+BODY_ERROR = "Error al extraer el cuerpo"
+
+
+def compile_selector(selector):
+    """soupsieve.compile; soupsieve (y con él bs4) se importa con el primer selector."""
+    import soupsieve
+    return soupsieve.compile(selector)
+
+
+def body_found(body_text):
+    """False si el cuerpo es el aviso de que no se encontró o falló la extracción."""
+    return bool(body_text) and not body_text.startswith((BODY_NOT_FOUND, BODY_ERROR))
+
+
+def normalized_length(text):
+    """Longitud del texto tras colapsar espacios como lo hace Extractor.extract."""
+    return len(WHITESPACE_RE.sub(' ', text))
+
+
+def capped_text(node, separator, limit=None):
+    """get_text(separator, strip=True) que deja de leer el nodo al pasar `limit`.
+
+    Se detiene cuando el texto, ya con los espacios colapsados, supera
+    `limit` caracteres: lo que falta solo iría después del corte de
+    Extractor.extract, así que el resultado truncado es el mismo.
+    """
+    if limit is None:
+        return node.get_text(separator=separator, strip=True)
+    parts = []
+    length = -len(separator)
+    for string in node.stripped_strings:
+        parts.append(string)
+        length += len(separator) + normalized_length(string)
+        if length > limit:
+            break
+    return separator.join(parts)
+
+
+class TitleRule:
+    """Selector de título precompilado; los 'meta' aportan su atributo content."""
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.pattern = compile_selector(selector)
+        self.from_content = selector.startswith('meta')
+
+    def extract(self, soup):
+        element = self.pattern.select_one(soup)
+        if element is None:
+            return None
+        if self.from_content:
+            return element.get('content') or None
+        return element.get_text(strip=True) or None
+
+
+class BodyRule:
+    """Un intento de extracción del cuerpo con selectores precompilados."""
+
+    def __init__(self, selector, mode='single', strip_selectors=None, text_separator=' '):
+        if mode not in ('single', 'paragraphs'):
+            raise ValueError(f"body_mode desconocido: {mode}")
+        self.selector = selector
+        self.pattern = compile_selector(selector)
+        self.mode = mode
+        self.strip = compile_selector(strip_selectors) if strip_selectors else None
+        self.separator = text_separator
+
+    def _clean(self, node):
+        if self.strip is not None:
+            for unwanted in self.strip.select(node):
+                unwanted.decompose()
+
+    def matches(self, soup):
+        return self.pattern.select_one(soup) is not None
+
+    def extract(self, soup, limit=None):
+        """Texto del cuerpo; con `limit`, deja de leer al pasar ese largo (ver capped_text)."""
+        if self.mode == 'paragraphs':
+            texts = []
+            length = -1
+            for paragraph in self.pattern.select(soup):
+                self._clean(paragraph)
+                texts.append(capped_text(paragraph, '', None if limit is None else limit - length))
+                # Un párrafo vacío no suma: su espacio se colapsa con el siguiente
+                if texts[-1]:
+                    length += 1 + normalized_length(texts[-1])
+                if limit is not None and length > limit:
+                    break
+            return ' '.join(texts) or None
+
+        node = self.pattern.select_one(soup)
+        if node is None:
+            return None
+        self._clean(node)
+        return capped_text(node, self.separator, limit) or None
+
+
+class Extractor:
+    """Extractor de título y cuerpo compilado a partir de una entrada de DOMAIN_CONFIG."""
+
+    def __init__(self, key, config):
+        self.key = key
+        self.body_selector = config['body_selector']
+        self.title_rules = [TitleRule(selector) for selector in config['title_selector']]
+        self.prefix_selector = config.get('prefix_selector')
+        self.prefix = compile_selector(self.prefix_selector) if self.prefix_selector else None
+
+        mode = config.get('body_mode', 'single')
+        separator = config.get('text_separator', ' ')
+        self.body_rules = [
+            BodyRule(config['body_selector'], mode, config.get('strip_selectors', DEFAULT_BODY_STRIP), separator)
+        ]
+        if config.get('body_fallback_selector'):
+            self.body_rules.append(
+                BodyRule(config['body_fallback_selector'], mode, config.get('fallback_strip_selectors'), separator)
+            )
+        for fallback in config.get('extra_fallbacks', []):
+            self.body_rules.append(BodyRule(
+                fallback['selector'],
+                fallback.get('body_mode', 'single'),
+                fallback.get('strip_selectors'),
+                fallback.get('text_separator', ' ')
+            ))
+
+    @property
+    def selectors(self):
+        """Todos los selectores que lee el extractor (para el parseo por subárbol)."""
+        selectors = [rule.selector for rule in self.title_rules]
+        if self.prefix_selector:
+            selectors.append(self.prefix_selector)
+        selectors.extend(rule.selector for rule in self.body_rules)
+        return selectors
+
+    def has_body(self, soup):
+        """True si el selector principal del cuerpo está en el documento."""
+        return self.body_rules[0].matches(soup)
+
+    def extract_title(self, soup):
+        for index, rule in enumerate(self.title_rules):
+            title = rule.extract(soup)
+            if title:
+                if index:
+                    FALLBACKS.inc(domain=self.key, part='title', selector=rule.selector)
+                return title
+        return "Título no encontrado"
+
+    def extract_body(self, soup, limit=None):
+        prefix_text = ''
+        if self.prefix is not None:
+            element = self.prefix.select_one(soup)
+            prefix_text = element.get_text(strip=True) if element else ''
+
+        body_text = None
+        for index, rule in enumerate(self.body_rules):
+            body_text = rule.extract(soup, limit)
+            if body_text:
+                if index:
+                    FALLBACKS.inc(domain=self.key, part='body', selector=rule.selector)
+                break
+
+        body_text = ' '.join(part for part in (prefix_text, body_text) if part)
+        if not body_text:
+            return f"{BODY_NOT_FOUND} para el selector {self.body_selector}."
+        return body_text
+
+    def extract(self, soup, max_length=MAX_BODY_LENGTH):
+        """Devuelve (título, cuerpo) con el cuerpo limpio y truncado a `max_length`."""
+        title = self.extract_title(soup)
+
+        try:
+            # Basta leer un poco más de max_length: el resto se descarta al truncar
+            body_text = self.extract_body(soup, max_length)
+        except Exception as e:
+            body_text = f"{BODY_ERROR}: {str(e)}"
+
+        # Limpiar texto: eliminar espacios múltiples y líneas vacías
+        body_text = WHITESPACE_RE.sub(' ', body_text).strip()
+
+        if len(body_text) > max_length:
+            body_text = body_text[:max_length] + '...'
+
+        return title, body_text
+
+
+class ExtractorRegistry:
+    """Extractores compilados una sola vez, indexados por clave de DOMAIN_CONFIG.
+
+    Cada extractor se compila la primera vez que se pide su dominio (o todos
+    con compile_all), así que importar la API no carga soupsieve.
+    """
+
+    def __init__(self, domain_config):
+        self._config = domain_config
+        self._extractors = {}
+        self._lock = threading.Lock()
+
+    def _extractor(self, key):
+        extractor = self._extractors.get(key)
+        if extractor is None:
+            with self._lock:
+                extractor = self._extractors.get(key)
+                if extractor is None:
+                    extractor = self._extractors[key] = Extractor(key, self._config[key])
+        return extractor
+
+    def for_domain(self, host):
+        return self._extractor(resolve_domain(host) or 'default')
+
+    def compile_all(self):
+        for key in self._config:
+            self._extractor(key)
@@ -0,0 +1,176 @@
+import os
+import re
+import logging
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from domain_config import domain_key
+from metrics import TIMEOUTS
+
+# Mismo user-agent que Chrome para recibir el mismo marcado que el navegador
+USER_AGENT = 'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Mobile Safari/537.36'
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 15))
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 20))
+# Tope del HTML que se lee por página, en HTTP y en el navegador (0 = sin tope)
+MAX_PAGE_BYTES = int(os.environ.get('MAX_PAGE_BYTES', 2 * 1024 * 1024))
+# Proxy de salida opcional (también lo usa Chrome); p. ej. el servidor de capturas de bench/
+OUTBOUND_PROXY = os.environ.get('OUTBOUND_PROXY')
+
+# HTML descargado junto con sus validadores para revalidación condicional
+HttpPage = namedtuple('HttpPage', ['html', 'etag', 'last_modified'])
+# Respuesta de fetch_conditional; con 304 'content' es None y se conservan los validadores
+ConditionalResponse = namedtuple('ConditionalResponse', ['status', 'content', 'etag', 'last_modified'])
+# Estados que el navegador tampoco puede resolver: no vale la pena escalar
+GONE_STATUSES = (404, 410)
+
+
+class PageGone(Exception):
+    """La URL no existe (404/410); ni el navegador ni un reintento la van a traer."""
+
+    def __init__(self, url, status):
+        super().__init__(f"{url} respondió {status}")
+        self.status = status
+
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def _build_session():
+    session = requests.Session()
+    # Conexiones keep-alive reutilizadas por host; sin reintentos automáticos
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if OUTBOUND_PROXY:
+        session.proxies = {'http': OUTBOUND_PROXY, 'https': OUTBOUND_PROXY}
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-MX,es;q=0.9,en;q=0.5',
+        # 'br' solo se decodifica si el paquete brotli está instalado
+        'Accept-Encoding': 'gzip, deflate, br',
+    })
+    return session
+
+
+SESSION = _build_session()
+
+
+def _read(response, max_bytes=MAX_PAGE_BYTES):
+    """Cuerpo de la respuesta, dejando de descargar al pasar `max_bytes`."""
+    if not max_bytes:
+        return response.content
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            logging.warning(f"HTML de {response.url} truncado a {max_bytes} bytes")
+            break
+    return b''.join(chunks)[:max_bytes]
+
+
+def _decode(response, content):
+    """Decodifica el cuerpo respetando el charset del header o del <meta>."""
+    if 'charset' in response.headers.get('Content-Type', '').lower():
+        encoding = response.encoding
+    else:
+        match = META_CHARSET_RE.search(content[:4096])
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+
+def fetch_html(url):
+    """Descarga el HTML sin navegador.
+
+    Devuelve un HttpPage o None si la respuesta no sirve (error de red,
+    estado distinto de 200 o contenido que no es HTML). Lanza PageGone si
+    la página no existe.
+    """
+    try:
+        response = SESSION.get(url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True)
+    except requests.Timeout as e:
+        TIMEOUTS.inc(domain=domain_key(urlparse(url).netloc), kind='http')
+        logging.warning(f"Timeout en fetch HTTP de {url}: {str(e)}")
+        return None
+    except requests.RequestException as e:
+        logging.warning(f"Fetch HTTP fallido para {url}: {str(e)}")
+        return None
+
+    with response:
+        if response.status_code in GONE_STATUSES:
+            raise PageGone(url, response.status_code)
+        if response.status_code != 200:
+            logging.info(f"Fetch HTTP de {url} devolvió {response.status_code}")
+            return None
+        if 'html' not in response.headers.get('Content-Type', 'text/html').lower():
+            logging.info(f"Fetch HTTP de {url} no devolvió HTML")
+            return None
+
+        try:
+            content = _read(response)
+        except requests.RequestException as e:
+            logging.warning(f"Fetch HTTP fallido para {url}: {str(e)}")
+            return None
+
+    return HttpPage(_decode(response, content), response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+
+def _conditional_headers(etag=None, last_modified=None):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def fetch_conditional(url, etag=None, last_modified=None, max_bytes=MAX_PAGE_BYTES):
+    """GET condicional de un recurso que no es HTML (feeds, sitemaps, robots.txt).
+
+    Devuelve un ConditionalResponse con el cuerpo en bytes (sin decodificar)
+    o None si hubo un error de red.
+    """
+    try:
+        response = SESSION.get(
+            url, headers=_conditional_headers(etag, last_modified),
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True
+        )
+    except requests.RequestException as e:
+        logging.warning(f"GET condicional fallido para {url}: {str(e)}")
+        return None
+
+    with response:
+        if response.status_code != 200:
+            return ConditionalResponse(response.status_code, None, etag, last_modified)
+        try:
+            content = _read(response, max_bytes)
+        except requests.RequestException as e:
+            logging.warning(f"GET condicional fallido para {url}: {str(e)}")
+            return None
+
+    return ConditionalResponse(200, content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+
+def is_not_modified(url, etag=None, last_modified=None):
+    """GET condicional: True si el servidor responde 304 con los validadores dados."""
+    headers = _conditional_headers(etag, last_modified)
+    if not headers:
+        return False
+
+    try:
+        response = SESSION.get(url, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True)
+    except requests.RequestException as e:
+        logging.warning(f"Revalidación fallida para {url}: {str(e)}")
+        return False
+
+    # No descargar el cuerpo si cambió: el scraping normal lo volverá a pedir
+    response.close()
+    return response.status_code == 304
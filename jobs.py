@@ -0,0 +1,223 @@
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result TEXT,
+    error TEXT,
+    claimed_at REAL,
+    finished_at REAL,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, claimed_at);
+"""
+
+
+class JobQueue:
+    """Cola de trabajos de scraping persistida en SQLite.
+
+    Cada trabajo es una lista de URLs; los hilos trabajadores reclaman URLs
+    pendientes de una en una. Una URL reclamada cuyo trabajador murió (p. ej.
+    reinicio de gunicorn) vuelve a estar disponible tras `lease_seconds`, así
+    que los trabajos sobreviven a reinicios y la base puede compartirse entre
+    procesos.
+    """
+
+    def __init__(self, db_path, worker, workers=2, lease_seconds=300, poll_interval=1.0):
+        self.db_path = db_path
+        self._worker = worker
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def start(self):
+        """Arranca los hilos trabajadores (idempotente)."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def submit(self, urls):
+        """Encola una lista de URLs y devuelve el id del trabajo."""
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT INTO jobs (id, created_at, total) VALUES (?, ?, ?)', (job_id, time.time(), len(urls)))
+            conn.executemany(
+                'INSERT INTO job_items (job_id, position, url) VALUES (?, ?, ?)',
+                [(job_id, position, url) for position, url in enumerate(urls)]
+            )
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        self._wakeup.set()
+        return job_id
+
+    def _claim(self, conn):
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                """
+                SELECT job_items.job_id, job_items.position, job_items.url
+                FROM job_items JOIN jobs ON jobs.id = job_items.job_id
+                WHERE job_items.status = 'pending'
+                   OR (job_items.status = 'running' AND job_items.claimed_at < ?)
+                ORDER BY jobs.created_at, job_items.position
+                LIMIT 1
+                """,
+                (now - self.lease_seconds,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE job_items SET status = 'running', claimed_at = ? WHERE job_id = ? AND position = ?",
+                    (now, row['job_id'], row['position'])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _finish(self, conn, row, result=None, error=None):
+        conn.execute(
+            "UPDATE job_items SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ? AND position = ?",
+            (
+                'error' if error else 'done',
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error,
+                time.time(),
+                row['job_id'],
+                row['position'],
+            )
+        )
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    row = self._claim(conn)
+                except sqlite3.Error as e:
+                    logging.error(f"Error reclamando trabajo: {str(e)}")
+                    row = None
+                if row is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+
+                try:
+                    result, error = self._worker(row['url']), None
+                except Exception as e:
+                    logging.error(f"Error en trabajo {row['job_id']} para {row['url']}: {str(e)}")
+                    result, error = None, str(e)
+                try:
+                    self._finish(conn, row, result=result, error=error)
+                except Exception as e:
+                    # P. ej. "database is locked": el ítem sigue 'running' y se
+                    # vuelve a reclamar al vencer el lease; el hilo sigue vivo
+                    logging.error(f"Error guardando el resultado de {row['url']} (trabajo {row['job_id']}): {str(e)}")
+        finally:
+            conn.close()
+
+    def _item(self, row):
+        return {
+            "position": row['position'],
+            "url": row['url'],
+            "status": row['status'],
+            "result": json.loads(row['result']) if row['result'] else None,
+            "error": row['error'],
+            "finished_at": row['finished_at'],
+        }
+
+    def status(self, job_id, include_results=True):
+        """Estado del trabajo y, opcionalmente, los resultados ya terminados.
+
+        Devuelve None si el trabajo no existe.
+        """
+        conn = self._connect()
+        try:
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = {
+                row['status']: row['n']
+                for row in conn.execute(
+                    'SELECT status, COUNT(*) AS n FROM job_items WHERE job_id = ? GROUP BY status', (job_id,)
+                )
+            }
+            status = {
+                "job_id": job_id,
+                "created_at": job['created_at'],
+                "total": job['total'],
+                "counts": counts,
+                "status": 'running' if counts.get('pending') or counts.get('running') else 'done',
+            }
+            if include_results:
+                status['results'] = [
+                    self._item(row)
+                    for row in conn.execute(
+                        "SELECT * FROM job_items WHERE job_id = ? AND status IN ('done', 'error') ORDER BY position",
+                        (job_id,)
+                    )
+                ]
+            return status
+        finally:
+            conn.close()
+
+    def stream(self, job_id, poll_interval=0.5):
+        """Genera cada resultado del trabajo en cuanto termina (orden de llegada).
+
+        Al final emite el estado resumido del trabajo.
+        """
+        sent = set()
+        conn = self._connect()
+        try:
+            while True:
+                rows = conn.execute(
+                    "SELECT * FROM job_items WHERE job_id = ? AND status IN ('done', 'error') ORDER BY finished_at",
+                    (job_id,)
+                ).fetchall()
+                for row in rows:
+                    if row['position'] not in sent:
+                        sent.add(row['position'])
+                        yield self._item(row)
+                status = self.status(job_id, include_results=False)
+                if status is None or (status['status'] == 'done' and len(sent) >= status['total']):
+                    yield status or {"job_id": job_id, "status": "not_found"}
+                    return
+                time.sleep(poll_interval)
+        finally:
+            conn.close()
@@ -0,0 +1,245 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Límites (segundos) de los histogramas de duración: de milisegundos (parseo)
+# a decenas de segundos (carga con Selenium)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base de las métricas: nombre, ayuda y valores por combinación de etiquetas."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, no {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(_format_labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{labels} {_format_value(value)}" for labels, value in self._samples())
+        return lines
+
+    def drain(self):
+        """Valores acumulados desde el último drain, como lista serializable; los reinicia."""
+        return []
+
+    def merge(self, drained):
+        """Suma valores drenados en otro proceso."""
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def drain(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return [[list(key), value] for key, value in values.items()]
+
+    def merge(self, drained):
+        with self._lock:
+            for key, value in drained:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(_Metric):
+    """Valor instantáneo; con `function` se calcula al momento de exponerlo."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self):
+        if self._function is None:
+            return super()._samples()
+        try:
+            return [('', self._function())]
+        except Exception:
+            return []
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def drain(self):
+        with self._lock:
+            values, self._values = self._values, {}
+        return [[list(key), counts, total] for key, (counts, total) in values.items()]
+
+    def merge(self, drained):
+        with self._lock:
+            for key, counts, total in drained:
+                key = tuple(key)
+                current, current_total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+                self._values[key] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas que se exponen juntas en /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def drain(self):
+        """Contadores e histogramas acumulados desde el último drain, por nombre.
+
+        Los workers de scraping (ver workers.py) drenan su registro después
+        de cada tarea y la API lo suma con merge(); los gauges no viajan.
+        """
+        return {metric.name: values for metric in self._metrics for values in [metric.drain()] if values}
+
+    def merge(self, drained):
+        by_name = {metric.name: metric for metric in self._metrics}
+        for name, values in drained.items():
+            if name in by_name:
+                by_name[name].merge(values)
+
+    def render(self):
+        """Todas las métricas en el formato de texto de Prometheus (0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'scraper_stage_seconds', 'Duración de cada etapa del scraping', ['stage', 'domain']
+))
+RETRIES = REGISTRY.register(Counter(
+    'scraper_retries_total', 'Reintentos con Selenium tras un intento fallido', ['domain']
+))
+TIMEOUTS = REGISTRY.register(Counter(
+    'scraper_timeouts_total', 'Timeouts por tipo (http, page_load, wait)', ['domain', 'kind']
+))
+FALLBACKS = REGISTRY.register(Counter(
+    'scraper_fallback_selector_total', 'Extracciones resueltas por un selector de respaldo', ['domain', 'part', 'selector']
+))
+ARTICLES = REGISTRY.register(Counter(
+    'scraper_articles_total', 'Artículos obtenidos por nivel', ['domain', 'tier']
+))
+
+# Duraciones de la request en curso, por hilo (ver collect_timings)
+_local = threading.local()
+
+
+def record_stage(stage, seconds, domain=''):
+    """Registra la duración de una etapa en el histograma y en collect_timings."""
+    STAGE_SECONDS.observe(seconds, stage=stage, domain=domain)
+    collected = getattr(_local, 'timings', None)
+    if collected is not None:
+        collected[stage] = collected.get(stage, 0.0) + seconds
+
+
+def add_timings(timings):
+    """Suma a collect_timings etapas medidas en otro proceso (sin observar el histograma)."""
+    collected = getattr(_local, 'timings', None)
+    if collected is not None:
+        for stage, seconds in timings.items():
+            if stage != 'total':
+                collected[stage] = collected.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage, domain=''):
+    """Mide el bloque como la etapa `stage` (también si lanza una excepción)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started, domain)
+
+
+@contextmanager
+def collect_timings():
+    """Junta en un dict las etapas medidas en este hilo durante el bloque.
+
+    Al salir el dict tiene los segundos por etapa (sumados si una etapa se
+    repite, p. ej. en reintentos) y 'total' con la duración del bloque.
+    """
+    previous = getattr(_local, 'timings', None)
+    collected = {}
+    _local.timings = collected
+    started = time.perf_counter()
+    try:
+        yield collected
+    finally:
+        _local.timings = previous
+        collected['total'] = time.perf_counter() - started
+        for stage, seconds in collected.items():
+            collected[stage] = round(seconds, 4)
@@ -0,0 +1,111 @@
+import logging
+from html import escape
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax es opcional: sin él solo hay modo 'full'
+    LexborHTMLParser = None
+
+# Backends de BeautifulSoup soportados. 'lxml' es bastante más rápido, pero el
+# por defecto sigue siendo 'html.parser' (el original, referencia de
+# bench/golden.json) hasta validar lxml contra páginas reales capturadas
+HTML_PARSERS = ('lxml', 'html.parser')
+PARSE_MODES = ('full', 'subtree')
+
+# Elementos que nunca forman parte del título ni del cuerpo
+NOISE_TAGS = ['script', 'style', 'comment', 'nav', 'footer', 'aside', 'iframe']
+
+
+def parse_document(html, parser='html.parser'):
+    """Parsea el HTML y elimina scripts, estilos y elementos no deseados."""
+    # bs4 se importa con el primer parseo, no al arrancar la API
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, parser)
+
+    for element in soup(NOISE_TAGS):
+        element.decompose()
+
+    return soup
+
+
+def _open_tag(node):
+    attrs = ''.join(
+        f' {name}' if value is None else f' {name}="{escape(value, quote=True)}"'
+        for name, value in node.attributes.items()
+    )
+    return f'<{node.tag}{attrs}>'
+
+
+def subtree_html(html, selectors):
+    """Reduce el documento a los nodos que puede leer el extractor.
+
+    Conserva, en orden de documento, cada nodo que coincide con alguno de
+    `selectors` (sin repetir los que ya están dentro de otro), envuelto en
+    copias vacías de sus ancestros para que los selectores con combinadores
+    y la limpieza de NOISE_TAGS se comporten igual que sobre la página
+    completa. Devuelve None si no se puede reducir (sin selectolax, o si
+    coincide <body>/<html> y habría que parsear todo de todos modos).
+    """
+    if LexborHTMLParser is None:
+        return None
+
+    tree = LexborHTMLParser(html)
+    kept = set()
+    head_parts = []
+    body_parts = []
+
+    for node in tree.css(', '.join(selectors)):
+        if node.tag in ('html', 'body', 'head'):
+            return None
+        # Un nodo que coincide con varios selectores puede venir repetido
+        if node.mem_id in kept:
+            continue
+
+        wrappers = []
+        section = body_parts
+        contained = False
+        parent = node.parent
+        while parent is not None and parent.tag not in ('html', '-document'):
+            if parent.mem_id in kept:
+                contained = True
+                break
+            if parent.tag == 'head':
+                section = head_parts
+                break
+            if parent.tag == 'body':
+                break
+            wrappers.append(parent)
+            parent = parent.parent
+        if contained:
+            continue
+
+        kept.add(node.mem_id)
+        wrappers.reverse()
+        section.append(
+            ''.join(_open_tag(w) for w in wrappers)
+            + node.html
+            + ''.join(f'</{w.tag}>' for w in reversed(wrappers))
+        )
+
+    return f"<html><head>{''.join(head_parts)}</head><body>{''.join(body_parts)}</body></html>"
+
+
+def parse_for_extraction(html, selectors, parser='html.parser', mode='full'):
+    """Parsea la página completa o, en modo 'subtree', solo los nodos útiles.
+
+    'subtree' parsea más rápido las páginas grandes, pero no ahorra memoria:
+    el árbol de lexbor reserva ~1 MB por documento aunque la página sea
+    chica, así que su pico es mayor que el de 'full' en todas las capturas
+    de bench/ (~1.3 MB contra 20-100 KB en páginas chicas, ~2.4 MB contra
+    ~1.5 MB en la de 300 KB). 'full' es el modo recomendado y por defecto.
+    """
+    if mode == 'subtree':
+        try:
+            reduced = subtree_html(html, selectors)
+        except Exception as e:
+            logging.warning(f"No se pudo reducir el documento, parseando completo: {str(e)}")
+            reduced = None
+        if reduced is not None:
+            return parse_document(reduced, parser)
+
+    return parse_document(html, parser)
@@ -0,0 +1,83 @@
+import time
+import logging
+
+from selenium.common.exceptions import TimeoutException
+
+# Tope por defecto (segundos) si el dominio no define 'wait_time'
+DEFAULT_WAIT_TIME = 15
+# Ventana (segundos) sin cambios para considerar el DOM o la red en reposo
+DEFAULT_QUIET_WINDOW = 0.5
+POLL_INTERVAL = 0.2
+
+# Huella barata del DOM: número de nodos y longitud del texto del body
+DOM_SIGNATURE_JS = (
+    "return [document.getElementsByTagName('*').length, "
+    "document.body ? document.body.textContent.length : 0];"
+)
+# Recursos pedidos hasta ahora y estado de carga del documento
+NETWORK_SIGNATURE_JS = (
+    "return [performance.getEntriesByType('resource').length, document.readyState];"
+)
+
+
+def _wait_until_quiet(driver, script, deadline, quiet_window, ready=None):
+    """Sondea `script` hasta que su resultado no cambie durante `quiet_window` segundos."""
+    last = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        current = driver.execute_script(script)
+        now = time.monotonic()
+        if current != last:
+            last = current
+            stable_since = now
+        elif now - stable_since >= quiet_window and (ready is None or ready(current)):
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
+
+
+def wait_until_ready(driver, config):
+    """Espera a que la página esté lista según la estrategia del dominio.
+
+    Claves de DOMAIN_CONFIG:
+      - wait_selector: selector a esperar (por defecto 'body_selector')
+      - wait_strategy: 'selector' (solo el selector), 'dom_stable' o 'network_idle'
+      - wait_quiet: segundos sin cambios para 'dom_stable'/'network_idle'
+      - wait_time: tope duro en segundos para toda la espera
+
+    Devuelve True si la condición se cumplió antes del tope.
+    """
+    # selenium.webdriver importa todos los navegadores: se carga al primer render
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    started = time.monotonic()
+    deadline = started + config.get('wait_time', DEFAULT_WAIT_TIME)
+    selector = config.get('wait_selector', config['body_selector'])
+    strategy = config.get('wait_strategy', 'selector')
+    quiet_window = config.get('wait_quiet', DEFAULT_QUIET_WINDOW)
+
+    try:
+        WebDriverWait(driver, max(deadline - time.monotonic(), 0), poll_frequency=POLL_INTERVAL).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
+    except TimeoutException:
+        logging.warning(f"Selector '{selector}' no apareció en {time.monotonic() - started:.1f}s, capturando igualmente")
+        return False
+
+    if strategy == 'dom_stable':
+        ready = _wait_until_quiet(driver, DOM_SIGNATURE_JS, deadline, quiet_window)
+    elif strategy == 'network_idle':
+        ready = _wait_until_quiet(
+            driver, NETWORK_SIGNATURE_JS, deadline, quiet_window,
+            ready=lambda signature: signature[1] == 'complete'
+        )
+    else:
+        ready = True
+
+    if ready:
+        logging.info(f"Página lista ({strategy}) en {time.monotonic() - started:.1f}s")
+    else:
+        logging.warning(f"Tope de espera ({strategy}) alcanzado, capturando igualmente")
+    return ready
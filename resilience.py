@@ -0,0 +1,158 @@
+import time
+import random
+import logging
+import threading
+
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from http_fetcher import PageGone
+
+# Errores de red de Chrome (net::ERR_*) que no se arreglan reintentando en
+# segundos: el host no existe, rechaza conexiones o el certificado es inválido
+FATAL_NET_ERRORS = (
+    'ERR_NAME_NOT_RESOLVED', 'ERR_NAME_RESOLUTION_FAILED', 'ERR_ADDRESS_UNREACHABLE',
+    'ERR_CONNECTION_REFUSED', 'ERR_CERT_', 'ERR_SSL_', 'ERR_TOO_MANY_REDIRECTS',
+    'ERR_INVALID_URL', 'ERR_UNSAFE_REDIRECT', 'ERR_BLOCKED_BY_',
+)
+# De esos, los que indican que el sitio (no la URL) está caído
+SITE_DOWN_NET_ERRORS = (
+    'ERR_NAME_NOT_RESOLVED', 'ERR_NAME_RESOLUTION_FAILED', 'ERR_ADDRESS_UNREACHABLE',
+    'ERR_CONNECTION_REFUSED',
+)
+# Errores transitorios de red del sitio: se reintentan, pero cuentan para el breaker
+SITE_FLAKY_NET_ERRORS = (
+    'ERR_TIMED_OUT', 'ERR_CONNECTION_TIMED_OUT', 'ERR_CONNECTION_RESET',
+    'ERR_CONNECTION_CLOSED', 'ERR_EMPTY_RESPONSE',
+)
+
+
+def classify_error(exc):
+    """Clasifica un fallo de scraping como (reintentable, falla del sitio).
+
+    - Timeouts y cortes de conexión: reintentables y atribuibles al sitio.
+    - DNS, conexión rechazada: no reintentables, el sitio está caído.
+    - 404/410, certificados, redirecciones: no reintentables, el sitio responde.
+    - Otros errores de WebDriver (Chrome caído, sesión inválida): reintentables
+      con otro navegador, sin culpa del sitio.
+    - Cualquier otra excepción (p. ej. un bug de extracción): no reintentable.
+    """
+    if isinstance(exc, PageGone):
+        return False, False
+    if isinstance(exc, TimeoutException):
+        return True, True
+
+    message = str(exc)
+    if any(code in message for code in SITE_DOWN_NET_ERRORS):
+        return False, True
+    if any(code in message for code in FATAL_NET_ERRORS):
+        return False, False
+    if any(code in message for code in SITE_FLAKY_NET_ERRORS):
+        return True, True
+    if isinstance(exc, WebDriverException):
+        return True, False
+    return False, False
+
+
+def backoff_delay(attempt, base=1.0, cap=8.0):
+    """Espera antes del reintento `attempt` (desde 0): backoff exponencial con jitter completo."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Circuit breaker por sitio.
+
+    Tras `failure_threshold` fallas consecutivas del sitio (ver
+    classify_error) el circuito se abre y las solicitudes fallan al instante
+    durante `cooldown` segundos. Pasado ese tiempo queda semiabierto: deja
+    pasar una sola solicitud de prueba; si funciona se cierra, y si falla se
+    vuelve a abrir con el doble de espera (hasta `max_cooldown`).
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60, max_cooldown=600):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = {
+                'state': 'closed',
+                'failures': 0,
+                'opened_at': None,
+                'cooldown': self.cooldown,
+                'probing': False,
+                'rejected': 0,
+            }
+        return circuit
+
+    def allow(self, key):
+        """True si se puede intentar el sitio; en semiabierto reserva la prueba."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit['state'] == 'closed':
+                return True
+            if circuit['state'] == 'open' and time.monotonic() - circuit['opened_at'] >= circuit['cooldown']:
+                circuit['state'] = 'half_open'
+            if circuit['state'] == 'half_open' and not circuit['probing']:
+                circuit['probing'] = True
+                return True
+            circuit['rejected'] += 1
+            return False
+
+    def retry_in(self, key):
+        """Segundos hasta que el circuito deje pasar una prueba."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit['state'] != 'open':
+                return 0.0
+            return max(0.0, circuit['cooldown'] - (time.monotonic() - circuit['opened_at']))
+
+    def record(self, key, ok):
+        """Registra el resultado: True (el sitio respondió), False (falla del sitio) o None (neutro)."""
+        with self._lock:
+            if ok is None:
+                circuit = self._circuits.get(key)
+                if circuit is not None:
+                    circuit['probing'] = False
+                return
+
+            if ok:
+                circuit = self._circuits.pop(key, None)
+                if circuit is not None and circuit['state'] != 'closed':
+                    logging.info(f"Circuito de {key} cerrado tras una prueba exitosa")
+                return
+
+            circuit = self._circuit(key)
+            circuit['failures'] += 1
+            circuit['probing'] = False
+            if circuit['state'] == 'half_open':
+                circuit['cooldown'] = min(circuit['cooldown'] * 2, self.max_cooldown)
+            elif circuit['failures'] < self.failure_threshold:
+                return
+            circuit['state'] = 'open'
+            circuit['opened_at'] = time.monotonic()
+            logging.warning(f"Circuito de {key} abierto tras {circuit['failures']} fallas; prueba en {circuit['cooldown']:.0f}s")
+
+    def states(self):
+        """Circuitos no cerrados (o con fallas acumuladas) para el health check."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    'state': circuit['state'],
+                    'failures': circuit['failures'],
+                    'rejected': circuit['rejected'],
+                    'retry_in': (
+                        round(max(0.0, circuit['cooldown'] - (now - circuit['opened_at'])), 1)
+                        if circuit['state'] == 'open' else 0.0
+                    ),
+                }
+                for key, circuit in self._circuits.items()
+            }
+
+    def open_count(self):
+        with self._lock:
+            return sum(1 for circuit in self._circuits.values() if circuit['state'] != 'closed')
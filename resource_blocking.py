@@ -0,0 +1,115 @@
+import os
+import json
+import logging
+
+from parsing import NOISE_TAGS
+
+# Solo leemos texto de page_source: imágenes, fuentes y media no hacen falta
+BLOCKED_EXTENSIONS = [
+    '*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+    '*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*',
+    '*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*',
+]
+# Publicidad, analítica y widgets de terceros
+BLOCKED_HOSTS = [
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*', '*adservice.google.*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*googletagservices.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*scorecardresearch.com*', '*chartbeat.*',
+    '*taboola.com*', '*outbrain.com*', '*amazon-adsystem.com*', '*adnxs.com*', '*criteo.*',
+    '*hotjar.com*', '*quantserve.com*', '*pubmatic.com*', '*rubiconproject.com*',
+    '*teads.tv*', '*onesignal.com*', '*sharethis.com*', '*addthis.com*', '*jwplayer.com*',
+    '*youtube.com/embed*', '*platform.twitter.com*', '*instagram.com/embed*',
+]
+
+RESOURCE_BLOCKING = os.environ.get('RESOURCE_BLOCKING', '1') == '1'
+# Patrones adicionales separados por comas
+EXTRA_BLOCKED_PATTERNS = [p.strip() for p in os.environ.get('BLOCKED_URL_PATTERNS', '').split(',') if p.strip()]
+
+
+def configure_options(options):
+    """Preferencias de Chrome para no cargar imágenes y registrar la red."""
+    if RESOURCE_BLOCKING:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+        })
+    # El log de rendimiento trae los eventos de red para contar bytes por página
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def blocked_patterns(config):
+    """Patrones bloqueados para el dominio, descontando su 'allow_resources'."""
+    allowed = set(config.get('allow_resources', []))
+    return [p for p in BLOCKED_EXTENSIONS + BLOCKED_HOSTS + EXTRA_BLOCKED_PATTERNS if p not in allowed]
+
+
+def prepare_page(driver, config):
+    """Aplica el bloqueo del dominio y descarta el log de red de la página anterior."""
+    if RESOURCE_BLOCKING:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_patterns(config)})
+    drain_network_log(driver)
+
+
+def drain_network_log(driver):
+    try:
+        return driver.get_log('performance')
+    except Exception:
+        return []
+
+
+def page_transfer_stats(driver):
+    """Bytes transferidos, peticiones completadas y peticiones bloqueadas desde prepare_page."""
+    transferred = 0
+    requests = 0
+    blocked = 0
+    for entry in drain_network_log(driver):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            requests += 1
+            transferred += int(message['params'].get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            blocked += 1
+    return {'bytes': transferred, 'requests': requests, 'blocked': blocked}
+
+
+# Quita en el navegador lo que parse_document descartaría de todos modos
+# (scripts con estados JSON de varios MB, estilos, iframes...) y serializa
+# a lo sumo arguments[0] caracteres, para no transferir ni parsear de más
+PAGE_SOURCE_JS = (
+    "document.querySelectorAll('" + ', '.join(tag for tag in NOISE_TAGS if tag != 'comment') + "')"
+    ".forEach(function (node) { node.remove(); });"
+    "var html = document.documentElement.outerHTML;"
+    "return [arguments[0] > 0 ? html.substring(0, arguments[0]) : html, html.length];"
+)
+
+
+def read_page_source(driver, max_chars):
+    """HTML de la página sin los NOISE_TAGS, truncado a `max_chars` (0 = sin tope).
+
+    Devuelve (html, caracteres antes de truncar). Si el script falla se usa
+    page_source completo.
+    """
+    try:
+        html, length = driver.execute_script(PAGE_SOURCE_JS, max_chars)
+    except Exception as e:
+        logging.warning(f"No se pudo reducir el HTML en el navegador: {str(e)}")
+        html = driver.page_source
+        length = len(html)
+        if max_chars and length > max_chars:
+            html = html[:max_chars]
+    if max_chars and length > max_chars:
+        logging.warning(f"HTML de {length} caracteres truncado a {max_chars}")
+    return html, length
+
+
+def log_page_stats(url, stats):
+    logging.info(
+        f"Página {url}: {stats['bytes'] / 1024:.0f} KB en {stats['requests']} peticiones, "
+        f"{stats['blocked']} bloqueadas, {stats['load_time']:.1f}s"
+    )
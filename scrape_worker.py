@@ -0,0 +1,56 @@
+"""Proceso worker de scraping lanzado por workers.WorkerPool.
+
+Lee tareas JSON por stdin, una por línea ({"url": ..., "max_retries": ...}),
+las resuelve con app.fetch_article usando su propio navegador y responde una
+línea JSON por stdout con el resultado, los tiempos por etapa y las métricas
+y conteos por nivel acumulados para que la API los sume.
+
+Uso:
+    python scrape_worker.py
+"""
+import os
+import sys
+import json
+
+# Un worker nunca lanza workers, ni atiende trabajos, ni descubre artículos,
+# ni cachea, ni guarda artículos: eso vive en la API. Su pool es de un solo
+# navegador.
+os.environ['SCRAPER_PROCESSES'] = '0'
+os.environ['JOB_WORKERS'] = '0'
+os.environ['DISCOVERY_ENABLED'] = '0'
+os.environ['RESULT_CACHE_BACKEND'] = 'none'
+os.environ['ARTICLE_STORE_ENABLED'] = '0'
+os.environ['SCRAPER_POOL_SIZE'] = '1'
+# Sin hoja de títulos: el worker solo precalienta librerías y su navegador
+os.environ['PREWARM_STEPS'] = 'libraries,browsers'
+
+
+def main():
+    # stdout es el canal con la API; cualquier print de las librerías va a stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    import app
+    from metrics import REGISTRY, collect_timings
+
+    # El worker no recibe solicitudes HTTP: precalienta en cuanto arranca
+    app.WARMUP.start()
+
+    for line in sys.stdin:
+        task = json.loads(line)
+        with collect_timings() as timings:
+            result = app.fetch_article(task['url'], task.get('max_retries', 2))
+        channel.write(json.dumps({
+            "result": result,
+            "timings": timings,
+            "metrics": REGISTRY.drain(),
+            "tiers": app.drain_tier_stats(),
+        }, ensure_ascii=False) + '\n')
+        channel.flush()
+
+    app.DRIVER_POOL.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
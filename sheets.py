@@ -0,0 +1,172 @@
+import abc
+import time
+import logging
+import threading
+
+from metrics import span
+
+
+class SheetSource(abc.ABC):
+    """Interfaz mínima de acceso a la hoja que necesita TitleIndex."""
+
+    @abc.abstractmethod
+    def header(self):
+        """Valores de la fila de encabezados."""
+
+    @abc.abstractmethod
+    def column_values(self, col_index, start_row):
+        """Valores de la columna `col_index` (base 1) desde `start_row` hasta el final.
+
+        Como la API de Sheets, sin las celdas vacías del final.
+        """
+
+
+class GSpreadSource(SheetSource):
+    """Hoja de Google Sheets con un cliente autorizado de larga vida."""
+
+    def __init__(self, creds_file, scope, sheet_id, worksheet_name):
+        self.creds_file = creds_file
+        self.scope = scope
+        self.sheet_id = sheet_id
+        self.worksheet_name = worksheet_name
+        self._worksheet = None
+        self._lock = threading.Lock()
+
+    def _sheet(self):
+        with self._lock:
+            if self._worksheet is None:
+                # gspread y oauth2client tardan en importarse: solo si se usa la hoja
+                import gspread
+                from oauth2client.service_account import ServiceAccountCredentials
+                creds = ServiceAccountCredentials.from_json_keyfile_name(self.creds_file, self.scope)
+                client = gspread.authorize(creds)
+                self._worksheet = client.open_by_key(self.sheet_id).worksheet(self.worksheet_name)
+            return self._worksheet
+
+    def _call(self, fn):
+        try:
+            return fn(self._sheet())
+        except Exception:
+            # Forzar una nueva autorización en la próxima llamada
+            self.reset()
+            raise
+
+    def reset(self):
+        with self._lock:
+            self._worksheet = None
+
+    def header(self):
+        return self._call(lambda sheet: sheet.row_values(1))
+
+    def column_values(self, col_index, start_row):
+        from gspread.utils import rowcol_to_a1
+        # Rango abierto tipo 'C5:C' para bajar solo las filas nuevas
+        column = rowcol_to_a1(1, col_index).rstrip('0123456789')
+        rows = self._call(lambda sheet: sheet.get(f"{column}{start_row}:{column}"))
+        return [row[0] if row else '' for row in rows]
+
+
+def normalize_title(title):
+    return title.strip().lower()
+
+
+class TitleIndex:
+    """Conjunto en memoria de los títulos de una columna de la hoja.
+
+    La primera carga es síncrona; después, si los datos tienen más de `ttl`
+    segundos se sirven igual y se refrescan en segundo plano pidiendo solo
+    las filas agregadas desde la última carga. `invalidate()` fuerza una
+    recarga completa (p. ej. si se editaron o borraron filas).
+
+    Si se da `fuzzy_factory` (p. ej. FuzzyTitleIndex), también mantiene un
+    índice de similitud que se alimenta con las mismas filas nuevas.
+    """
+
+    def __init__(self, source, column_name, ttl=300, fuzzy_factory=None):
+        self.source = source
+        self.column_name = column_name
+        self.ttl = ttl
+        self._fuzzy_factory = fuzzy_factory
+        self._fuzzy = fuzzy_factory() if fuzzy_factory else None
+        self._titles = set()
+        self._col_index = None
+        self._row_count = 0
+        self._loaded_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def titles(self):
+        """Títulos normalizados (strip + lower)."""
+        if self._loaded_at is None:
+            self.refresh()
+        elif time.time() - self._loaded_at > self.ttl:
+            self._refresh_in_background()
+        return self._titles
+
+    def fuzzy(self):
+        """Índice de similitud cargado (None si no se configuró)."""
+        self.titles()
+        return self._fuzzy
+
+    def refresh(self):
+        """Trae las filas nuevas de la hoja y las agrega al índice."""
+        with self._refresh_lock:
+            if self._col_index is None:
+                with span('sheets_header'):
+                    headers = self.source.header()
+                if self.column_name not in headers:
+                    raise ValueError(f"Column '{self.column_name}' not found in sheet.")
+                self._col_index = headers.index(self.column_name) + 1
+
+            # La fila 1 es el encabezado; pedir desde la primera fila no vista
+            with span('sheets_fetch'):
+                values = self.source.column_values(self._col_index, self._row_count + 2)
+            new_titles = {normalize_title(value) for value in values if value.strip()}
+            if self._fuzzy is not None:
+                self._fuzzy.add_many(value for value in values if value.strip())
+
+            with self._lock:
+                # Reemplazar en vez de mutar: los lectores nunca ven un set a medias
+                self._titles = self._titles | new_titles
+                self._row_count += len(values)
+                self._loaded_at = time.time()
+
+            logging.info(f"Índice de títulos actualizado: {len(values)} filas nuevas, {len(self._titles)} títulos")
+            return len(values)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refrescando índice de títulos: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='title-index-refresh', daemon=True).start()
+
+    def invalidate(self):
+        """Descarta el índice; la próxima consulta recarga la hoja completa."""
+        with self._refresh_lock, self._lock:
+            self._titles = set()
+            self._fuzzy = self._fuzzy_factory() if self._fuzzy_factory else None
+            self._col_index = None
+            self._row_count = 0
+            self._loaded_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'titles': len(self._titles),
+                'rows': self._row_count,
+                'age': round(time.time() - self._loaded_at, 1) if self._loaded_at else None,
+                'ttl': self.ttl,
+                'refreshing': self._refreshing,
+            }
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(ROOT, 'bench')
+
+# Permitir `pytest` desde cualquier directorio sin instalar el paquete, y
+# usar las capturas y el servidor de bench/ como fixtures
+for path in (BENCH, ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pytest  # noqa: E402
+
+from sheets import SheetSource  # noqa: E402
+
+
+class InMemorySheetSource(SheetSource):
+    """Hoja falsa en memoria: cuenta las llamadas y omite las celdas vacías del final."""
+
+    def __init__(self, header, rows=None):
+        self._header = list(header)
+        self.rows = [list(row) for row in rows or []]
+        self.calls = 0
+
+    def append(self, row):
+        self.rows.append(list(row))
+
+    def header(self):
+        self.calls += 1
+        return list(self._header)
+
+    def column_values(self, col_index, start_row):
+        self.calls += 1
+        values = [row[col_index - 1] if len(row) >= col_index else '' for row in self.rows[start_row - 2:]]
+        # Igual que la API: sin celdas vacías al final
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """El módulo app, importado una vez sin trabajos, caché ni precalentamiento."""
+    workdir = tmp_path_factory.mktemp('app')
+    os.environ.update({
+        'JOB_WORKERS': '0',
+        'PREWARM_STEPS': '',
+        'RESULT_CACHE_BACKEND': 'none',
+        'JOBS_DB_PATH': str(workdir / 'jobs.sqlite3'),
+        'DISCOVERY_DB_PATH': str(workdir / 'discovery.sqlite3'),
+        'ARTICLE_STORE_PATH': str(workdir / 'articles.sqlite3'),
+    })
+    import app
+    yield app
+    app.DRIVER_POOL.close()
+
+
+class _RouteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        route = self.server.routes.get(self.path)
+        if route is None:
+            self.send_error(404)
+            return
+        status, headers, body = route(self.headers) if callable(route) else route
+        self.server.requests.append((self.path, dict(self.headers)))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Servidor HTTP local: `routes[ruta]` es (estado, headers, cuerpo) o una función de los headers."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RouteHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = lambda path: f"http://127.0.0.1:{server.server_address[1]}{path}"
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,53 @@
+import pytest
+
+from article_store import ArticleStore
+
+BODY = (
+    "El congreso del estado aprobó este martes la reforma al reglamento de transporte público, que obliga "
+    "a las concesionarias a publicar sus tarifas y horarios en línea. La iniciativa fue presentada hace "
+    "seis meses por una coalición de diputados locales y recibió veintiocho votos a favor, cuatro en contra "
+    "y dos abstenciones. Según la secretaría de movilidad, cerca de un millón de personas usan a diario las "
+    "rutas urbanas de la capital, muchas de ellas con unidades de más de quince años de antigüedad. Los "
+    "transportistas advirtieron que el cambio elevará sus costos de operación y pidieron un periodo de "
+    "transición de al menos un año antes de aplicar sanciones. Organizaciones de usuarios celebraron la "
+    "aprobación, aunque señalaron que falta un programa de renovación de la flota y de capacitación de los "
+    "conductores. La reforma entrará en vigor al día siguiente de su publicación en el periódico oficial."
+)
+# Una frase agregada al final: pocos bits de diferencia en la huella
+EDITED = BODY + ' Fin.'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / 'articles.sqlite3'))
+
+
+def test_copy_from_another_url_is_a_duplicate(store):
+    original, _ = store.save('https://www.proceso.com.mx/nota', 'www.proceso.com.mx', 'Nota', BODY)
+    copy, duplicate = store.save('https://www.debate.com.mx/nota', 'www.debate.com.mx', 'Nota', BODY)
+    assert copy != original
+    assert duplicate['id'] == original and duplicate['distance'] == 0
+
+    _, duplicate = store.save('https://lasillarota.com/nota', 'lasillarota.com', 'Nota', EDITED)
+    assert duplicate['id'] == original
+
+
+def test_edited_original_is_not_a_duplicate_of_itself(store):
+    original, _ = store.save('https://www.proceso.com.mx/nota', 'www.proceso.com.mx', 'Nota', BODY)
+    store.save('https://www.debate.com.mx/nota', 'www.debate.com.mx', 'Nota', BODY)
+
+    # Su copia es el candidato más parecido, y la copia apunta al original
+    article_id, duplicate = store.save('https://www.proceso.com.mx/nota', 'www.proceso.com.mx', 'Nota', EDITED)
+    assert article_id == original
+    assert duplicate is None
+    assert store.get(original)['duplicate_of'] is None
+
+
+def test_original_matching_its_copy_exactly_is_not_a_duplicate_of_itself(store):
+    original, _ = store.save('https://www.proceso.com.mx/nota', 'www.proceso.com.mx', 'Nota', BODY)
+    store.save('https://www.debate.com.mx/nota', 'www.debate.com.mx', 'Nota', EDITED)
+
+    article_id, duplicate = store.save('https://www.proceso.com.mx/nota', 'www.proceso.com.mx', 'Nota', EDITED)
+    assert article_id == original
+    assert duplicate is None
+    assert store.get(original)['duplicate_of'] is None
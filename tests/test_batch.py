@@ -0,0 +1,112 @@
+import time
+import itertools
+import threading
+from collections import Counter, defaultdict
+
+import pytest
+
+from batch import DomainLimiter, SlotTimeout, run_batch
+
+
+def test_slot_wait_is_bounded():
+    limiter = DomainLimiter(default_limit=1)
+    with limiter.slot('a.example'):
+        started = time.monotonic()
+        with pytest.raises(SlotTimeout):
+            with limiter.slot('a.example', timeout=0.1):
+                pass
+        assert time.monotonic() - started < 1
+        # Otro dominio no comparte el límite
+        with limiter.slot('b.example', timeout=0.1):
+            pass
+    # El lugar se libera al salir, aunque la espera anterior fallara
+    with limiter.slot('a.example', timeout=0.1):
+        pass
+
+
+def domain_of(url):
+    return url.split('/')[2]
+
+
+def test_results_keep_the_input_order():
+    # Las primeras URLs tardan más: terminan después que las últimas
+    urls = [f"https://sitio-{i}.example/nota" for i in range(6)]
+    delays = {url: 0.05 * (len(urls) - i) for i, url in enumerate(urls)}
+
+    def worker(url):
+        time.sleep(delays[url])
+        return url.upper()
+
+    outcomes = run_batch(urls, worker, domain_of, DomainLimiter(), max_workers=6)
+    assert [outcome['result'] for outcome in outcomes] == [url.upper() for url in urls]
+    assert all(outcome['error'] is None for outcome in outcomes)
+
+
+def test_errors_are_reported_per_url():
+    def worker(url):
+        if 'mala' in url:
+            raise ValueError('sin cuerpo')
+        return url
+
+    outcomes = run_batch(['https://a.example/buena', 'https://a.example/mala'], worker, domain_of, DomainLimiter())
+    assert outcomes[0]['result'] == 'https://a.example/buena'
+    assert outcomes[1] == {'result': None, 'error': 'sin cuerpo', 'elapsed': None}
+
+
+def test_slow_urls_time_out_without_blocking_the_batch():
+    release = threading.Event()
+
+    def worker(url):
+        if 'lenta' in url:
+            release.wait(5)
+        return url
+
+    started = time.monotonic()
+    outcomes = run_batch(['https://a.example/lenta', 'https://b.example/rapida'], worker, domain_of,
+                         DomainLimiter(), timeout=0.2)
+    release.set()
+    assert time.monotonic() - started < 2
+    assert outcomes[0]['result'] is None and outcomes[0]['error'] == 'No terminó en 0.2s'
+    assert outcomes[1]['result'] == 'https://b.example/rapida'
+
+
+def test_per_domain_limit_is_respected():
+    active = Counter()
+    peak = Counter()
+    lock = threading.Lock()
+
+    def worker(url):
+        domain = domain_of(url)
+        with lock:
+            active[domain] += 1
+            peak[domain] = max(peak[domain], active[domain])
+        time.sleep(0.05)
+        with lock:
+            active[domain] -= 1
+        return url
+
+    urls = [f"https://{domain}/{i}" for domain in ('a.example', 'b.example') for i in range(4)]
+    run_batch(urls, worker, domain_of, DomainLimiter(default_limit=2, limits={'b.example': 1}), max_workers=8)
+    assert peak == {'a.example': 2, 'b.example': 1}
+
+
+def test_stats_while_batch_threads_record_tiers(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'TIER_STATS', defaultdict(Counter))
+    stop = threading.Event()
+
+    def record():
+        for i in itertools.count():
+            if stop.is_set():
+                return
+            app_module.record_tier(f"sitio-{i}.example", 'http')
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    try:
+        client = app_module.app.test_client()
+        statuses = [client.get('/stats').status_code for _ in range(20)]
+    finally:
+        stop.set()
+        thread.join()
+    assert statuses == [200] * 20
+    assert app_module.tier_stats()['sitio-0.example'] == {'http': 1}
@@ -0,0 +1,147 @@
+import time
+
+import pytest
+
+from cache import MemoryCache, ResultCache, SQLiteCache, normalize_url, url_key
+from http_fetcher import is_not_modified
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://WWW.Proceso.com.mx:443/nota#comentarios', 'https://www.proceso.com.mx/nota'),
+    ('http://example.com:8080', 'http://example.com:8080/'),
+    ('https://example.com/nota?utm_source=tw&b=2&fbclid=x&a=1', 'https://example.com/nota?a=1&b=2'),
+    ('https://example.com/nota?vacio=', 'https://example.com/nota?vacio='),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_url_key_ignores_the_scheme():
+    assert url_key('http://example.com/nota') == url_key('https://example.com/nota') == 'example.com/nota'
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_backend(request, tmp_path):
+    def make(**limits):
+        if request.param == 'memory':
+            return MemoryCache(**limits)
+        return SQLiteCache(str(tmp_path / 'cache.sqlite3'), **limits)
+    return make
+
+
+def test_least_recently_used_entry_is_evicted(make_backend):
+    cache = make_backend(max_entries=2)
+    cache.set('a', {'n': 1})
+    cache.set('b', {'n': 2})
+    time.sleep(0.01)
+    assert cache.get('a')['value'] == {'n': 1}
+    time.sleep(0.01)
+    cache.set('c', {'n': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_entries_are_evicted_to_fit_the_byte_limit(make_backend):
+    cache = make_backend(max_bytes=100)
+    cache.set('a', {'texto': 'x' * 60})
+    cache.set('b', {'texto': 'y' * 60})
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] <= 100
+
+
+def test_replacing_an_entry_keeps_the_byte_count(make_backend):
+    cache = make_backend()
+    cache.set('a', {'texto': 'x' * 10}, etag='"v1"')
+    cache.set('a', {'texto': 'x' * 10}, etag='"v2"')
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == cache.get('a')['size']
+    assert cache.get('a')['etag'] == '"v2"'
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteCache(path).set('a', {'n': 1}, last_modified='Tue, 13 Oct 2026 10:00:00 GMT')
+    entry = SQLiteCache(path).get('a')
+    assert entry['value'] == {'n': 1}
+    assert entry['last_modified'] == 'Tue, 13 Oct 2026 10:00:00 GMT'
+
+
+def test_result_cache_freshness():
+    cache = ResultCache(MemoryCache(), ttl=60)
+    key, entry, age = cache.lookup('https://example.com/nota?utm_medium=x')
+    assert (key, entry, age) == ('https://example.com/nota', None, None)
+
+    cache.store(key, {'title': 'Nota'})
+    _, entry, age = cache.lookup('https://example.com/nota')
+    assert entry['value'] == {'title': 'Nota'}
+    assert cache.is_fresh(age)
+    assert not cache.is_fresh(61)
+    assert not cache.is_fresh(None)
+
+
+def etag_route(etag):
+    def route(headers):
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Content-Type': 'text/html'}, b'<html><body>nueva</body></html>'
+    return route
+
+
+def test_is_not_modified_sends_the_validators(http_server):
+    http_server.routes['/nota'] = etag_route('"v1"')
+    assert is_not_modified(http_server.url('/nota'), etag='"v1"')
+    assert not is_not_modified(http_server.url('/nota'), etag='"v0"')
+
+
+def test_is_not_modified_without_validators_skips_the_request(http_server):
+    assert not is_not_modified(http_server.url('/nota'))
+    assert http_server.requests == []
+
+
+@pytest.fixture
+def fetched():
+    return []
+
+
+@pytest.fixture
+def cached_app(app_module, monkeypatch, fetched):
+    def fetch(url, max_retries=2, wait_timeout=None):
+        fetched.append(url)
+        return {'url': url, 'title': 'Nota', 'etag': '"v1"', 'last_modified': None}
+
+    monkeypatch.setattr(app_module, 'RESULT_CACHE', ResultCache(MemoryCache(), ttl=60))
+    monkeypatch.setattr(app_module, 'fetch', fetch)
+    monkeypatch.setattr(app_module, 'persist', lambda url, result: result)
+    return app_module
+
+
+def test_fresh_entry_is_a_hit(cached_app, fetched, http_server):
+    url = http_server.url('/nota')
+    assert cached_app.scrape_article(url)['cache']['status'] == 'miss'
+    assert cached_app.scrape_article(url)['cache']['status'] == 'hit'
+    assert fetched == [url]
+
+
+def test_stale_entry_is_revalidated_with_its_etag(cached_app, fetched, http_server, monkeypatch):
+    http_server.routes['/nota'] = etag_route('"v1"')
+    url = http_server.url('/nota')
+    cached_app.scrape_article(url)
+    monkeypatch.setattr(cached_app.RESULT_CACHE, 'ttl', 0)
+
+    result = cached_app.scrape_article(url)
+    assert result['cache'] == {'status': 'revalidated', 'age': 0.0}
+    assert http_server.requests[-1][1]['If-None-Match'] == '"v1"'
+    assert fetched == [url]
+
+
+def test_changed_page_is_scraped_again(cached_app, fetched, http_server, monkeypatch):
+    http_server.routes['/nota'] = etag_route('"v2"')
+    url = http_server.url('/nota')
+    cached_app.scrape_article(url)
+    monkeypatch.setattr(cached_app.RESULT_CACHE, 'ttl', 0)
+
+    assert cached_app.scrape_article(url)['cache']['status'] == 'miss'
+    assert fetched == [url, url]
+    assert cached_app.RESULT_CACHE.stats()['stale'] == 1
@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+from collections import Counter
+
+import pytest
+
+import http_fetcher
+from conftest import ROOT
+from common import load_snapshots
+from discovery import Discovery, SeenStore
+from domain_config import DOMAIN_CONFIG
+from snapshot_server import SnapshotHandler, add_feed_entry, start_server
+
+
+@pytest.fixture(scope='module')
+def proxy_url():
+    # Cada host del servidor anuncia sus capturas en robots.txt, RSS y news sitemap
+    server, url = start_server()
+    yield url
+    server.shutdown()
+
+
+class Jobs(dict):
+    """Trabajos encolados por id; con `gate` cerrado el encolado espera."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.gate.set()
+
+
+@pytest.fixture
+def jobs():
+    return Jobs()
+
+
+@pytest.fixture
+def discovery(proxy_url, jobs, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_fetcher.SESSION, 'proxies', {'http': proxy_url, 'https': proxy_url})
+    # Lo que publique cada prueba no se ve en las demás
+    monkeypatch.setattr(SnapshotHandler, 'feed_entries',
+                        {host: list(entries) for host, entries in SnapshotHandler.feed_entries.items()})
+
+    def submit(urls):
+        jobs.gate.wait(5)
+        job_id = f"job-{len(jobs) + 1}"
+        jobs[job_id] = urls
+        return job_id
+
+    discovery = Discovery(
+        SeenStore(str(tmp_path / 'discovery.sqlite3')),
+        {domain: config for domain, config in DOMAIN_CONFIG.items() if domain != 'default' and config.get('discovery', True)},
+        submit,
+        scheme='http'
+    )
+    yield discovery
+    jobs.gate.set()
+    discovery.stop()
+
+
+def test_first_poll_enqueues_every_snapshot(discovery, jobs):
+    per_host = Counter(host for _, host, _ in load_snapshots())
+    for summary in discovery.poll_all():
+        assert summary['bootstrap']
+        assert len(jobs[summary['job_id']]) == per_host[summary['domain']], summary
+
+
+def test_second_poll_is_conditional(discovery):
+    discovery.poll_all()
+    second = discovery.poll_all()
+    assert all(summary['new'] == 0 for summary in second)
+    # Feed y news sitemap responden 304 en cada sitio
+    assert discovery.stats()['not_modified'] >= 2 * len(discovery.domains)
+
+
+def test_published_article_is_enqueued_once(discovery, jobs):
+    discovery.poll_all()
+    domain = 'www.proceso.com.mx'
+    add_feed_entry(domain, 'nota-nueva', 'Nota nueva')
+
+    new = {summary['domain']: jobs.get(summary['job_id']) for summary in discovery.poll_all() if summary['enqueued']}
+    assert new == {domain: [f"http://{domain}/nota-nueva"]}
+    assert discovery.poll(domain)['new'] == 0
+
+
+def test_poll_limit_defers_the_rest_and_skips_old_articles(discovery, jobs):
+    domain = 'www.proceso.com.mx'
+    discovery.poll(domain)
+    discovery.max_new_per_poll = 1
+    add_feed_entry(domain, 'nota-a', 'Nota A', time.time() - 30)
+    add_feed_entry(domain, 'nota-b', 'Nota B')
+    add_feed_entry(domain, 'nota-vieja', 'Nota vieja', time.time() - discovery.max_age - 3600)
+
+    summary = discovery.poll(domain)
+    assert jobs.get(summary['job_id']) == [f"http://{domain}/nota-b"]
+    assert summary['deferred'] == 1
+    assert summary['skipped_old'] == 1
+
+    summary = discovery.poll(domain)
+    assert jobs.get(summary['job_id']) == [f"http://{domain}/nota-a"]
+    assert discovery.poll(domain)['new'] == 0
+
+
+def test_poll_all_request_runs_in_the_background(discovery, jobs):
+    jobs.gate.clear()
+    assert discovery.request_poll_all()
+    # Mientras sigue en curso, otro pedido no lanza un segundo sondeo
+    assert not discovery.request_poll_all()
+    assert discovery.stats()['poll_all_pending']
+    jobs.gate.set()
+
+    deadline = time.time() + 30
+    while discovery.stats()['poll_all_pending'] and time.time() < deadline:
+        time.sleep(0.05)
+    stats = discovery.stats()
+    assert not stats['poll_all_pending']
+    assert stats['polls'] == len(discovery.domains)
+    assert len(jobs) == len(discovery.domains)
+
+
+def test_scrape_worker_does_not_start_discovery(tmp_path):
+    # El worker hereda el entorno de la API, con el descubrimiento encendido
+    env = {
+        **os.environ,
+        'DISCOVERY_ENABLED': '1',
+        'JOBS_DB_PATH': str(tmp_path / 'jobs.sqlite3'),
+        'DISCOVERY_DB_PATH': str(tmp_path / 'discovery.sqlite3'),
+    }
+    code = "import scrape_worker, app; print(app.DISCOVERY.stats()['running'])"
+    completed = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == 'False'
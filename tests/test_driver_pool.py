@@ -0,0 +1,243 @@
+import time
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import driver_pool
+from driver_pool import DriverPool, PoolExhausted
+
+
+class FakeDriver:
+    """Lo que DriverPool usa de un driver de Chrome, sin navegador."""
+
+    def __init__(self):
+        self.window_handles = ['main']
+        self.current_url = 'about:blank'
+        self.cdp = []
+        self.healthy = True
+        self.heap_bytes = 0
+        self.rss_mb = 0
+        self.quit_called = False
+        self.switch_to = self
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise WebDriverException('chrome not reachable')
+        if script == 'return 1':
+            return 1
+        return self.heap_bytes
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp.append(command)
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    """Lanza FakeDrivers y recuerda cada uno."""
+
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        self.drivers.append(FakeDriver())
+        return self.drivers[-1]
+
+
+@pytest.fixture
+def factory():
+    return Factory()
+
+
+@pytest.fixture
+def make_pool(factory):
+    pools = []
+
+    def make(**kwargs):
+        pools.append(DriverPool(factory, **kwargs))
+        return pools[-1]
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_lease_reuses_the_same_browser(make_pool):
+    pool = make_pool(size=2)
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is second
+    assert pool.stats()['launched'] == 1
+    assert pool.stats()['leases'] == 2
+
+
+def test_release_resets_the_browser(make_pool):
+    pool = make_pool()
+    with pool.lease() as driver:
+        driver.get('https://www.proceso.com.mx/nota')
+        driver.current_url = 'https://www.proceso.com.mx/nota'
+        driver.window_handles.append('popup')
+    assert driver.window_handles == ['main']
+    assert driver.cdp == ['Storage.clearDataForOrigin', 'Network.clearBrowserCookies']
+    assert driver.current_url == 'about:blank'
+
+
+def test_lease_waits_at_most_the_timeout(make_pool):
+    pool = make_pool(size=1)
+    with pool.lease():
+        with pytest.raises(PoolExhausted):
+            with pool.lease(timeout=0.05):
+                pass
+    assert pool.stats()['lease_timeouts'] == 1
+
+
+def test_released_browser_wakes_a_waiting_lease(make_pool):
+    pool = make_pool(size=1)
+    leased = threading.Event()
+    got = []
+
+    def wait_for_browser():
+        leased.wait()
+        with pool.lease(timeout=5) as driver:
+            got.append(driver)
+
+    thread = threading.Thread(target=wait_for_browser)
+    thread.start()
+    with pool.lease() as driver:
+        leased.set()
+    thread.join(5)
+    assert got == [driver]
+
+
+def test_browser_is_recycled_after_max_uses(make_pool, factory):
+    pool = make_pool(max_uses=2)
+    for _ in range(3):
+        with pool.lease():
+            pass
+    first, second = factory.drivers
+    assert first.quit_called and not second.quit_called
+    assert pool.stats()['recycled'] == 1
+
+
+def test_browser_with_a_large_heap_is_recycled(make_pool):
+    pool = make_pool(max_heap_mb=256)
+    with pool.lease() as driver:
+        driver.heap_bytes = 300 * 1024 * 1024
+    assert driver.quit_called
+    assert pool.stats()['recycled'] == 1
+
+
+def test_webdriver_error_discards_the_browser_but_a_timeout_does_not(make_pool):
+    pool = make_pool()
+    with pytest.raises(TimeoutException):
+        with pool.lease() as driver:
+            raise TimeoutException('page load')
+    assert not driver.quit_called
+
+    with pytest.raises(WebDriverException):
+        with pool.lease() as same:
+            raise WebDriverException('tab crashed')
+    assert same is driver and driver.quit_called
+    assert pool.stats()['total'] == 0
+
+
+def test_unhealthy_idle_browser_is_replaced(make_pool):
+    pool = make_pool()
+    with pool.lease() as driver:
+        pass
+    driver.healthy = False
+    with pool.lease() as replacement:
+        pass
+    assert replacement is not driver and driver.quit_called
+    assert pool.stats()['discarded'] == 1
+
+
+def test_warm_launches_idle_browsers_up_to_the_size(make_pool, factory):
+    pool = make_pool(size=2)
+    pool.warm(5)
+    assert pool.stats()['idle'] == 2
+    assert len(factory.drivers) == 2
+
+
+@pytest.fixture
+def fake_rss(monkeypatch):
+    """sample_rss lee FakeDriver.rss_mb en vez del árbol de procesos."""
+    def sample_rss(pooled):
+        pooled.rss_mb = pooled.driver.rss_mb
+        return pooled.rss_mb
+
+    monkeypatch.setattr(driver_pool._PooledDriver, 'sample_rss', sample_rss)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'la condición no se cumplió a tiempo'
+        time.sleep(0.01)
+
+
+def test_browser_over_max_rss_is_recycled_on_release(make_pool, fake_rss):
+    pool = make_pool(max_rss_mb=200)
+    with pool.lease() as driver:
+        driver.rss_mb = 250
+    assert driver.quit_called
+    assert pool.stats()['rss_recycled'] == 1
+
+
+def test_watchdog_recycles_a_large_idle_browser(make_pool, factory, fake_rss):
+    pool = make_pool(size=2, max_rss_mb=200, watchdog_interval=0.01)
+    pool.warm(2)
+    factory.drivers[1].rss_mb = 250
+    pool.start_watchdog()
+
+    wait_for(lambda: pool.stats()['rss_recycled'] == 1)
+    assert [driver.quit_called for driver in factory.drivers] == [False, True]
+
+
+def test_watchdog_kills_a_leased_browser_over_the_kill_limit(make_pool, fake_rss):
+    pool = make_pool(kill_rss_mb=400, watchdog_interval=0.01)
+    pool.start_watchdog()
+    with pool.lease() as driver:
+        driver.rss_mb = 500
+        wait_for(lambda: pool.stats()['rss_killed'] == 1)
+    # Al devolverlo se descarta: Chrome ya no existe
+    assert driver.quit_called
+    assert pool.stats()['total'] == 0
+
+
+def test_memory_budget_frees_idle_browsers_first(make_pool, factory, fake_rss):
+    pool = make_pool(size=3, memory_budget_mb=350, watchdog_interval=0.01)
+    pool.warm(3)
+    for driver, rss in zip(factory.drivers, (100, 300, 200)):
+        driver.rss_mb = rss
+    pool.start_watchdog()
+
+    # Sale el más grande de los ociosos y con eso ya cabe
+    wait_for(lambda: pool.stats()['budget_enforced'] >= 1)
+    wait_for(lambda: pool.stats()['total'] == 2)
+    assert [driver.quit_called for driver in factory.drivers] == [False, True, False]
+    assert pool.stats()['rss_killed'] == 0
+
+
+def test_memory_budget_kills_leased_browsers_when_idle_ones_are_not_enough(make_pool, fake_rss):
+    pool = make_pool(size=2, memory_budget_mb=300, watchdog_interval=0.01)
+    with pool.lease() as first:
+        with pool.lease() as second:
+            first.rss_mb = 100
+            second.rss_mb = 400
+            pool.start_watchdog()
+            wait_for(lambda: pool.stats()['rss_killed'] == 1)
+    assert second.quit_called and not first.quit_called
@@ -0,0 +1,119 @@
+import pytest
+
+from domain_config import DOMAIN_CONFIG, domain_key, get_domain_config, resolve_domain
+from extractors import BODY_NOT_FOUND, Extractor, ExtractorRegistry, body_found, capped_text
+from metrics import FALLBACKS
+from parsing import parse_document
+
+
+@pytest.mark.parametrize('host, key', [
+    ('www.infobae.com', 'www.infobae.com'),
+    ('infobae.com', 'www.infobae.com'),
+    ('m.infobae.com', 'www.infobae.com'),
+    ('WWW.INFOBAE.COM:443', 'www.infobae.com'),
+    ('www.aristeguinoticias.com', 'aristeguinoticias.com'),
+    ('edicion.aristeguinoticias.com', 'aristeguinoticias.com'),
+    ('example.com', None),
+    ('com', None),
+    ('infobae.com.ar', None),
+])
+def test_resolve_domain(host, key):
+    assert resolve_domain(host) == key
+
+
+def test_unknown_host_uses_the_default_config():
+    assert domain_key('example.com') == 'default'
+    assert get_domain_config('example.com') is DOMAIN_CONFIG['default']
+
+
+def test_registry_compiles_each_extractor_once():
+    registry = ExtractorRegistry(DOMAIN_CONFIG)
+    assert registry.for_domain('m.infobae.com') is registry.for_domain('infobae.com')
+    assert registry.for_domain('example.com').key == 'default'
+
+
+def test_every_configured_site_compiles():
+    ExtractorRegistry(DOMAIN_CONFIG).compile_all()
+
+
+def fallback_count(key, part, selector):
+    selector = selector.replace('"', '\\"')
+    sample = f'scraper_fallback_selector_total{{domain="{key}",part="{part}",selector="{selector}"}} '
+    for line in FALLBACKS.render():
+        if line.startswith(sample):
+            return int(line[len(sample):])
+    return 0
+
+
+def test_prefix_and_body_with_strip_selectors():
+    extractor = Extractor('www.proceso.com.mx', DOMAIN_CONFIG['www.proceso.com.mx'])
+    soup = parse_document(
+        '<h1 class="titular">Titular</h1><strong class="bajada">La bajada.</strong>'
+        '<div class="cuerpo-nota" id="cuerpo-nota"><p>Uno </p>'
+        '<aside class="relacionadas con-foto linea-1078">Relacionada</aside><p>dos.</p></div>'
+    )
+    # text_separator '' pega los fragmentos, como en el código original
+    assert extractor.extract(soup) == ('Titular', 'La bajada. Unodos.')
+
+
+def test_title_and_body_fallbacks_are_counted():
+    extractor = Extractor('aristeguinoticias.com', DOMAIN_CONFIG['aristeguinoticias.com'])
+    soup = parse_document(
+        '<head><meta property="og:title" content="Del meta"></head>'
+        '<div class="contenido"><p>Cuerpo</p><div class="share">Compartir</div></div>'
+    )
+    title_before = fallback_count('aristeguinoticias.com', 'title', 'meta[property="og:title"]')
+    body_before = fallback_count('aristeguinoticias.com', 'body', 'div.contenido')
+
+    assert extractor.extract(soup) == ('Del meta', 'Cuerpo')
+    assert fallback_count('aristeguinoticias.com', 'title', 'meta[property="og:title"]') == title_before + 1
+    assert fallback_count('aristeguinoticias.com', 'body', 'div.contenido') == body_before + 1
+
+
+def test_paragraph_mode_joins_every_match():
+    extractor = Extractor('www.infobae.com', DOMAIN_CONFIG['www.infobae.com'])
+    paragraph = '<p class="paragraph" data-mrf-recirculation="Links inline">{}</p>'
+    soup = parse_document(
+        '<h1 class="article-headline">Nota</h1><div class="body-article">'
+        + paragraph.format('Primero.') + '<p class="paragraph">Fuera.</p>' + paragraph.format('Segundo.')
+        + '</div>'
+    )
+    assert extractor.extract(soup) == ('Nota', 'Primero. Segundo.')
+
+
+def test_missing_body_is_reported():
+    extractor = Extractor('lopezdoriga.com', DOMAIN_CONFIG['lopezdoriga.com'])
+    title, body = extractor.extract(parse_document('<p>Nada</p>'))
+    assert title == 'Título no encontrado'
+    assert body.startswith(BODY_NOT_FOUND)
+    assert not body_found(body)
+
+
+def test_long_body_is_truncated():
+    extractor = Extractor('lopezdoriga.com', DOMAIN_CONFIG['lopezdoriga.com'])
+    words = ' '.join(['palabra'] * 2000)
+    _, body = extractor.extract(parse_document(f'<div class="article-content">{words}</div>'), max_length=100)
+    assert body == words[:100] + '...'
+
+
+def test_unknown_body_mode_is_rejected():
+    with pytest.raises(ValueError):
+        Extractor('x', {**DOMAIN_CONFIG['default'], 'body_mode': 'tabla'})
+
+
+@pytest.mark.parametrize('key', ['lopezdoriga.com', 'www.infobae.com', 'www.excelsior.com.mx'])
+def test_early_stop_gives_the_same_truncated_body(key):
+    config = DOMAIN_CONFIG[key]
+    paragraph = '<p class="paragraph" data-mrf-recirculation="Links inline">{}</p>'
+    chunks = ''.join(paragraph.format(f'Frase   número {i}.\n') for i in range(400))
+    html = f'<div class="article-content body-article field-items">{chunks}</div>'
+
+    capped = Extractor(key, config).extract(parse_document(html), max_length=300)
+    uncapped = Extractor(key, config).extract(parse_document(html), max_length=10 ** 6)
+    assert capped[1] == uncapped[1][:300] + '...'
+
+
+def test_capped_text_stops_reading_after_the_limit():
+    node = parse_document('<div>' + '<p>palabra</p>' * 100 + '</div>').div
+    assert capped_text(node, ' ', 20) == 'palabra palabra palabra'
+    assert capped_text(node, ' ') == ' '.join(['palabra'] * 100)
@@ -0,0 +1,30 @@
+import json
+from itertools import product
+
+import pytest
+
+from common import load_snapshots
+from domain_config import DOMAIN_CONFIG
+from extractors import ExtractorRegistry
+from golden import GOLDEN_FILE
+from parsing import HTML_PARSERS, PARSE_MODES, LexborHTMLParser, parse_for_extraction
+
+SNAPSHOTS = load_snapshots()
+REGISTRY = ExtractorRegistry(DOMAIN_CONFIG)
+
+with open(GOLDEN_FILE, encoding='utf-8') as f:
+    GOLDEN = json.load(f)
+
+
+def test_every_snapshot_has_golden_output():
+    assert sorted(GOLDEN) == sorted(name for name, _, _ in SNAPSHOTS)
+
+
+@pytest.mark.parametrize('parser,mode', list(product(HTML_PARSERS, PARSE_MODES)))
+@pytest.mark.parametrize('name,host,html', SNAPSHOTS, ids=[name for name, _, _ in SNAPSHOTS])
+def test_backend_matches_golden(parser, mode, name, host, html):
+    if mode == 'subtree' and LexborHTMLParser is None:
+        pytest.skip('selectolax no está instalado')
+    extractor = REGISTRY.for_domain(host)
+    title, body = extractor.extract(parse_for_extraction(html, extractor.selectors, parser=parser, mode=mode))
+    assert {'title': title, 'body': body} == GOLDEN[name]
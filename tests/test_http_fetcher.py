@@ -0,0 +1,92 @@
+import pytest
+
+from http_fetcher import MAX_PAGE_BYTES, PageGone, fetch_conditional, fetch_html
+
+HTML = '<html><head><title>Nota</title></head><body><div class="nota"><p>Texto</p></div></body></html>'
+
+
+def html_route(body=HTML, status=200, content_type='text/html; charset=utf-8', **headers):
+    return status, {'Content-Type': content_type, **headers}, body.encode('utf-8') if isinstance(body, str) else body
+
+
+def test_html_page_with_validators(http_server):
+    http_server.routes['/nota'] = html_route(ETag='"v1"', **{'Last-Modified': 'Tue, 13 Oct 2026 10:00:00 GMT'})
+    page = fetch_html(http_server.url('/nota'))
+    assert page.html == HTML
+    assert page.etag == '"v1"'
+    assert page.last_modified == 'Tue, 13 Oct 2026 10:00:00 GMT'
+
+
+@pytest.mark.parametrize('status', [404, 410])
+def test_missing_page_raises_page_gone(http_server, status):
+    http_server.routes['/borrada'] = html_route(status=status)
+    with pytest.raises(PageGone) as raised:
+        fetch_html(http_server.url('/borrada'))
+    assert raised.value.status == status
+
+
+def test_other_errors_escalate_to_the_browser(http_server):
+    http_server.routes['/error'] = html_route(status=503)
+    assert fetch_html(http_server.url('/error')) is None
+
+
+def test_non_html_response_escalates(http_server):
+    http_server.routes['/api'] = html_route('{"a": 1}', content_type='application/json')
+    assert fetch_html(http_server.url('/api')) is None
+
+
+def test_large_page_is_capped(http_server):
+    body = '<html><body>' + 'x' * (MAX_PAGE_BYTES + 100 * 1024) + '</body></html>'
+    http_server.routes['/grande'] = html_route(body)
+    assert fetch_html(http_server.url('/grande')).html == body[:MAX_PAGE_BYTES]
+
+
+def test_conditional_fetch_honors_max_bytes(http_server):
+    http_server.routes['/feed.xml'] = html_route('<rss>' + 'x' * 1000 + '</rss>', content_type='application/rss+xml')
+    response = fetch_conditional(http_server.url('/feed.xml'), max_bytes=100)
+    assert len(response.content) == 100
+
+
+def test_unreachable_host_escalates():
+    assert fetch_html('http://127.0.0.1:9/nota') is None
+
+
+def test_meta_charset_is_honored(http_server):
+    body = '<html><head><meta charset="iso-8859-1"></head><body>Peña Nieto</body></html>'.encode('iso-8859-1')
+    http_server.routes['/latin1'] = html_route(body, content_type='text/html')
+    assert 'Peña Nieto' in fetch_html(http_server.url('/latin1')).html
+
+
+def test_fast_path_skips_the_browser(app_module, http_server, monkeypatch):
+    def no_browser(url, config):
+        raise AssertionError('no debía abrir el navegador')
+
+    monkeypatch.setattr(app_module, 'render_with_browser', no_browser)
+    http_server.routes['/nota'] = html_route(
+        '<html><head><title>Título</title></head><body><h1>Título</h1><article>Cuerpo de la nota.</article></body></html>'
+    )
+    result = app_module.fetch_article(http_server.url('/nota'))
+    assert result['tier'] == 'http'
+    assert result['title'] == 'Título'
+
+
+def test_missing_body_selector_escalates_to_the_browser(app_module, http_server, monkeypatch):
+    rendered = []
+
+    def browser(url, config):
+        rendered.append(url)
+        return '<html><body><h1>Renderizada</h1><article>Cuerpo armado con JavaScript.</article></body></html>', {}
+
+    monkeypatch.setattr(app_module, 'render_with_browser', browser)
+    http_server.routes['/spa'] = html_route('<html><body><div id="app"></div></body></html>')
+    result = app_module.fetch_article(http_server.url('/spa'))
+    assert rendered == [http_server.url('/spa')]
+    assert result['tier'] == 'browser'
+
+
+def test_gone_page_is_not_retried_in_the_browser(app_module, http_server, monkeypatch):
+    monkeypatch.setattr(app_module, 'render_with_browser', lambda url, config: pytest.fail('abrió el navegador'))
+    http_server.routes['/borrada'] = html_route(status=404)
+    result = app_module.fetch_article(http_server.url('/borrada'))
+    assert result['title'] == 'Error'
+    assert result['site_failure'] is False
@@ -0,0 +1,117 @@
+import time
+import sqlite3
+
+import pytest
+
+from jobs import JobQueue
+
+
+def wait_done(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while queue.status(job_id, include_results=False)['status'] != 'done' and time.time() < deadline:
+        time.sleep(0.02)
+    return queue.status(job_id)
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(worker, **kwargs):
+        queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), worker, poll_interval=0.05, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def test_failed_result_write_does_not_stop_the_worker(make_queue):
+    queue = make_queue(lambda url: {"url": url}, workers=1, lease_seconds=0.2)
+    finish = queue._finish
+    failures = []
+
+    def flaky_finish(conn, row, **kwargs):
+        if not failures:
+            failures.append(row['url'])
+            raise sqlite3.OperationalError('database is locked')
+        finish(conn, row, **kwargs)
+
+    queue._finish = flaky_finish
+    queue.start()
+    job_id = queue.submit(['https://a.example/1', 'https://a.example/2'])
+
+    # El primer ítem se vuelve a reclamar al vencer su lease
+    status = wait_done(queue, job_id)
+    assert failures == ['https://a.example/1']
+    assert status['counts'] == {'done': 2}
+    assert [item['result']['url'] for item in status['results']] == ['https://a.example/1', 'https://a.example/2']
+
+
+def test_items_are_processed_in_submission_order(make_queue):
+    seen = []
+    queue = make_queue(lambda url: seen.append(url) or {"url": url}, workers=1)
+    first = queue.submit(['https://a.example/1', 'https://a.example/2'])
+    second = queue.submit(['https://b.example/1'])
+    queue.start()
+
+    assert wait_done(queue, first)['counts'] == {'done': 2}
+    assert wait_done(queue, second)['counts'] == {'done': 1}
+    assert seen == ['https://a.example/1', 'https://a.example/2', 'https://b.example/1']
+
+
+def test_worker_errors_are_recorded_per_item(make_queue):
+    def worker(url):
+        if url.endswith('mala'):
+            raise ValueError('sin cuerpo')
+        return {"url": url}
+
+    queue = make_queue(worker, workers=1)
+    queue.start()
+    status = wait_done(queue, queue.submit(['https://a.example/buena', 'https://a.example/mala']))
+    assert status['counts'] == {'done': 1, 'error': 1}
+    assert status['results'][1]['status'] == 'error'
+    assert status['results'][1]['error'] == 'sin cuerpo'
+
+
+def test_claim_skips_items_with_a_live_lease(make_queue):
+    queue = make_queue(None, workers=0, lease_seconds=60)
+    queue.submit(['https://a.example/1', 'https://a.example/2'])
+    conn = queue._connect()
+    try:
+        assert queue._claim(conn)['position'] == 0
+        assert queue._claim(conn)['position'] == 1
+        assert queue._claim(conn) is None
+    finally:
+        conn.close()
+
+
+def test_expired_lease_is_claimed_again(make_queue):
+    # Un proceso que murió con el ítem reclamado (p. ej. reinicio de gunicorn)
+    dead = make_queue(None, workers=0, lease_seconds=0.1)
+    job_id = dead.submit(['https://a.example/1'])
+    conn = dead._connect()
+    try:
+        assert dead._claim(conn) is not None
+    finally:
+        conn.close()
+
+    queue = make_queue(lambda url: {"url": url}, workers=1, lease_seconds=0.1)
+    queue.start()
+    status = wait_done(queue, job_id)
+    assert status['counts'] == {'done': 1}
+
+
+def test_stream_yields_each_result_then_the_summary(make_queue):
+    queue = make_queue(lambda url: {"url": url}, workers=2)
+    job_id = queue.submit(['https://a.example/1', 'https://a.example/2', 'https://a.example/3'])
+    queue.start()
+
+    items = list(queue.stream(job_id, poll_interval=0.02))
+    assert sorted(item['position'] for item in items[:-1]) == [0, 1, 2]
+    assert items[-1]['status'] == 'done' and items[-1]['total'] == 3
+
+
+def test_unknown_job_has_no_status(make_queue):
+    assert make_queue(None, workers=0).status('no-existe') is None
@@ -0,0 +1,117 @@
+import json
+import time
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry, collect_timings, span
+
+
+@pytest.fixture
+def counter():
+    return Counter('test_total', 'Contador de prueba', ['domain'])
+
+
+@pytest.fixture
+def histogram():
+    return Histogram('test_seconds', 'Duraciones', ['stage'], buckets=(0.1, 1))
+
+
+@pytest.fixture
+def registry(counter, histogram):
+    registry = Registry()
+    registry.register(counter)
+    registry.register(histogram)
+    return registry
+
+
+def test_counter_render(registry, counter):
+    counter.inc(domain='b.com')
+    counter.inc(2, domain='a.com')
+    assert registry.render() == (
+        '# HELP test_total Contador de prueba\n'
+        '# TYPE test_total counter\n'
+        'test_total{domain="a.com"} 2\n'
+        'test_total{domain="b.com"} 1\n'
+        '# HELP test_seconds Duraciones\n'
+        '# TYPE test_seconds histogram\n'
+    )
+
+
+def test_histogram_render_is_cumulative(histogram):
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, stage='parse')
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{stage="parse",le="0.1"} 2',
+        'test_seconds_bucket{stage="parse",le="1"} 3',
+        'test_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'test_seconds_sum{stage="parse"} 3.65',
+        'test_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter('test_total', 'Contador', ['selector'])
+    counter.inc(selector='meta[property="og:title"]\\\n')
+    assert counter.render()[2] == 'test_total{selector="meta[property=\\"og:title\\"]\\\\\\n"} 1'
+
+
+def test_wrong_labels_are_rejected(counter):
+    with pytest.raises(ValueError):
+        counter.inc(dominio='a.com')
+
+
+def test_gauge_function_is_read_on_render():
+    values = iter([3, 5])
+    gauge = Gauge('test_active', 'Activos', function=lambda: next(values))
+    assert gauge.render()[2] == 'test_active 3'
+    assert gauge.render()[2] == 'test_active 5'
+    # Si la función falla la métrica queda sin muestras
+    assert gauge.render()[2:] == []
+
+
+def test_drain_and_merge_move_values_between_registries(registry, counter):
+    worker = Registry()
+    worker.register(Counter('test_total', 'Contador de prueba', ['domain'])).inc(domain='a.com')
+    worker.register(Histogram('test_seconds', 'Duraciones', ['stage'], buckets=(0.1, 1))).observe(0.5, stage='load')
+    worker.register(Gauge('test_active', 'Activos')).set(4)
+    counter.inc(domain='a.com')
+
+    drained = worker.drain()
+    # Los gauges no viajan y lo drenado se reinicia en el worker
+    assert set(drained) == {'test_total', 'test_seconds'}
+    assert worker.drain() == {}
+
+    registry.merge(drained)
+    registry.merge({'desconocida_total': [[['x'], 1]]})
+    assert 'test_total{domain="a.com"} 2' in registry.render()
+    assert 'test_seconds_count{stage="load"} 1' in registry.render()
+
+
+def test_drained_values_survive_a_json_round_trip(registry, histogram):
+    histogram.observe(0.5, stage='load')
+    drained = json.loads(json.dumps(registry.drain()))
+    registry.merge(drained)
+    registry.merge(drained)
+    assert 'test_seconds_count{stage="load"} 2' in registry.render()
+
+
+def test_collect_timings_sums_repeated_stages():
+    with collect_timings() as timings:
+        with span('load'):
+            time.sleep(0.01)
+        with span('load'):
+            time.sleep(0.01)
+        with pytest.raises(RuntimeError):
+            with span('parse'):
+                raise RuntimeError('falló el parseo')
+    assert set(timings) == {'load', 'parse', 'total'}
+    assert timings['load'] >= 0.02
+    assert timings['total'] >= timings['load']
+
+
+def test_spans_outside_collect_timings_are_not_collected():
+    with span('fuera'):
+        pass
+    with collect_timings() as timings:
+        pass
+    assert set(timings) == {'total'}
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+import readiness
+from readiness import DOM_SIGNATURE_JS, NETWORK_SIGNATURE_JS, wait_until_ready
+
+
+class FakePage:
+    """Driver cuyo selector aparece a los `appears_after` segundos.
+
+    Las firmas de DOM y red salen de `signatures` (la última se repite).
+    """
+
+    def __init__(self, appears_after=0.0, signatures=None):
+        self.loaded_at = time.monotonic()
+        self.appears_after = appears_after
+        self.signatures = list(signatures or [[1, 0]])
+        self.scripts = []
+
+    def find_element(self, by, value):
+        if time.monotonic() - self.loaded_at < self.appears_after:
+            raise NoSuchElementException(value)
+        return object()
+
+    def execute_script(self, script):
+        self.scripts.append(script)
+        return self.signatures.pop(0) if len(self.signatures) > 1 else self.signatures[0]
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(readiness, 'POLL_INTERVAL', 0.01)
+
+
+def test_selector_strategy_returns_once_the_selector_appears():
+    started = time.monotonic()
+    assert wait_until_ready(FakePage(appears_after=0.1), {'body_selector': 'div.nota', 'wait_time': 5})
+    assert 0.1 <= time.monotonic() - started < 2
+
+
+def test_missing_selector_gives_up_at_wait_time():
+    started = time.monotonic()
+    assert not wait_until_ready(FakePage(appears_after=60), {'body_selector': 'div.nota', 'wait_time': 0.2})
+    assert time.monotonic() - started < 2
+
+
+def test_dom_stable_waits_until_the_dom_stops_changing():
+    page = FakePage(signatures=[[10, 100], [20, 400], [30, 900], [30, 900]])
+    config = {'body_selector': 'div.nota', 'wait_strategy': 'dom_stable', 'wait_quiet': 0.05, 'wait_time': 5}
+    assert wait_until_ready(page, config)
+    assert page.scripts.count(DOM_SIGNATURE_JS) >= 4
+
+
+def test_network_idle_needs_a_complete_document():
+    config = {'body_selector': 'div.nota', 'wait_strategy': 'network_idle', 'wait_quiet': 0.05, 'wait_time': 0.3}
+    assert not wait_until_ready(FakePage(signatures=[[5, 'interactive']]), config)
+
+    page = FakePage(signatures=[[5, 'interactive'], [8, 'complete']])
+    assert wait_until_ready(page, {**config, 'wait_time': 5})
+    assert set(page.scripts) == {NETWORK_SIGNATURE_JS}
+
+
+def test_wait_selector_overrides_the_body_selector():
+    class OnlyHeadline(FakePage):
+        def find_element(self, by, value):
+            if value != 'h1.titular':
+                raise NoSuchElementException(value)
+            return object()
+
+    config = {'body_selector': 'div.nota', 'wait_selector': 'h1.titular', 'wait_time': 0.3}
+    assert wait_until_ready(OnlyHeadline(), config)
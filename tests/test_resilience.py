@@ -0,0 +1,150 @@
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from http_fetcher import PageGone
+from resilience import CircuitBreaker, backoff_delay, classify_error
+
+
+@pytest.mark.parametrize('exc, expected', [
+    (TimeoutException('timeout'), (True, True)),
+    (WebDriverException('unknown error: net::ERR_CONNECTION_RESET'), (True, True)),
+    (WebDriverException('unknown error: net::ERR_NAME_NOT_RESOLVED'), (False, True)),
+    (WebDriverException('unknown error: net::ERR_CONNECTION_REFUSED'), (False, True)),
+    (WebDriverException('unknown error: net::ERR_CERT_DATE_INVALID'), (False, False)),
+    (WebDriverException('invalid session id'), (True, False)),
+    (PageGone('https://example.com/nota', 404), (False, False)),
+    (ValueError('bug de extracción'), (False, False)),
+])
+def test_classify_error(exc, expected):
+    assert classify_error(exc) == expected
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=1, cap=8) <= min(8, 2 ** attempt)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    breaker.record('a.com', False)
+    breaker.record('a.com', False)
+    breaker.record('a.com', True)
+    breaker.record('a.com', False)
+    breaker.record('a.com', False)
+    assert breaker.allow('a.com')
+
+    breaker.record('a.com', False)
+    assert not breaker.allow('a.com')
+    assert breaker.allow('b.com')
+    assert breaker.open_count() == 1
+    assert breaker.states()['a.com']['rejected'] == 1
+    assert 59 < breaker.retry_in('a.com') <= 60
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record('a.com', False)
+    assert not breaker.allow('a.com')
+    time.sleep(0.06)
+
+    assert breaker.allow('a.com')
+    assert breaker.states()['a.com']['state'] == 'half_open'
+    assert not breaker.allow('a.com')
+
+    breaker.record('a.com', True)
+    assert breaker.states() == {}
+    assert breaker.allow('a.com')
+
+
+def test_failed_probe_doubles_the_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05, max_cooldown=0.08)
+    breaker.record('a.com', False)
+    time.sleep(0.06)
+    assert breaker.allow('a.com')
+    breaker.record('a.com', False)
+    assert breaker.states()['a.com']['state'] == 'open'
+    assert 0.07 < breaker.retry_in('a.com') <= 0.08
+
+
+def test_neutral_result_frees_the_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record('a.com', False)
+    time.sleep(0.06)
+    assert breaker.allow('a.com')
+    breaker.record('a.com', None)
+    assert breaker.allow('a.com')
+
+
+# aristeguinoticias.com tiene 'requires_js': va directo a Selenium, con wait_time 20
+JS_URL = 'https://aristeguinoticias.com/nota'
+
+
+class FakeBrowser:
+    """render_with_browser que falla con los errores de `errors`, en orden (el último se repite)."""
+
+    def __init__(self):
+        self.calls = []
+        self.errors = [WebDriverException('unknown error: net::ERR_CONNECTION_RESET')]
+
+    def __call__(self, url, config):
+        self.calls.append(url)
+        raise self.errors[min(len(self.calls), len(self.errors)) - 1]
+
+
+@pytest.fixture
+def browser(app_module, monkeypatch):
+    browser = FakeBrowser()
+    monkeypatch.setattr(app_module, 'render_with_browser', browser)
+    monkeypatch.setattr(app_module, 'RETRY_BASE_DELAY', 0)
+    monkeypatch.setattr(app_module, 'PAGE_LOAD_TIMEOUT', 30)
+    monkeypatch.setattr(app_module, 'ATTEMPT_OVERHEAD', 5)
+    return browser
+
+
+def test_worst_case_attempt(app_module, browser):
+    assert app_module.worst_case_attempt({'wait_time': 20}) == 55
+    assert app_module.worst_case_attempt({}) == 30 + app_module.DEFAULT_WAIT_TIME + 5
+
+
+def test_retries_while_the_worst_case_fits_the_budget(app_module, browser, monkeypatch):
+    monkeypatch.setattr(app_module, 'RETRY_BUDGET', 100)
+    result = app_module.fetch_article(JS_URL, max_retries=3)
+    assert len(browser.calls) == 3
+    assert result['title'] == 'Error'
+    assert result['site_failure'] is True
+
+
+def test_no_retry_when_the_worst_case_exceeds_the_budget(app_module, browser, monkeypatch):
+    monkeypatch.setattr(app_module, 'RETRY_BUDGET', 54)
+    result = app_module.fetch_article(JS_URL, max_retries=3)
+    assert len(browser.calls) == 1
+    assert 'tras 1 intentos' in result['body']
+
+
+def test_fatal_errors_are_not_retried(app_module, browser, monkeypatch):
+    monkeypatch.setattr(app_module, 'RETRY_BUDGET', 1000)
+    browser.errors = [WebDriverException('unknown error: net::ERR_NAME_NOT_RESOLVED')]
+    result = app_module.fetch_article(JS_URL, max_retries=3)
+    assert len(browser.calls) == 1
+    assert result['site_failure'] is True
+
+
+def test_browser_crash_is_retried_without_blaming_the_site(app_module, browser, monkeypatch):
+    monkeypatch.setattr(app_module, 'RETRY_BUDGET', 1000)
+    browser.errors = [WebDriverException('invalid session id')]
+    result = app_module.fetch_article(JS_URL, max_retries=2)
+    assert len(browser.calls) == 2
+    assert result['site_failure'] is False
+
+
+def test_open_circuit_skips_the_site(app_module, browser, monkeypatch):
+    monkeypatch.setattr(app_module, 'RETRY_BUDGET', 0)
+    monkeypatch.setattr(app_module, 'BREAKER', CircuitBreaker(failure_threshold=2, cooldown=60))
+    app_module.fetch(JS_URL, max_retries=1)
+    app_module.fetch(JS_URL, max_retries=1)
+
+    result = app_module.fetch(JS_URL, max_retries=1)
+    assert len(browser.calls) == 2
+    assert 'circuito abierto' in result['body']
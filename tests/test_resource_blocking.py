@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+import resource_blocking
+from resource_blocking import BLOCKED_HOSTS, blocked_patterns, page_transfer_stats, prepare_page, read_page_source
+
+
+def network_event(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+class FakeDriver:
+    """Lo que prepare_page y page_transfer_stats usan del driver de Selenium."""
+
+    def __init__(self, log=()):
+        self.cdp = []
+        self.log = list(log)
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+
+    def get_log(self, kind):
+        assert kind == 'performance'
+        entries, self.log = self.log, []
+        return entries
+
+
+def test_default_config_blocks_every_pattern():
+    patterns = blocked_patterns({})
+    assert '*.png*' in patterns
+    assert '*googletagmanager.com*' in patterns
+    assert len(patterns) == len(set(patterns))
+
+
+def test_allow_resources_unblocks_only_those_patterns():
+    patterns = blocked_patterns({'allow_resources': ['*googletagmanager.com*', '*no-bloqueado.com*']})
+    assert '*googletagmanager.com*' not in patterns
+    assert len(patterns) == len(blocked_patterns({})) - 1
+
+
+def test_extra_patterns_from_the_environment(monkeypatch):
+    monkeypatch.setattr(resource_blocking, 'EXTRA_BLOCKED_PATTERNS', ['*widgets.example*'])
+    assert '*widgets.example*' in blocked_patterns({})
+    assert '*widgets.example*' not in blocked_patterns({'allow_resources': ['*widgets.example*']})
+
+
+def test_prepare_page_blocks_and_discards_the_previous_log():
+    driver = FakeDriver([network_event('Network.loadingFinished', encodedDataLength=500)])
+    prepare_page(driver, {'allow_resources': BLOCKED_HOSTS})
+
+    assert driver.cdp[0] == ('Network.enable', {})
+    command, params = driver.cdp[1]
+    assert command == 'Network.setBlockedURLs'
+    assert not set(params['urls']) & set(BLOCKED_HOSTS)
+    assert page_transfer_stats(driver) == {'bytes': 0, 'requests': 0, 'blocked': 0}
+
+
+def test_prepare_page_without_blocking_only_drains_the_log(monkeypatch):
+    monkeypatch.setattr(resource_blocking, 'RESOURCE_BLOCKING', False)
+    driver = FakeDriver([network_event('Network.loadingFinished', encodedDataLength=500)])
+    prepare_page(driver, {})
+    assert driver.cdp == []
+    assert driver.log == []
+
+
+def test_page_transfer_stats_counts_bytes_and_blocked_requests():
+    driver = FakeDriver([
+        network_event('Network.requestWillBeSent'),
+        network_event('Network.loadingFinished', encodedDataLength=1200),
+        network_event('Network.loadingFinished', encodedDataLength=300),
+        network_event('Network.loadingFailed', blockedReason='inspector'),
+        network_event('Network.loadingFailed', errorText='net::ERR_ABORTED'),
+        {'message': 'no es JSON'},
+    ])
+    assert page_transfer_stats(driver) == {'bytes': 1500, 'requests': 2, 'blocked': 1}
+
+
+def test_page_transfer_stats_without_performance_log():
+    class NoLogDriver:
+        def get_log(self, kind):
+            raise RuntimeError('log de rendimiento no habilitado')
+
+    assert page_transfer_stats(NoLogDriver()) == {'bytes': 0, 'requests': 0, 'blocked': 0}
+
+
+@pytest.mark.parametrize('blocking, image_pref', [(True, 2), (False, None)])
+def test_configure_options(monkeypatch, blocking, image_pref):
+    from selenium.webdriver.chrome.options import Options
+
+    monkeypatch.setattr(resource_blocking, 'RESOURCE_BLOCKING', blocking)
+    options = Options()
+    resource_blocking.configure_options(options)
+    prefs = options.experimental_options.get('prefs', {})
+    assert prefs.get('profile.managed_default_content_settings.images') == image_pref
+    assert options.to_capabilities()['goog:loggingPrefs'] == {'performance': 'ALL'}
+
+
+class SourceDriver:
+    """Driver con una página de `html`; sin `script_ok` el script de reducción falla."""
+
+    def __init__(self, html, script_ok=True):
+        self.page_source = html
+        self.script_ok = script_ok
+
+    def execute_script(self, script, max_chars):
+        if not self.script_ok:
+            raise RuntimeError('javascript error')
+        return [self.page_source[:max_chars] if max_chars > 0 else self.page_source, len(self.page_source)]
+
+
+@pytest.mark.parametrize('script_ok', [True, False])
+def test_read_page_source_truncates_to_the_cap(script_ok):
+    html = '<html><body>' + 'x' * 1000 + '</body></html>'
+    assert read_page_source(SourceDriver(html, script_ok), 100) == (html[:100], len(html))
+
+
+@pytest.mark.parametrize('script_ok', [True, False])
+def test_read_page_source_without_cap(script_ok):
+    html = '<html><body>' + 'x' * 1000 + '</body></html>'
+    assert read_page_source(SourceDriver(html, script_ok), 0) == (html, len(html))
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from conftest import InMemorySheetSource
+from sheets import SheetSource, TitleIndex
+from title_match import FuzzyTitleIndex
+
+
+def make_index(rows, ttl=300, fuzzy=False):
+    source = InMemorySheetSource(['Fecha', 'Titulo'], rows)
+    return source, TitleIndex(source, 'Titulo', ttl=ttl, fuzzy_factory=FuzzyTitleIndex if fuzzy else None)
+
+
+def wait_refreshed(index, timeout=2):
+    deadline = time.time() + timeout
+    while index.stats()['refreshing'] and time.time() < deadline:
+        time.sleep(0.01)
+    assert not index.stats()['refreshing']
+
+
+def test_sheet_source_is_abstract():
+    with pytest.raises(TypeError):
+        SheetSource()
+
+
+def test_first_load_normalizes_titles():
+    _, index = make_index([['1', '  Hola Mundo '], ['2', 'Otra nota']])
+    assert index.titles() == {'hola mundo', 'otra nota'}
+    assert index.stats()['rows'] == 2
+
+
+def test_missing_column_raises():
+    source = InMemorySheetSource(['Fecha'], [['1']])
+    with pytest.raises(ValueError):
+        TitleIndex(source, 'Titulo').titles()
+
+
+def test_refresh_fetches_only_appended_rows():
+    source, index = make_index([['1', 'Primera']])
+    index.titles()
+    source.append(['2', 'Segunda'])
+    source.append(['3', 'Tercera'])
+
+    assert index.refresh() == 2
+    assert index.titles() == {'primera', 'segunda', 'tercera'}
+    assert index.stats()['rows'] == 3
+
+
+def test_trailing_empty_rows_are_not_counted():
+    # La API omite las celdas vacías del final: esas filas se vuelven a pedir
+    source, index = make_index([['1', 'Primera'], ['2', ''], ['3', '']])
+    assert index.titles() == {'primera'}
+    assert index.stats()['rows'] == 1
+
+    source.append(['4', 'Cuarta'])
+    assert index.refresh() == 3
+    assert index.titles() == {'primera', 'cuarta'}
+    assert index.stats()['rows'] == 4
+
+
+def test_fresh_index_does_not_call_the_sheet():
+    source, index = make_index([['1', 'Primera']])
+    index.titles()
+    calls = source.calls
+    index.titles()
+    index.titles()
+    assert source.calls == calls
+
+
+def test_expired_ttl_refreshes_in_background():
+    source, index = make_index([['1', 'Primera']], ttl=0.05)
+    index.titles()
+    source.append(['2', 'Segunda'])
+    time.sleep(0.1)
+
+    index.titles()
+    wait_refreshed(index)
+    assert index.titles() == {'primera', 'segunda'}
+    assert index.stats()['rows'] == 2
+
+
+def test_invalidate_reloads_edited_rows():
+    source, index = make_index([['1', 'Primera'], ['2', 'Segunda']], fuzzy=True)
+    index.titles()
+    source.rows[0][1] = 'Primera corregida'
+    del source.rows[1]
+
+    index.invalidate()
+    assert index.stats()['titles'] == 0
+    assert index.titles() == {'primera corregida'}
+    assert index.stats()['rows'] == 1
+    assert index.fuzzy().best_match('Segunda', 0.9) is None
+    assert index.fuzzy().best_match('Primera corregida!', 0.9) is not None
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import InMemorySheetSource
+from sheets import TitleIndex
+from title_match import FuzzyTitleIndex, normalize_for_match
+
+
+def test_known_outlet_tag_is_stripped():
+    assert normalize_for_match('López Obrador anuncia reforma - Proceso') == 'lopez obrador anuncia reforma'
+    assert normalize_for_match('López Obrador anuncia reforma | El Universal') == 'lopez obrador anuncia reforma'
+    assert normalize_for_match('López Obrador anuncia reforma — La Jornada') == 'lopez obrador anuncia reforma'
+    assert normalize_for_match('López Obrador anuncia reforma - infobae.com') == 'lopez obrador anuncia reforma'
+
+
+def test_other_dash_tails_are_part_of_the_title():
+    assert normalize_for_match('Sheinbaum - Presenta reforma eléctrica al Congreso') == \
+        'sheinbaum presenta reforma electrica al congreso'
+
+
+def test_title_after_dash_does_not_match_its_prefix():
+    index = FuzzyTitleIndex()
+    index.add('Sheinbaum')
+    assert index.best_match('Sheinbaum - Presenta reforma eléctrica al Congreso', 0.9) is None
+
+
+def test_same_title_from_another_outlet_matches_exactly():
+    index = FuzzyTitleIndex()
+    index.add('López Obrador anuncia nueva reforma eléctrica - Proceso')
+    assert index.best_match('Lopez Obrador anuncia nueva reforma electrica | Milenio', 0.9) == \
+        ('López Obrador anuncia nueva reforma eléctrica - Proceso', 1.0)
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    source = InMemorySheetSource(['Titulo'], [['López Obrador anuncia nueva reforma eléctrica - Proceso']])
+    monkeypatch.setattr(app_module, 'TITLE_INDEX', TitleIndex(source, 'Titulo', fuzzy_factory=FuzzyTitleIndex))
+    return app_module.app.test_client()
+
+
+def test_filter_titles_reports_the_sheet_title_on_exact_hits(client):
+    items = [{'title': ' lópez obrador anuncia nueva reforma eléctrica - proceso '}, {'title': 'Otra nota'}]
+    data = client.post('/filter_titles?mode=fuzzy', json=items).get_json()
+    assert data['data'] == [{'title': 'Otra nota'}]
+    assert data['duplicates'] == [{
+        'title': items[0]['title'],
+        'matched_title': 'López Obrador anuncia nueva reforma eléctrica - Proceso',
+        'score': 1.0,
+    }]
+
+
+@pytest.mark.parametrize('threshold', ['alto', 'nan', '-0.1', '1.5'])
+def test_filter_titles_rejects_invalid_thresholds(client, threshold):
+    response = client.post(f'/filter_titles?mode=fuzzy&threshold={threshold}', json=[{'title': 'Nota'}])
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from warmup import Warmup
+
+
+def run(warmup):
+    warmup.start()
+    warmup._thread.join(5)
+    return warmup.state()
+
+
+def test_steps_run_in_order_and_a_failure_does_not_stop_the_rest():
+    ran = []
+
+    def broken():
+        ran.append('sheets')
+        raise RuntimeError('sin credenciales')
+
+    state = run(Warmup([
+        ('libraries', lambda: ran.append('libraries')),
+        ('sheets', broken),
+        ('browsers', lambda: ran.append('browsers')),
+    ]))
+    assert ran == ['libraries', 'sheets', 'browsers']
+    assert state['status'] == 'done'
+    assert list(state['steps']) == ['libraries', 'sheets', 'browsers']
+    assert state['steps']['sheets']['error'] == 'sin credenciales'
+    assert state['steps']['browsers']['error'] is None
+    assert state['finished_at'] >= state['started_at']
+
+
+def test_start_is_idempotent():
+    calls = []
+    warmup = Warmup([('libraries', lambda: calls.append(1))])
+    run(warmup)
+    warmup.start()
+    assert calls == [1]
+
+
+def test_without_steps_it_stays_disabled():
+    warmup = Warmup([])
+    warmup.start()
+    assert warmup.status == 'disabled'
+    assert warmup._thread is None
+
+
+def test_status_while_running():
+    release = threading.Event()
+    warmup = Warmup([('browsers', release.wait)])
+    assert warmup.status == 'pending'
+    warmup.start()
+    assert warmup.status == 'running'
+    release.set()
+    warmup._thread.join(5)
+    assert warmup.status == 'done'
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def test_first_response_starts_the_warmup(app_module, client, monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr(app_module, 'WARMUP', Warmup([('libraries', started.set)]))
+
+    response = client.get('/')
+    assert response.get_json()['warmup'] == 'pending'
+    assert not started.is_set()
+    response.close()
+
+    assert started.wait(5)
+    app_module.WARMUP._thread.join(5)
+    assert client.get('/').get_json()['warmup'] == 'done'
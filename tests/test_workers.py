@@ -0,0 +1,188 @@
+import sys
+import time
+import threading
+
+import psutil
+import pytest
+
+from workers import WorkerFailed, WorkerPool, WorkersBusy
+
+# Worker de mentira con el protocolo de scrape_worker: una línea JSON por tarea
+FAKE_WORKER = '''
+import os, sys, json, time, subprocess
+for line in sys.stdin:
+    task = json.loads(line)
+    if task.get('exit'):
+        sys.exit(3)
+    child = None
+    if task.get('spawn'):
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']).pid
+    time.sleep(task.get('sleep', 0))
+    sys.stdout.write(json.dumps({'pid': os.getpid(), 'child': child, 'task': task}) + '\\n')
+    sys.stdout.flush()
+'''
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**options):
+        pool = WorkerPool([sys.executable, '-c', FAKE_WORKER], **options)
+        pool.start()
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def in_background(pool, payload):
+    thread = threading.Thread(target=pool.run, args=(payload,), daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'la condición no se cumplió a tiempo'
+        time.sleep(0.01)
+
+
+def gone(pid):
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+
+
+def test_task_round_trip(make_pool):
+    pool = make_pool(processes=1)
+    response = pool.run({'url': 'https://example.com/nota'})
+    assert response['task'] == {'url': 'https://example.com/nota'}
+    assert pool.stats()['tasks'] == 1
+    assert pool.stats()['idle'] == 1
+
+
+def test_full_queue_is_rejected_at_once(make_pool):
+    pool = make_pool(processes=1, max_pending=1, wait_timeout=5)
+    busy = in_background(pool, {'sleep': 0.5})
+    wait_for(lambda: pool.stats()['busy'] == 1)
+    waiting = in_background(pool, {})
+    wait_for(lambda: pool.stats()['pending'] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(WorkersBusy):
+        pool.run({})
+    assert time.monotonic() - started < 0.3
+    assert pool.stats()['rejected'] == 1
+
+    busy.join()
+    waiting.join()
+    assert pool.stats()['tasks'] == 2
+
+
+def test_wait_for_a_free_worker_is_bounded(make_pool):
+    pool = make_pool(processes=1, wait_timeout=5)
+    busy = in_background(pool, {'sleep': 0.5})
+    wait_for(lambda: pool.stats()['busy'] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(WorkersBusy):
+        pool.run({}, wait_timeout=0.2)
+    assert 0.2 <= time.monotonic() - started < 0.5
+    busy.join()
+
+
+def test_waiting_caller_gets_the_released_worker(make_pool):
+    pool = make_pool(processes=1, wait_timeout=5)
+    busy = in_background(pool, {'sleep': 0.2})
+    wait_for(lambda: pool.stats()['busy'] == 1)
+    assert pool.run({'url': 'segunda'})['task'] == {'url': 'segunda'}
+    busy.join()
+
+
+def test_task_timeout_kills_and_replaces_the_worker(make_pool):
+    pool = make_pool(processes=1, task_timeout=1)
+    first = pool.run({})
+    with pytest.raises(WorkerFailed):
+        pool.run({'sleep': 30})
+
+    assert gone(first['pid'])
+    # El reemplazo atiende la siguiente tarea
+    assert pool.run({})['pid'] != first['pid']
+    assert pool.stats()['failures'] == 1
+    assert pool.stats()['restarts'] == 1
+
+
+def test_grandchildren_die_with_the_worker(make_pool):
+    pool = make_pool(processes=1, task_timeout=1)
+    child = pool.run({'spawn': True})['child']
+    assert not gone(child)
+    with pytest.raises(WorkerFailed):
+        pool.run({'sleep': 30})
+    wait_for(lambda: gone(child))
+
+
+def test_dead_worker_is_replaced(make_pool):
+    pool = make_pool(processes=1)
+    with pytest.raises(WorkerFailed):
+        pool.run({'exit': True})
+    assert pool.run({})['task'] == {}
+    assert pool.stats()['idle'] == 1
+
+
+def test_worker_is_recycled_after_max_tasks(make_pool):
+    pool = make_pool(processes=1, max_tasks=2)
+    pids = [pool.run({})['pid'] for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
+    assert pool.stats()['restarts'] == 1
+
+
+def test_closed_pool_rejects_tasks(make_pool):
+    pool = make_pool(processes=1)
+    pid = pool.run({})['pid']
+    pool.close()
+    assert gone(pid)
+    with pytest.raises(WorkersBusy):
+        pool.run({}, wait_timeout=0.1)
+
+
+class SizedWorker:
+    """Lo que WorkerPool._enforce_budget usa de un _Worker: su RSS y kill_browser."""
+
+    def __init__(self, pid, rss_mb):
+        self.pid = pid
+        self.rss = rss_mb
+        self.browser_killed = False
+
+    def rss_mb(self):
+        return self.rss
+
+    def kill_browser(self):
+        self.browser_killed = True
+        self.rss = 20
+
+
+def test_memory_budget_kills_idle_browsers_first():
+    pool = WorkerPool([sys.executable, '-c', FAKE_WORKER], memory_budget_mb=700)
+    idle_small, idle_large, busy = SizedWorker(1, 200), SizedWorker(2, 300), SizedWorker(3, 500)
+    pool._workers = {idle_small, idle_large, busy}
+    pool._idle = [idle_small, idle_large]
+
+    pool._enforce_budget()
+    assert (idle_small.browser_killed, idle_large.browser_killed, busy.browser_killed) == (True, True, False)
+    assert pool.stats()['budget_kills'] == 2
+    assert pool.stats()['rss_mb'] == 1000
+
+
+def test_memory_budget_kills_busy_browsers_when_needed():
+    pool = WorkerPool([sys.executable, '-c', FAKE_WORKER], memory_budget_mb=300)
+    idle, busy = SizedWorker(1, 100), SizedWorker(2, 500)
+    pool._workers = {idle, busy}
+    pool._idle = [idle]
+
+    pool._enforce_budget()
+    assert idle.browser_killed and busy.browser_killed
@@ -0,0 +1,160 @@
+import re
+import threading
+import unicodedata
+
+from domain_config import DOMAIN_CONFIG, normalize_host
+
+# Etiqueta de la fuente al final del título: "... - Proceso", "... | El Universal"
+SOURCE_TAG_RE = re.compile(r'\s+[|\-–—]\s+([^|\-–—]{1,40})$')
+NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+# Medios cuya etiqueta se quita, además de los sitios de DOMAIN_CONFIG (por
+# nombre de dominio: 'El Universal', 'eluniversal.com.mx'). Cualquier otra
+# cola tras un guion es parte del título: "Sheinbaum - Presenta reforma ..."
+OUTLET_NAMES = (
+    'La Jornada', 'El Debate', 'Reforma', 'El Sol de México', 'El País',
+    'Animal Político', 'Forbes México', 'Expansión', 'Excélsior',
+)
+
+SHINGLE_SIZE = 3
+# Firma de 30 valores en 10 bandas de 3: umbral LSH efectivo ~0.46 Jaccard
+NUM_PERM = 30
+BANDS = 10
+ROWS = NUM_PERM // BANDS
+EMPTY = 1 << 64
+
+
+def fold_text(text):
+    """Texto sin acentos, puntuación ni mayúsculas, con espacios simples."""
+    # NFKD separa las marcas diacríticas; al pasar a ASCII se descartan
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return NON_ALNUM_RE.sub(' ', text).strip()
+
+
+def _outlet_key(name):
+    return fold_text(name).replace(' ', '')
+
+
+def _outlet_keys():
+    keys = {_outlet_key(name) for name in OUTLET_NAMES}
+    for host in DOMAIN_CONFIG:
+        if host != 'default':
+            host = normalize_host(host)
+            keys.add(_outlet_key(host))
+            keys.add(_outlet_key(host.split('.', 1)[0]))
+    return frozenset(keys)
+
+
+OUTLET_KEYS = _outlet_keys()
+
+
+def strip_source_tag(title):
+    """Título sin la etiqueta final, solo si nombra un medio conocido."""
+    match = SOURCE_TAG_RE.search(title)
+    if match and _outlet_key(match.group(1)) in OUTLET_KEYS:
+        return title[:match.start()]
+    return title
+
+
+def normalize_for_match(title):
+    """Quita acentos, puntuación, mayúsculas y la etiqueta de fuente final."""
+    return fold_text(strip_source_tag(title.strip()))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """N-gramas de caracteres del texto normalizado."""
+    padded = f" {text} "
+    if len(padded) <= size:
+        return frozenset([padded])
+    return frozenset(padded[i:i + size] for i in range(len(padded) - size + 1))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class FuzzyTitleIndex:
+    """Índice MinHash/LSH sobre n-gramas de caracteres de los títulos.
+
+    Cada título se reduce a una firma de NUM_PERM mínimos; la firma se parte
+    en BANDS bandas y títulos con alguna banda igual son candidatos. Solo los
+    candidatos se comparan con Jaccard exacto, así que la consulta no recorre
+    toda la hoja.
+
+    La firma usa MinHash de una sola permutación (un hash por n-grama
+    repartido en NUM_PERM cubetas, con densificación de cubetas vacías), que
+    cuesta un hash por n-grama en vez de NUM_PERM. El hash de str de Python
+    cambia entre procesos, lo cual basta porque el índice vive en memoria.
+    """
+
+    def __init__(self):
+        self._titles = []
+        self._shingles = []
+        self._exact = {}
+        self._buckets = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _signature(self, grams):
+        # Recorriendo de mayor a menor, cada cubeta se queda con su hash mínimo
+        hashes = sorted((hash(gram) & 0xFFFFFFFFFFFFFFFF for gram in grams), reverse=True)
+        minimums = {h % NUM_PERM: h // NUM_PERM for h in hashes}
+        signature = [minimums.get(slot, EMPTY) for slot in range(NUM_PERM)]
+        # Densificar: una cubeta vacía copia la siguiente no vacía (circular)
+        if EMPTY in signature:
+            for i in range(NUM_PERM):
+                if signature[i] == EMPTY:
+                    for offset in range(1, NUM_PERM):
+                        value = signature[(i + offset) % NUM_PERM]
+                        if value != EMPTY:
+                            signature[i] = value + offset
+                            break
+        return signature
+
+    def _band_keys(self, signature):
+        return [tuple(signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    def add(self, title):
+        normalized = normalize_for_match(title)
+        if not normalized:
+            return
+        with self._lock:
+            if normalized in self._exact:
+                return
+            grams = shingles(normalized)
+            title_id = len(self._titles)
+            self._titles.append(title.strip())
+            self._shingles.append(grams)
+            self._exact[normalized] = title_id
+            for bucket, key in zip(self._buckets, self._band_keys(self._signature(grams))):
+                bucket.setdefault(key, []).append(title_id)
+
+    def add_many(self, titles):
+        for title in titles:
+            self.add(title)
+
+    def best_match(self, title, threshold):
+        """Devuelve (título de la hoja, score) del más parecido, o None bajo el umbral."""
+        normalized = normalize_for_match(title)
+        if not normalized:
+            return None
+
+        title_id = self._exact.get(normalized)
+        if title_id is not None:
+            return self._titles[title_id], 1.0
+
+        grams = shingles(normalized)
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(self._signature(grams))):
+            candidates.update(bucket.get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            score = jaccard(grams, self._shingles[candidate])
+            if score >= threshold and (best is None or score > best[1]):
+                best = (self._titles[candidate], score)
+        return best
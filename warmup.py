@@ -0,0 +1,67 @@
+import time
+import logging
+import threading
+
+from metrics import record_stage
+
+
+class Warmup:
+    """Precalentamiento en segundo plano una vez que el servidor atiende.
+
+    La API responde / en cuanto termina de importarse. `start()` se llama
+    al terminar de enviar la primera respuesta (en un worker de scraping,
+    al arrancar); entonces un hilo corre `steps` (lista de (nombre,
+    función)) para cargar lo que si no pagarían las solicitudes siguientes:
+    librerías pesadas, navegadores del pool, cliente de Sheets. Un paso que
+    falla se registra y no impide los siguientes.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self._thread = None
+        self._lock = threading.Lock()
+        self._state = {
+            'status': 'disabled' if not steps else 'pending',
+            'started_at': None,
+            'finished_at': None,
+            'steps': {},
+        }
+
+    def start(self):
+        """Arranca el hilo de precalentamiento (idempotente; sin pasos no hace nada)."""
+        with self._lock:
+            if self._thread is not None or not self.steps:
+                return
+            self._state['status'] = 'running'
+            self._state['started_at'] = time.time()
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, step in self.steps:
+            started = time.perf_counter()
+            error = None
+            try:
+                step()
+            except Exception as e:
+                error = str(e)
+                logging.warning(f"Precalentamiento '{name}' falló: {error}")
+            elapsed = time.perf_counter() - started
+            record_stage(f'warmup_{name}', elapsed)
+            with self._lock:
+                self._state['steps'][name] = {'seconds': round(elapsed, 3), 'error': error}
+
+        with self._lock:
+            self._state['status'] = 'done'
+            self._state['finished_at'] = time.time()
+            total = self._state['finished_at'] - self._state['started_at']
+        logging.info(f"Precalentamiento terminado en {total:.1f}s")
+
+    @property
+    def status(self):
+        with self._lock:
+            return self._state['status']
+
+    def state(self):
+        with self._lock:
+            return {**self._state, 'steps': dict(self._state['steps'])}
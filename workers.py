@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import select
+import signal
+import logging
+import threading
+import subprocess
+
+from metrics import record_stage
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: sin él no hay presupuesto de memoria
+    psutil = None
+
+# Cada cuánto (segundos) el supervisor revisa los workers ociosos
+SUPERVISE_INTERVAL = 2.0
+
+
+class WorkersBusy(Exception):
+    """Todos los workers ocupados y la espera se agotó o la fila está llena."""
+
+
+class WorkerFailed(Exception):
+    """El worker murió o no respondió a tiempo; ya se reemplazó."""
+
+
+class _Worker:
+    """Proceso worker con su propio grupo de procesos (él, chromedriver y Chrome)."""
+
+    def __init__(self, command, env=None):
+        # stdin/stdout son el canal de tareas; stderr se hereda para los logs
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, start_new_session=True
+        )
+        self.tasks = 0
+        self.started_at = time.time()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def _tree(self):
+        try:
+            root = psutil.Process(self.pid)
+            return [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def rss_mb(self):
+        """RSS del worker y sus descendientes (chromedriver, Chrome) en MB."""
+        total = 0
+        for process in self._tree():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def kill_browser(self):
+        """Mata Chrome pero no el worker ni chromedriver.
+
+        Como DriverPool.kill_tree: la tarea en curso falla con un
+        WebDriverException normal y el pool del worker lanza otro navegador.
+        """
+        try:
+            drivers = psutil.Process(self.pid).children()
+        except psutil.Error:
+            return
+        for driver in drivers:
+            try:
+                browsers = driver.children(recursive=True)
+            except psutil.Error:
+                continue
+            for process in reversed(browsers):
+                try:
+                    process.kill()
+                except psutil.Error:
+                    pass
+
+    def call(self, payload, timeout):
+        """Envía una tarea y espera la respuesta hasta `timeout` segundos."""
+        try:
+            self.process.stdin.write((json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerFailed(f"El worker {self.pid} no acepta tareas: {str(e)}")
+
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            raise WorkerFailed(f"El worker {self.pid} no respondió en {timeout}s")
+        line = self.process.stdout.readline()
+        if not line:
+            raise WorkerFailed(f"El worker {self.pid} terminó (código {self.process.poll()})")
+        return json.loads(line)
+
+    def kill(self):
+        """Mata el grupo completo para no dejar Chrome huérfano."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        self.process.wait()
+
+
+class WorkerPool:
+    """Procesos de scraping supervisados, separados de los workers de la API.
+
+    Cada proceso (`command`, p. ej. `python -m scrape_worker`) atiende una
+    tarea a la vez con su propio navegador. `run()` toma un worker libre,
+    le envía la tarea por su stdin y espera la respuesta en su stdout.
+
+    Contrapresión: si no hay worker libre se espera hasta `wait_timeout`,
+    pero con `max_pending` llamadas ya esperando se rechaza de inmediato con
+    WorkersBusy. Un worker que no responde en `task_timeout` o que muere se
+    mata junto con su Chrome y se reemplaza; tras `max_tasks` tareas se
+    recicla. Un hilo supervisor repone los workers ociosos que mueran.
+
+    Con psutil, el supervisor también suma el RSS de todos los workers con
+    sus navegadores; si pasa `memory_budget_mb` mata el Chrome de los más
+    grandes (ociosos primero) hasta volver a caber.
+    """
+
+    def __init__(self, command, processes=2, max_pending=8, wait_timeout=30, task_timeout=110, max_tasks=200, env=None,
+                 memory_budget_mb=0):
+        self.command = command
+        self.processes = processes
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self.task_timeout = task_timeout
+        self.max_tasks = max_tasks
+        self.env = env
+        self.memory_budget_mb = memory_budget_mb
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._workers = set()
+        self._rss_mb = 0.0
+        self._busy = 0
+        self._pending = 0
+        self._closed = False
+        self._supervisor = None
+        self._stats = {
+            'tasks': 0,
+            'failures': 0,
+            'restarts': 0,
+            'rejected': 0,
+            'budget_kills': 0,
+        }
+
+    def start(self):
+        """Lanza los workers y el hilo supervisor (idempotente)."""
+        if self._supervisor is not None:
+            return
+        if self.memory_budget_mb and psutil is None:
+            logging.warning("psutil no está instalado: sin presupuesto de memoria para los workers")
+        self._fill()
+        self._supervisor = threading.Thread(target=self._supervise, name='scraper-workers-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self):
+        try:
+            worker = _Worker(self.command, self.env)
+        except OSError as e:
+            logging.error(f"No se pudo lanzar un worker de scraping: {str(e)}")
+            return None
+        with self._cond:
+            self._workers.add(worker)
+        return worker
+
+    def _kill(self, worker):
+        with self._cond:
+            self._workers.discard(worker)
+        worker.kill()
+
+    def _fill(self):
+        """Lanza workers hasta completar `processes`."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._busy >= self.processes:
+                    return
+                # Reservar el lugar antes de soltar el lock
+                self._busy += 1
+            worker = self._spawn()
+            with self._cond:
+                self._busy -= 1
+                if worker is None:
+                    return
+                self._idle.append(worker)
+                self._cond.notify()
+
+    def _supervise(self):
+        while not self._closed:
+            time.sleep(SUPERVISE_INTERVAL)
+            with self._cond:
+                dead = [worker for worker in self._idle if not worker.alive()]
+                for worker in dead:
+                    self._idle.remove(worker)
+                    self._stats['restarts'] += 1
+            for worker in dead:
+                logging.warning(f"Worker de scraping {worker.pid} murió estando ocioso, reemplazando")
+                self._kill(worker)
+            self._fill()
+            if self.memory_budget_mb and psutil is not None:
+                self._enforce_budget()
+
+    def _enforce_budget(self):
+        """Mata navegadores de workers hasta que la suma de RSS quepa en memory_budget_mb."""
+        with self._cond:
+            workers = list(self._workers)
+            idle = set(self._idle)
+        sizes = {worker: worker.rss_mb() for worker in workers}
+        total = sum(sizes.values())
+        with self._cond:
+            self._rss_mb = total
+        # Ociosos primero (no cortan ninguna página), de mayor a menor
+        for worker in sorted(workers, key=lambda w: (w not in idle, -sizes[w])):
+            if total <= self.memory_budget_mb:
+                return
+            logging.warning(
+                f"Workers con {total:.0f} MB de RSS, presupuesto de {self.memory_budget_mb} MB: "
+                f"matando el navegador del worker {worker.pid} ({sizes[worker]:.0f} MB)"
+            )
+            worker.kill_browser()
+            total -= sizes[worker] - worker.rss_mb()
+            with self._cond:
+                self._stats['budget_kills'] += 1
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._idle and self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise WorkersBusy(f"Todos los workers ocupados y {self._pending} solicitudes en espera")
+            self._pending += 1
+            try:
+                while not self._idle:
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        self._stats['rejected'] += 1
+                        raise WorkersBusy(f"Ningún worker libre tras {timeout}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._pending -= 1
+            self._busy += 1
+            return self._idle.pop()
+
+    def _release(self, worker, replace=False):
+        if replace:
+            self._kill(worker)
+            worker = None if self._closed else self._spawn()
+        with self._cond:
+            self._busy -= 1
+            if worker is not None and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+        # Pool cerrado (o no se pudo reemplazar: el supervisor lo repone)
+        if worker is not None:
+            self._kill(worker)
+
+    def run(self, payload, wait_timeout=None):
+        """Ejecuta la tarea en un worker libre y devuelve su respuesta.
+
+        Lanza WorkersBusy si no hubo worker libre a tiempo y WorkerFailed si
+        el worker murió o excedió `task_timeout`.
+        """
+        started = time.perf_counter()
+        worker = self._acquire(self.wait_timeout if wait_timeout is None else wait_timeout)
+        record_stage('worker_wait', time.perf_counter() - started)
+
+        replace = True
+        try:
+            if not worker.alive():
+                raise WorkerFailed(f"El worker {worker.pid} había terminado")
+            response = worker.call(payload, self.task_timeout)
+            worker.tasks += 1
+            replace = worker.tasks >= self.max_tasks
+            with self._cond:
+                self._stats['tasks'] += 1
+                if replace:
+                    self._stats['restarts'] += 1
+            return response
+        except WorkerFailed as e:
+            logging.error(f"{str(e)}; reemplazando el worker")
+            with self._cond:
+                self._stats['failures'] += 1
+                self._stats['restarts'] += 1
+            raise
+        finally:
+            self._release(worker, replace=replace)
+
+    def stats(self):
+        """Estadísticas de los workers para monitoreo."""
+        with self._cond:
+            return {
+                'processes': self.processes,
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'memory_budget_mb': self.memory_budget_mb,
+                'rss_mb': round(self._rss_mb, 1),
+                **self._stats,
+            }
+
+    def close(self):
+        """Mata los workers ociosos; los ocupados se matan al terminar su tarea."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            self._kill(worker)